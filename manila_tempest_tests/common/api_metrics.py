@@ -0,0 +1,169 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import csv
+import json
+import math
+import os
+import re
+import threading
+
+from oslo_log import log
+from tempest import config
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+# IDs in URLs are UUIDs, 32 hex digits (project IDs) or integers.
+_ID_PATTERN = re.compile(
+    r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|'
+    r'[0-9a-f]{32}|\d+)$', re.IGNORECASE)
+# Latencies are counted in buckets growing by 5%, so percentiles are
+# accurate to about 5% while recording a call is O(1) and memory bounded.
+_BUCKET_GROWTH = math.log(1.05)
+_CSV_FIELDS = ('method', 'url', 'version', 'status', 'count', 'p50', 'p95',
+               'p99', 'max', 'total')
+
+
+def normalize_url(url):
+    """Returns the URL template of a request, with its IDs replaced.
+
+    e.g. 'shares/<uuid>/action?x=y' becomes 'shares/{id}/action'.
+    """
+    path = url.split('?', 1)[0]
+    return '/'.join('{id}' if _ID_PATTERN.match(part) else part
+                    for part in path.split('/'))
+
+
+class Histogram(object):
+    """Log-bucketed latency histogram."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        bucket = int(math.log(max(seconds, 1e-6)) / _BUCKET_GROWTH)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent):
+        """Returns the upper bound of the bucket holding the percentile."""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100.0)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(math.exp((bucket + 1) * _BUCKET_GROWTH), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'p50': round(self.percentile(50), 4),
+            'p95': round(self.percentile(95), 4),
+            'p99': round(self.percentile(99), 4),
+            'max': round(self.max, 4),
+            'total': round(self.total, 4),
+        }
+
+
+class ApiCallRecorder(object):
+    """Thread safe per endpoint latency histograms of API calls.
+
+    Calls are keyed by HTTP method, URL template, microversion and response
+    status. Besides the process wide histograms, calls are also recorded in
+    the scopes that are open at the time, e.g. one scope per test.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._scopes = []
+
+    def record(self, method, url, version, status, seconds):
+        key = (method, normalize_url(url), version, status)
+        with self._lock:
+            for histograms in [self._histograms] + self._scopes:
+                histograms.setdefault(key, Histogram()).record(seconds)
+
+    def open_scope(self):
+        """Starts recording calls in a new scope, returns the scope."""
+        scope = {}
+        with self._lock:
+            self._scopes.append(scope)
+        return scope
+
+    def close_scope(self, scope):
+        """Stops recording calls in scope and returns their summary."""
+        with self._lock:
+            self._scopes.remove(scope)
+            return self._summarize(scope)
+
+    def summary(self):
+        """Returns the summary of all the calls recorded by this process."""
+        with self._lock:
+            return self._summarize(self._histograms)
+
+    @staticmethod
+    def _summarize(histograms):
+        rows = []
+        for (method, url, version, status), histogram in sorted(
+                histograms.items(), key=lambda item: -item[1].total):
+            row = {'method': method, 'url': url, 'version': version,
+                   'status': status}
+            row.update(histogram.summary())
+            rows.append(row)
+        return rows
+
+
+_recorder = ApiCallRecorder()
+
+
+def get_recorder():
+    """Returns the API call recorder of this process."""
+    return _recorder
+
+
+def dump(directory):
+    """Writes the summary of the process' API calls as JSON and CSV.
+
+    :returns: list of paths of the written files.
+    """
+    rows = _recorder.summary()
+    base_path = os.path.join(directory, 'manila-api-calls-%s' % os.getpid())
+    with open(base_path + '.json', 'w') as json_file:
+        json.dump(rows, json_file, indent=2)
+    with open(base_path + '.csv', 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=_CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return [base_path + '.json', base_path + '.csv']
+
+
+@atexit.register
+def _dump_api_calls():
+    if not (CONF.share.api_metrics_enabled and CONF.share.api_metrics_dir):
+        return
+    try:
+        os.makedirs(CONF.share.api_metrics_dir, exist_ok=True)
+        LOG.info("Share API call metrics written to %s",
+                 dump(CONF.share.api_metrics_dir))
+    except OSError as e:
+        LOG.error("Failed to write share API call metrics: %s", e)
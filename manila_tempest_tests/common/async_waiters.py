@@ -0,0 +1,40 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Coroutine versions of the waiters, for SharesV2AsyncClient.
+
+They run the same steps as their counterparts in the waiters module, see
+waiter_steps, but sleep with asyncio so that many of them can run
+concurrently in one event loop.
+"""
+
+from manila_tempest_tests.common import waiter_steps
+from manila_tempest_tests.common import waiters
+
+wait_for_resource_status = waiter_steps.async_waiter(
+    waiters.wait_for_resource_status)
+wait_for_resources_status = waiter_steps.async_waiter(
+    waiters.wait_for_resources_status)
+wait_for_access_rules_status = waiter_steps.async_waiter(
+    waiters.wait_for_access_rules_status)
+wait_for_migration_status = waiter_steps.async_waiter(
+    waiters.wait_for_migration_status)
+wait_for_share_server_migration_status = waiter_steps.async_waiter(
+    waiters.wait_for_share_server_migration_status)
+wait_for_snapshot_access_rule_deletion = waiter_steps.async_waiter(
+    waiters.wait_for_snapshot_access_rule_deletion)
+wait_for_message = waiter_steps.async_waiter(waiters.wait_for_message)
+wait_for_messages = waiter_steps.async_waiter(waiters.wait_for_messages)
+wait_for_soft_delete = waiter_steps.async_waiter(waiters.wait_for_soft_delete)
+wait_for_restore = waiter_steps.async_waiter(waiters.wait_for_restore)
+wait_for_subnet_create_check = waiter_steps.async_waiter(
+    waiters.wait_for_subnet_create_check)
@@ -0,0 +1,124 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import threading
+
+from oslo_log import log
+from tempest.lib.common import http
+from urllib3 import connectionpool
+
+LOG = log.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_stats = {'requests': 0, 'new_connections': 0}
+
+_transports_lock = threading.Lock()
+_transports = {}
+
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+class _CountingHTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    def _new_conn(self):
+        _count('new_connections')
+        return super(_CountingHTTPConnectionPool, self)._new_conn()
+
+
+class _CountingHTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    def _new_conn(self):
+        _count('new_connections')
+        return super(_CountingHTTPSConnectionPool, self)._new_conn()
+
+
+class PooledHttp(http.ClosingHttp):
+    """Keep-alive HTTP transport based on tempest's ClosingHttp.
+
+    Unlike ClosingHttp, connections are not closed after each request but
+    returned to a per host pool, so that following requests skip the TCP and
+    TLS handshakes. Requests are otherwise sent by ClosingHttp.request.
+    """
+
+    def __init__(self, disable_ssl_certificate_validation=False,
+                 ca_certs=None, timeout=None, follow_redirects=True,
+                 num_pools=10, maxsize=10):
+        super(PooledHttp, self).__init__(
+            disable_ssl_certificate_validation=(
+                disable_ssl_certificate_validation),
+            ca_certs=ca_certs, timeout=timeout,
+            follow_redirects=follow_redirects)
+        self.connection_pool_kw['maxsize'] = maxsize
+        self.pools = type(self.pools)(num_pools)
+        self.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def urlopen(self, method, url, redirect=True, **kw):
+        # NOTE: ClosingHttp.request asks the server to close the connection
+        # after the request, keep it alive instead.
+        headers = kw.get('headers')
+        if headers and headers.get('connection') == 'close':
+            kw['headers'] = {key: value for key, value in headers.items()
+                             if key != 'connection'}
+        _count('requests')
+        return super(PooledHttp, self).urlopen(method, url,
+                                               redirect=redirect, **kw)
+
+    def clear(self):
+        # NOTE: ClosingHttp.request clears the pools after each request,
+        # which closes their connections. Keep them for the next requests.
+        pass
+
+
+def get_transport(disable_ssl_certificate_validation=False, ca_certs=None,
+                  timeout=None, follow_redirects=True, num_pools=10,
+                  maxsize=10):
+    """Returns the pooled transport shared by this process.
+
+    Clients that need the same TLS and timeout settings share one transport,
+    and thus the same connection pools.
+    """
+    key = (disable_ssl_certificate_validation, ca_certs, timeout,
+           follow_redirects, num_pools, maxsize)
+    with _transports_lock:
+        if key not in _transports:
+            _transports[key] = PooledHttp(
+                disable_ssl_certificate_validation=(
+                    disable_ssl_certificate_validation),
+                ca_certs=ca_certs, timeout=timeout,
+                follow_redirects=follow_redirects, num_pools=num_pools,
+                maxsize=maxsize)
+        return _transports[key]
+
+
+def get_connection_stats():
+    """Returns the connection counters of the pooled transports.
+
+    :returns: dict with the number of 'requests' sent, the number of
+        'new_connections' opened and of 'reused_connections'.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['reused_connections'] = max(
+        stats['requests'] - stats['new_connections'], 0)
+    return stats
+
+
+@atexit.register
+def _log_connection_stats():
+    if _transports:
+        LOG.info("Share API connection pool stats: %s",
+                 get_connection_stats())
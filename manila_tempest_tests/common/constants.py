@@ -65,6 +65,9 @@ TASK_STATE_DATA_COPYING_COMPLETED = 'data_copying_completed'
 TASK_STATE_DATA_COPYING_CANCELLED = 'data_copying_cancelled'
 TASK_STATE_DATA_COPYING_ERROR = 'data_copying_error'
 
+# User messages
+MESSAGES_QUERY_BY_TIMESTAMP_VERSION = '2.52'
+
 # Share migration graduation
 SHARE_MIGRATION_GRADUATION_VERSION = '2.96'
 
@@ -0,0 +1,267 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Event driven waiter backend.
+
+With 'share.waiter_backend' set to 'events', the waiters sleep on an
+EventClock, which wakes them up as soon as an event source reports a change
+of one of the resources they watch. They still poll, every
+'share.event_fallback_interval' seconds, in case an event is missed.
+
+Event sources push the IDs of the changed resources to an EventDispatcher.
+'share.event_source' selects either the built-in source, 'notifications'
+(manila notifications, read with oslo.messaging), or any EventSource
+subclass by its import path.
+
+The dispatcher wakes up both the waiters sleeping in threads and the
+coroutines of the async_waiters module sleeping in event loops.
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+import time
+
+from oslo_log import log
+from oslo_utils import importutils
+from tempest import config
+from tempest.lib import exceptions
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+WAITER_BACKEND_POLLING = 'polling'
+WAITER_BACKEND_EVENTS = 'events'
+
+
+class EventDispatcher(object):
+    """Wakes up the waiters watching the resources that changed."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._changes = {}
+        self._async_waiters = []
+        self._events = 0
+        self._wakeups = 0
+
+    def notify(self, resource_id):
+        """Records a change of the resource with the given ID."""
+        with self._condition:
+            self._changes[resource_id] = time.monotonic()
+            self._events += 1
+            self._condition.notify_all()
+            for loop, woken, resource_ids in self._async_waiters:
+                if resource_id in resource_ids:
+                    try:
+                        loop.call_soon_threadsafe(woken.set)
+                    except RuntimeError:
+                        # NOTE: the event loop of the waiter is closed.
+                        pass
+
+    def _changed(self, resource_ids, since):
+        return any(self._changes.get(resource_id, since) > since
+                   for resource_id in resource_ids)
+
+    def wait(self, resource_ids, timeout, since):
+        """Waits for a change of any of resource_ids after since.
+
+        :param since: time.monotonic() time after which changes count.
+        :returns: whether a change woke the waiter up before the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._changed(resource_ids, since):
+                    self._wakeups += 1
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+
+    async def wait_async(self, resource_ids, timeout, since):
+        """Coroutine version of wait, which does not block the event loop.
+
+        The event source notifies the coroutine through an asyncio.Event set
+        from its own thread.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event(),
+                  frozenset(resource_ids))
+        with self._condition:
+            if self._changed(resource_ids, since):
+                self._wakeups += 1
+                return True
+            self._async_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._condition:
+                self._async_waiters.remove(waiter)
+        with self._condition:
+            self._wakeups += 1
+        return True
+
+    def forget(self, max_age):
+        """Drops the changes older than max_age seconds."""
+        oldest = time.monotonic() - max_age
+        with self._condition:
+            self._changes = {resource_id: changed_at for resource_id,
+                             changed_at in self._changes.items()
+                             if changed_at >= oldest}
+
+    def stats(self):
+        with self._condition:
+            return {'events': self._events, 'wakeups': self._wakeups}
+
+
+class EventSource(object):
+    """Source of resource change events.
+
+    Subclasses call self.dispatcher.notify(resource_id) for each change.
+    """
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class NotificationEventSource(EventSource):
+    """Manila notifications, received with oslo.messaging.
+
+    Each worker listens in its own pool, so that every worker gets all the
+    notifications. Every ID found in a notification payload is reported as
+    changed, which at worst wakes a waiter up for nothing.
+    """
+
+    def start(self):
+        oslo_messaging = importutils.try_import('oslo_messaging')
+        if oslo_messaging is None:
+            raise exceptions.InvalidConfiguration(
+                "The 'notifications' event source requires oslo.messaging.")
+        transport = oslo_messaging.get_notification_transport(
+            CONF, url=CONF.share.event_transport_url)
+        targets = [oslo_messaging.Target(topic=CONF.share.event_topic)]
+        self._listener = oslo_messaging.get_notification_listener(
+            transport, targets, [self], executor='threading',
+            pool='manila-tempest-%s' % os.getpid())
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+        self._listener.wait()
+
+    def info(self, ctxt, publisher_id, event_type, payload, metadata):
+        for resource_id in self._find_ids(payload):
+            self.dispatcher.notify(resource_id)
+
+    # NOTE: errors are changes too, e.g. of a share going to error status.
+    error = info
+
+    def _find_ids(self, payload):
+        if isinstance(payload, dict):
+            for key, value in payload.items():
+                if isinstance(value, str) and (
+                        key == 'id' or key.endswith('_id')):
+                    yield value
+                else:
+                    yield from self._find_ids(value)
+        elif isinstance(payload, list):
+            for item in payload:
+                yield from self._find_ids(item)
+
+
+EVENT_SOURCES = {
+    'notifications': NotificationEventSource,
+}
+
+
+class EventClock(object):
+    """Waiter clock sleeping until the watched resources change.
+
+    :param dispatcher: EventDispatcher the event source notifies.
+    """
+
+    # Changes are kept this long, longer than any poll interval, so that a
+    # change happening while a waiter polls still wakes it up afterwards.
+    CHANGES_MAX_AGE = 3600
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        await asyncio.sleep(seconds)
+
+    def wait_for_events(self, resource_ids, seconds, since):
+        self.dispatcher.forget(self.CHANGES_MAX_AGE)
+        self.dispatcher.wait(resource_ids, seconds, since)
+
+    async def wait_for_events_async(self, resource_ids, seconds, since):
+        self.dispatcher.forget(self.CHANGES_MAX_AGE)
+        await self.dispatcher.wait_async(resource_ids, seconds, since)
+
+
+_lock = threading.Lock()
+_source = None
+_clock = None
+
+
+def get_source():
+    """Returns the started event source of this process."""
+    global _source
+    with _lock:
+        if _source is None:
+            source_class = EVENT_SOURCES.get(CONF.share.event_source)
+            if source_class is None:
+                source_class = importutils.import_class(
+                    CONF.share.event_source)
+            _source = source_class(EventDispatcher())
+            _source.start()
+        return _source
+
+
+def get_clock():
+    """Returns the clock of the event driven waiter backend."""
+    global _clock
+    source = get_source()
+    with _lock:
+        if _clock is None:
+            _clock = EventClock(source.dispatcher)
+        return _clock
+
+
+def enabled():
+    return CONF.share.waiter_backend == WAITER_BACKEND_EVENTS
+
+
+@atexit.register
+def _stop_source():
+    if _source is None:
+        return
+    LOG.info("Waiter events: %s", _source.dispatcher.stats())
+    try:
+        _source.stop()
+    except Exception as e:
+        LOG.warning("Failed to stop the waiter event source: %s", e)
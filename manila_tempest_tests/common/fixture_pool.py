@@ -0,0 +1,191 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Pool of the read-only fixtures test classes share within a test worker.
+
+Most test classes create a share network and share types cleaned up with
+the class that only differ in name from the ones of other classes. When
+'share.fixture_pool_enabled' is set, such fixtures are kept in a pool keyed
+by a fingerprint of the parameters they were created with: a class asking
+for a fixture equivalent to one another class created gets that one instead
+of a new one. The pool counts the classes holding each fixture, and deletes
+all of them when the test worker exits.
+
+Classes that modify their fixtures, e.g. update the extra specs of their
+share type, set 'pool_fixtures' to False and get their own.
+"""
+
+import atexit
+import copy
+import hashlib
+import json
+import threading
+
+from oslo_log import log
+from tempest.common import credentials_factory
+from tempest import config
+
+from manila_tempest_tests import clients
+from manila_tempest_tests.common import resources
+from manila_tempest_tests import share_exceptions
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+
+def fingerprint(resource_name, params):
+    """Returns the key of the fixtures of a type created with params."""
+    data = json.dumps([resource_name, params], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class FixturePool(object):
+    """Thread safe pool of fixtures, counting the classes holding each."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fixtures = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, resource_name, params, holder, client, create):
+        """Returns a fixture of a type created with params for holder.
+
+        A fixture holder does not hold yet is reused if there is one, so a
+        class asking twice for the same fixture still gets two of them.
+
+        :param resource_name: name of the type of the fixture, e.g.
+            'share_type'.
+        :param params: parameters the fixture is created with, apart from
+            its name.
+        :param holder: the test class using the fixture.
+        :param client: share client deleting the fixture on exit.
+        :param create: function creating the fixture and returning it.
+        :returns: a copy of the fixture, which holder may change.
+        """
+        key = fingerprint(resource_name, params)
+        with self._lock:
+            for fixture in self._fixtures.get(key, []):
+                if holder not in fixture['holders']:
+                    fixture['holders'].add(holder)
+                    self.reused += 1
+                    return copy.deepcopy(fixture['resource'])
+        # NOTE: created outside the lock, so that other threads do not wait
+        # for the creation of fixtures they do not need.
+        resource = create()
+        fixture = {
+            'resource_name': resource_name,
+            'params': params,
+            'resource': resource,
+            'client': client,
+            'holders': {holder},
+        }
+        with self._lock:
+            self._fixtures.setdefault(key, []).append(fixture)
+            self.created += 1
+        return copy.deepcopy(resource)
+
+    def release(self, holder):
+        """Releases the fixtures holder holds, e.g. on class cleanup.
+
+        Released fixtures stay in the pool for the classes running next.
+        """
+        with self._lock:
+            for fixtures in self._fixtures.values():
+                for fixture in fixtures:
+                    fixture['holders'].discard(holder)
+
+    def clear(self):
+        """Deletes all the fixtures of the pool, one by one.
+
+        The deletions are requested from the calling thread, since the pool
+        is cleared on exit, when no new thread can be started. Failures are
+        logged, and the fixtures that could not be deleted stay in the pool.
+
+        :returns: the fixtures left in the pool.
+        """
+        with self._lock:
+            fixtures = [fixture for fixtures in self._fixtures.values()
+                        for fixture in fixtures]
+            self._fixtures = {}
+        fixtures_by_client = {}
+        for fixture in fixtures:
+            fixtures_by_client.setdefault(
+                id(fixture['client']), []).append(fixture)
+        left = []
+        for client_fixtures in fixtures_by_client.values():
+            specs = []
+            for fixture in client_fixtures:
+                resource_type = resources.get_resource_type(
+                    fixture['resource_name'])
+                specs.append(
+                    {resource_type.deletion_key: fixture['resource']['id']})
+            try:
+                client_fixtures[0]['client'].delete_resources(
+                    specs, ignore_not_found=True, max_workers=1)
+            except share_exceptions.ResourcesWaitFailed as e:
+                LOG.error("Failed to delete pooled fixtures: %s", e)
+                left.extend(fixture for fixture in client_fixtures
+                            if fixture['resource']['id'] in e.failures)
+            except Exception:
+                LOG.exception("Failed to delete pooled fixtures %s", specs)
+                left.extend(client_fixtures)
+        with self._lock:
+            for fixture in left:
+                key = fingerprint(fixture['resource_name'], fixture['params'])
+                self._fixtures.setdefault(key, []).append(fixture)
+            return [fixture for fixtures in self._fixtures.values()
+                    for fixture in fixtures]
+
+
+_pool = FixturePool()
+_admin_client = []
+
+
+def get_pool():
+    """Returns the fixture pool of this process."""
+    return _pool
+
+
+def get_admin_client(default):
+    """Returns the admin share client pooled admin fixtures are created with.
+
+    Dynamic credentials are deleted with the test class they were created
+    for, so with them fixtures are created with the configured admin
+    credentials instead.
+
+    :param default: admin share client of the test class.
+    :returns: the share client, or None if fixtures cannot outlive the class.
+    """
+    if not CONF.auth.use_dynamic_credentials:
+        return default
+    if not CONF.auth.admin_username:
+        return None
+    if not _admin_client:
+        os_admin = clients.Clients(
+            credentials_factory.get_configured_admin_credentials())
+        _admin_client.append(os_admin.share_v2.SharesV2Client())
+    return _admin_client[0]
+
+
+@atexit.register
+def _clear_fixture_pool():
+    if not CONF.share.fixture_pool_enabled:
+        return
+    LOG.info("Fixture pool: %(created)s fixtures created, %(reused)s reused.",
+             {'created': _pool.created, 'reused': _pool.reused})
+    left = _pool.clear()
+    if left:
+        LOG.error("Pooled fixtures left behind: %s",
+                  ', '.join('%s %s' % (fixture['resource_name'],
+                                       fixture['resource']['id'])
+                            for fixture in left))
@@ -0,0 +1,112 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import threading
+
+from oslo_concurrency import lockutils
+from oslo_log import log
+from tempest import config
+
+from manila_tempest_tests.common import run_files
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+_lock = threading.Lock()
+# Microversion range advertised by each endpoint, e.g.
+# {'http://host:8786/': {'min_version': '2.0', 'max_version': '2.96'}}
+_ranges = {}
+
+
+class LatestMicroversion(str):
+    """Microversion requests default to: the configured maximum one.
+
+    Once the microversion range is negotiated, the share client lowers it to
+    the highest microversion the API supports. Microversions requested
+    explicitly, e.g. by negative tests, are sent as they are.
+    """
+
+
+def latest():
+    """Returns the default microversion of the requests."""
+    return LatestMicroversion(CONF.share.max_api_microversion)
+
+
+def _get_cache_file():
+    if CONF.share.microversion_cache_file:
+        return CONF.share.microversion_cache_file
+    return run_files.get_path('microversions')
+
+
+def _load_ranges():
+    try:
+        with open(_get_cache_file()) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_ranges(ranges):
+    cache_file = _get_cache_file()
+    tmp_file = '%s.%s' % (cache_file, os.getpid())
+    with open(tmp_file, 'w') as f:
+        json.dump(ranges, f)
+    os.replace(tmp_file, cache_file)
+
+
+def negotiate(client):
+    """Negotiates the microversion range of the client's endpoint.
+
+    The API is asked for its minimum and maximum microversions once per
+    endpoint and test run: the result is stored in a cache file that the
+    other test workers read instead of asking again.
+
+    :param client: share client of the endpoint.
+    :returns: dict with the 'min_version' and 'max_version' of the API.
+    """
+    endpoint = client._get_base_url(client.base_url)
+    with _lock:
+        if endpoint not in _ranges:
+            with lockutils.lock('manila-microversions', external=True):
+                ranges = _load_ranges()
+                if endpoint not in ranges:
+                    resp, body = client.send_microversion_request(
+                        script_name='v2')
+                    version = body['versions'][0]
+                    ranges[endpoint] = {
+                        'min_version': version['min_version'],
+                        'max_version': version['version'],
+                    }
+                    LOG.info("Share API %s supports microversions %s to %s",
+                             endpoint, version['min_version'],
+                             version['version'])
+                    _save_ranges(ranges)
+            _ranges.update(ranges)
+        return _ranges[endpoint]
+
+
+def get_negotiated_ranges():
+    """Returns the microversion ranges negotiated so far in this test run.
+
+    :returns: list of (min_version, max_version) tuples, empty when
+        microversion negotiation is disabled.
+    """
+    if not CONF.share.microversion_negotiation:
+        return []
+    with _lock:
+        if not _ranges:
+            # Another test worker may have negotiated them already.
+            _ranges.update(_load_ranges())
+        return [(r['min_version'], r['max_version'])
+                for r in _ranges.values()]
@@ -0,0 +1,190 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tracking of the progress reported by share and share server migrations.
+
+The migration waiters feed the 'total_progress' of the migrations they wait
+for to a ProgressTracker, which estimates the remaining time, picks the next
+poll interval and detects stalled migrations. The progress timelines of the
+process are written to 'share.migration_progress_dir' on exit.
+
+Polling the progress costs an admin request per poll, so the waiters only do
+it when stall detection or the progress timelines are enabled.
+"""
+
+import atexit
+import json
+import os
+import threading
+
+from oslo_log import log
+from tempest import config
+from tempest.lib import exceptions
+
+from manila_tempest_tests.common import constants
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests import share_exceptions
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+# Task states in which the progress API reports a meaningful progress.
+PROGRESS_TASK_STATES = (
+    constants.TASK_STATE_MIGRATION_DRIVER_IN_PROGRESS,
+    constants.TASK_STATE_DATA_COPYING_IN_PROGRESS,
+)
+
+
+class ProgressTracker(object):
+    """Progress timeline of a migration.
+
+    :param resource_name: 'share' or 'share_server'.
+    :param resource_id: ID of the migrating resource.
+    :param stall_timeout: seconds without progress after which the migration
+        is stalled, defaults to 'share.migration_stall_timeout'. 0 disables
+        stall detection.
+    :param clock: time_budget.Clock, defaults to the current one.
+    """
+
+    def __init__(self, resource_name, resource_id, stall_timeout=None,
+                 clock=None):
+        self.resource_name = resource_name
+        self.resource_id = resource_id
+        self.stall_timeout = (CONF.share.migration_stall_timeout
+                              if stall_timeout is None else stall_timeout)
+        self.clock = clock or time_budget.get_clock()
+        # Whether the waiters should poll the progress of the migration.
+        self.enabled = bool(self.stall_timeout or
+                            CONF.share.migration_progress_dir)
+        self.start = self.clock.monotonic()
+        self.timeline = []
+        self._progressed_at = self.start
+        self._progress = None
+
+    def update(self, task_state, total_progress=None):
+        """Records the task state and progress of the migration.
+
+        :raises share_exceptions.MigrationStalled: if the progress did not
+            grow for 'stall_timeout' seconds.
+        """
+        now = self.clock.monotonic()
+        self.timeline.append({'time': round(now - self.start, 3),
+                              'task_state': task_state,
+                              'total_progress': total_progress})
+        if total_progress is None:
+            return
+        if self._progress is None or total_progress > self._progress:
+            self._progress = total_progress
+            self._progressed_at = now
+        elif self.stall_timeout and now - self._progressed_at >= (
+                self.stall_timeout):
+            raise share_exceptions.MigrationStalled(
+                resource_name=self.resource_name.replace('_', ' '),
+                resource_id=self.resource_id, task_state=task_state,
+                progress=total_progress,
+                seconds=int(now - self._progressed_at))
+
+    def remaining(self):
+        """Returns the estimated seconds left, None if unknown.
+
+        The estimate extrapolates the average rate of progress since the
+        first progress reported.
+        """
+        points = [p for p in self.timeline if p['total_progress'] is not None]
+        if len(points) < 2:
+            return None
+        first, last = points[0], points[-1]
+        progressed = last['total_progress'] - first['total_progress']
+        elapsed = last['time'] - first['time']
+        if progressed <= 0 or elapsed <= 0:
+            return None
+        rate = progressed / elapsed
+        return max(100 - last['total_progress'], 0) / rate
+
+    def next_interval(self, default):
+        """Returns how long to sleep before the next poll.
+
+        Polls twice per estimated remaining time, so that a long migration
+        is not polled often, but never more often than the poll strategy.
+
+        :param default: next interval of the poll strategy.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(min(remaining / 2, CONF.share.poll_max_interval), default)
+
+    def to_dict(self):
+        return {'resource_name': self.resource_name,
+                'resource_id': self.resource_id,
+                'timeline': self.timeline}
+
+
+def get_share_progress(client, share_id, version):
+    """Returns the 'total_progress' of a share migration.
+
+    :returns: the progress, or None if the migration left the in progress
+        task states since the share was polled.
+    """
+    try:
+        return client.migration_get_progress(
+            share_id, version=version)['total_progress']
+    except exceptions.BadRequest:
+        return None
+
+
+def get_share_server_progress(client, server_id, version):
+    """Returns the 'total_progress' of a share server migration.
+
+    :returns: the progress, or None if the migration left the in progress
+        task states since the share server was polled.
+    """
+    try:
+        return client.share_server_migration_get_progress(
+            server_id, version=version)['total_progress']
+    except exceptions.BadRequest:
+        return None
+
+
+_timelines_lock = threading.Lock()
+_timelines = []
+
+
+def record(tracker):
+    """Keeps the timeline of tracker for the report of this process."""
+    LOG.debug("Progress of the migration of %s %s: %s",
+              tracker.resource_name, tracker.resource_id, tracker.timeline)
+    with _timelines_lock:
+        _timelines.append(tracker.to_dict())
+
+
+def get_timelines():
+    """Returns the progress timelines of the migrations of this process."""
+    with _timelines_lock:
+        return list(_timelines)
+
+
+@atexit.register
+def _dump_timelines():
+    timelines = get_timelines()
+    if not (CONF.share.migration_progress_dir and timelines):
+        return
+    path = os.path.join(CONF.share.migration_progress_dir,
+                        'manila-migration-progress-%s.json' % os.getpid())
+    try:
+        os.makedirs(CONF.share.migration_progress_dir, exist_ok=True)
+        with open(path, 'w') as timelines_file:
+            json.dump(timelines, timelines_file, indent=2)
+        LOG.info("Share migration progress timelines written to %s", path)
+    except OSError as e:
+        LOG.error("Failed to write share migration progress timelines: %s",
+                  e)
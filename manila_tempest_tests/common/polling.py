@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import random
+
+from tempest import config
+
+from manila_tempest_tests.common import events
+
+CONF = config.CONF
+
+POLL_STRATEGY_FIXED = 'fixed'
+POLL_STRATEGY_BACKOFF = 'backoff'
+
+
+def fixed_intervals(interval):
+    """Yields the same poll interval forever."""
+    while True:
+        yield interval
+
+
+def backoff_intervals(interval, first_interval, max_interval, factor,
+                      jitter):
+    """Yields exponentially growing poll intervals.
+
+    The first interval is short so that fast transitions are noticed quickly,
+    the following ones start at ``interval`` and grow by ``factor`` up to
+    ``max_interval``. Every interval is randomized by +/- ``jitter`` (a
+    fraction of the interval) so that parallel waiters do not poll in
+    lockstep.
+    """
+    yield min(first_interval, max_interval)
+    delay = interval
+    while True:
+        sleep = delay
+        if jitter:
+            sleep *= random.uniform(1 - jitter, 1 + jitter)
+        yield min(sleep, max_interval)
+        delay = min(delay * factor, max_interval)
+
+
+def get_poll_intervals(client):
+    """Returns an iterator of poll intervals for the configured strategy.
+
+    :param client: client whose ``build_interval`` is used as base interval.
+    """
+    if events.enabled():
+        # NOTE: events wake the waiters up, polling is only a fallback.
+        return fixed_intervals(
+            max(client.build_interval, CONF.share.event_fallback_interval))
+    if CONF.share.poll_strategy == POLL_STRATEGY_BACKOFF:
+        return backoff_intervals(
+            client.build_interval,
+            CONF.share.poll_first_interval,
+            CONF.share.poll_max_interval,
+            CONF.share.poll_backoff_factor,
+            CONF.share.poll_jitter)
+    return fixed_intervals(client.build_interval)
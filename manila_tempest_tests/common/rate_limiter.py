@@ -0,0 +1,179 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import json
+import threading
+import time
+
+from oslo_concurrency import lockutils
+from oslo_log import log
+from tempest import config
+
+from manila_tempest_tests.common import run_files
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+_UNIT_SECONDS = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400}
+ALL_METHODS = 'ALL'
+
+
+class TokenBucket(object):
+    """Token bucket shared by the workers of a test run.
+
+    The bucket state is kept in a file guarded by an external lock, so that
+    the requests of all the workers are counted against the same rate.
+    """
+
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._path = run_files.get_path('rate-limit-%s' % name)
+
+    def _read(self, now):
+        try:
+            with open(self._path) as state_file:
+                state = json.load(state_file)
+            return state['tokens'], state['time']
+        except (OSError, ValueError, KeyError):
+            return self.burst, now
+
+    def reserve(self):
+        """Takes a token from the bucket.
+
+        Tokens can be taken in advance, the bucket then goes negative and the
+        caller has to wait until the token would have been available.
+
+        :returns: seconds to wait before sending the request.
+        """
+        with lockutils.lock('manila-rate-limit-%s' % self.name,
+                            external=True):
+            now = time.time()
+            tokens, last = self._read(now)
+            tokens = min(self.burst,
+                         tokens + max(now - last, 0) * self.rate) - 1
+            with open(self._path, 'w') as state_file:
+                json.dump({'tokens': tokens, 'time': now}, state_file)
+        return max(-tokens / self.rate, 0.0)
+
+
+def buckets_from_rate_limits(rate_limits):
+    """Builds one token bucket per HTTP method from the API rate limits.
+
+    :param rate_limits: 'rate' section of the limits returned by the API.
+    :returns: dict of token buckets by HTTP method, with the most restrictive
+        limit of each method.
+    """
+    limits = {}
+    for rate_limit in rate_limits:
+        for limit in rate_limit.get('limit', []):
+            seconds = _UNIT_SECONDS.get(str(limit.get('unit')).upper())
+            if not seconds or not limit.get('value'):
+                continue
+            method = str(limit.get('verb', '*')).upper()
+            if method == '*':
+                method = ALL_METHODS
+            rate_and_burst = (float(limit['value']) / seconds,
+                              int(limit['value']))
+            limits[method] = min(limits.get(method, rate_and_burst),
+                                 rate_and_burst)
+    return {method: TokenBucket(method, rate, burst)
+            for method, (rate, burst) in limits.items()}
+
+
+class RateLimiter(object):
+    """Client side rate limiter of the Share API requests.
+
+    Requests over the rate wait for their turn instead of being rejected by
+    the API as over limit. The rate is either configured, or taken from the
+    limits of the API when 'share.rate_limit_from_api' is set.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = None
+        self._requests = 0
+        self._throttled = 0
+        self._throttle_seconds = 0.0
+
+    def _configure(self, get_rate_limits):
+        buckets = {}
+        if CONF.share.rate_limit_from_api:
+            try:
+                buckets = buckets_from_rate_limits(get_rate_limits())
+            except Exception as e:
+                LOG.warning("Failed to get the Share API rate limits, "
+                            "falling back to the configured rate: %s", e)
+        if not buckets and CONF.share.rate_limit:
+            buckets[ALL_METHODS] = TokenBucket(
+                ALL_METHODS, CONF.share.rate_limit,
+                CONF.share.rate_limit_burst)
+        LOG.info("Share API requests are rate limited to: %s",
+                 {method: '%.3g/s' % bucket.rate
+                  for method, bucket in buckets.items()} or 'unlimited')
+        return buckets
+
+    def acquire(self, method, get_rate_limits):
+        """Waits until a request can be sent without exceeding the rate.
+
+        :param method: HTTP method of the request.
+        :param get_rate_limits: callable returning the 'rate' section of the
+            API limits, called once to size the buckets.
+        """
+        with self._lock:
+            if self._buckets is None:
+                # Set first: getting the rate limits is a request itself.
+                self._buckets = {}
+                configure = True
+            else:
+                configure = False
+        if configure:
+            buckets = self._configure(get_rate_limits)
+            with self._lock:
+                self._buckets = buckets
+        bucket = (self._buckets.get(method) or
+                  self._buckets.get(ALL_METHODS))
+        wait = bucket.reserve() if bucket else 0.0
+        with self._lock:
+            self._requests += 1
+            if wait:
+                self._throttled += 1
+                self._throttle_seconds += wait
+        if wait:
+            LOG.debug("Throttling %s request for %.2f seconds", method, wait)
+            time.sleep(wait)
+
+    def stats(self):
+        """Returns the number of 'requests', 'throttled' and their wait."""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'throttled': self._throttled,
+                'throttle_seconds': round(self._throttle_seconds, 3),
+            }
+
+
+_limiter = RateLimiter()
+
+
+def get_limiter():
+    """Returns the rate limiter shared by the clients of this process."""
+    return _limiter
+
+
+@atexit.register
+def _log_throttle_stats():
+    stats = _limiter.stats()
+    if stats['throttled']:
+        LOG.info("Share API rate limiter stats: %s", stats)
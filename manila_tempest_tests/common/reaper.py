@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import queue
+import threading
+
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+
+class DeletionReaper(object):
+    """Waits in a background thread for deleted resources to go away.
+
+    Deletions are requested by the caller, the reaper only runs the
+    (potentially long) ``wait_for_resource_deletion`` calls so that tests do
+    not have to block on them. Failures are kept until the next barrier.
+    The waits are not bounded by the time budget of the tests, which is
+    only in use in the tests' thread.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._failures = []
+        self._thread = None
+
+    def submit(self, client, **kwargs):
+        """Waits in the background for a resource to be deleted.
+
+        :param client: client used to check the resource.
+        :param kwargs: arguments of the client's
+            ``wait_for_resource_deletion`` method.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='manila-deletion-reaper',
+                    daemon=True)
+                self._thread.start()
+        self._queue.put((client, kwargs))
+
+    def _run(self):
+        while True:
+            client, kwargs = self._queue.get()
+            try:
+                client.wait_for_resource_deletion(**kwargs)
+            except Exception as e:
+                LOG.error("Deferred wait for deletion of resource %s "
+                          "failed: %s", kwargs, e)
+                with self._lock:
+                    self._failures.append(e)
+            finally:
+                self._queue.task_done()
+
+    def barrier(self):
+        """Waits for all the submitted deletions.
+
+        :returns: list of exceptions raised by the deletion waits that
+            failed since the previous barrier.
+        """
+        self._queue.join()
+        with self._lock:
+            failures, self._failures = self._failures, []
+        return failures
+
+
+_reaper = DeletionReaper()
+
+
+def get_reaper():
+    """Returns the deletion reaper of this process."""
+    return _reaper
+
+
+@atexit.register
+def _report_leaked_resources():
+    for failure in _reaper.barrier():
+        LOG.error("Resource was not deleted before exiting: %s", failure)
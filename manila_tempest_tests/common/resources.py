@@ -0,0 +1,226 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Registry of the resource types handled by the clients and tests.
+
+Waiters, deletion checks and test cleanups look resource types up here
+instead of dispatching on their names.
+"""
+
+from manila_tempest_tests import share_exceptions
+
+
+class ResourceType(object):
+    """Describes how to get, list, wait for and delete a resource type.
+
+    :param name: name of the resource type, e.g. 'share'.
+    :param get: name of the client method returning the resource by ID, or
+        the access rules of its parent if 'lists_rules' is set.
+    :param response_key: key of the resource in the response of 'get'.
+        Defaults to 'name'.
+    :param list: name of the client method listing the resources in detail.
+    :param list_key: key of the resources in the response of 'list'.
+    :param iter: name of the client method iterating over the resources page
+        by page, if they can be sorted by creation time.
+    :param delete: name of the client method deleting the resource. It is
+        called with the ID of the parent first for resources with a parent.
+    :param delete_params: keyword arguments of 'delete', mapped to the keys
+        of the cleanup resource dict providing their values.
+    :param deletion_key: keyword argument identifying the resource in
+        'SharesV2Client.is_resource_deleted', None if resources of this type
+        are gone once 'delete' returns.
+    :param parent_key: keyword argument of the parent's ID in
+        'SharesV2Client.is_resource_deleted'.
+    :param parent_param: keyword argument of the parent's ID of 'get', also
+        the key of the parent's ID in the 'extra_params' of cleanup resources.
+    :param lists_rules: whether 'get' returns the access rules of the parent.
+    :param status_attr: attribute holding the status of the resource.
+    :param error: exception raised when the resource is in error status.
+    :param dependents: types of the resources that may depend on resources
+        of this type, and thus must be deleted first on cleanup. None if
+        unknown, i.e. any resource may depend on them.
+    """
+
+    def __init__(self, name, get=None, response_key=None, list=None,
+                 list_key=None, iter=None, delete=None, delete_params=None,
+                 deletion_key=None, parent_key=None, parent_param=None,
+                 lists_rules=False, status_attr='status', error=None,
+                 dependents=None):
+        self.name = name
+        self.get = get
+        self.response_key = response_key or name
+        self.list = list
+        self.list_key = list_key
+        self.iter = iter
+        self.delete = delete
+        self.delete_params = delete_params or {}
+        self.deletion_key = deletion_key
+        self.parent_key = parent_key
+        self.parent_param = parent_param
+        self.lists_rules = lists_rules
+        self.status_attr = status_attr
+        self.error = error
+        self.dependents = (frozenset(dependents) if dependents is not None
+                           else None)
+
+    def fetch(self, client, resource_id, parent_id=None, **kwargs):
+        """Gets a resource with client.
+
+        :returns: the resource, or None for an access rule that is not in the
+            access rules of its parent.
+        """
+        get = getattr(client, self.get)
+        if self.lists_rules:
+            rules = get(parent_id, **kwargs)[self.response_key]
+            return next((r for r in rules if r['id'] == resource_id), None)
+        if self.parent_param:
+            kwargs[self.parent_param] = parent_id
+        return get(resource_id, **kwargs)[self.response_key]
+
+
+_RESOURCE_TYPES = (
+    ResourceType(
+        'share', get='get_share', list='list_shares_with_detail',
+        list_key='shares', iter='iter_shares', delete='delete_share',
+        deletion_key='share_id',
+        error=share_exceptions.ShareBuildErrorException,
+        dependents={'share_replica', 'snapshot', 'share_backup',
+                    'share_group_snapshot', 'resource_lock'}),
+    ResourceType(
+        'snapshot', get='get_snapshot', list='list_snapshots_with_detail',
+        list_key='snapshots', iter='iter_snapshots', delete='delete_snapshot',
+        deletion_key='snapshot_id',
+        error=share_exceptions.SnapshotBuildErrorException,
+        dependents={'share', 'resource_lock'}),
+    ResourceType(
+        'share_replica', get='get_share_replica', list='list_share_replicas',
+        list_key='share_replicas', delete='delete_share_replica',
+        deletion_key='replica_id',
+        error=share_exceptions.ShareInstanceBuildErrorException,
+        dependents={'resource_lock'}),
+    ResourceType(
+        'share_backup', get='get_share_backup', delete='delete_share_backup',
+        deletion_key='backup_id',
+        error=share_exceptions.ShareBackupBuildErrorException,
+        dependents={'share', 'resource_lock'}),
+    ResourceType(
+        'share_instance', get='get_share_instance',
+        deletion_key='share_instance_id',
+        error=share_exceptions.ShareInstanceBuildErrorException),
+    ResourceType(
+        'snapshot_instance', get='get_snapshot_instance',
+        error=share_exceptions.SnapshotInstanceBuildErrorException),
+    ResourceType(
+        'share_server', get='show_share_server', list='list_share_servers',
+        list_key='share_servers', delete='delete_share_server',
+        deletion_key='server_id',
+        error=share_exceptions.ShareServerBuildErrorException),
+    ResourceType(
+        'access_rule', get='list_access_rules', response_key='access_list',
+        lists_rules=True, deletion_key='rule_id', parent_key='share_id',
+        status_attr='state',
+        error=share_exceptions.AccessRuleBuildErrorException),
+    ResourceType(
+        'snapshot_access', get='list_snapshot_access_rules',
+        response_key='snapshot_access_list', lists_rules=True,
+        status_attr='state',
+        error=share_exceptions.AccessRuleBuildErrorException),
+    ResourceType(
+        'share_group', get='get_share_group', delete='delete_share_group',
+        deletion_key='share_group_id',
+        error=share_exceptions.ShareGroupBuildErrorException,
+        dependents={'share', 'share_group_snapshot', 'resource_lock'}),
+    ResourceType(
+        'share_group_snapshot', get='get_share_group_snapshot',
+        delete='delete_share_group_snapshot',
+        deletion_key='share_group_snapshot_id',
+        error=share_exceptions.ShareGroupSnapshotBuildErrorException,
+        dependents={'share', 'share_group', 'resource_lock'}),
+    ResourceType(
+        'share_group_type', get='get_share_group_type',
+        delete='delete_share_group_type', deletion_key='share_group_type_id',
+        dependents={'share_group'}),
+    ResourceType(
+        'share_type', get='get_share_type', delete='delete_share_type',
+        deletion_key='st_id',
+        dependents={'share', 'share_replica', 'share_group',
+                    'share_group_type'}),
+    ResourceType(
+        'share_network', get='get_share_network',
+        list='list_share_networks_with_detail', list_key='share_networks',
+        delete='delete_share_network', deletion_key='sn_id',
+        dependents={'share', 'share_replica', 'share_group',
+                    'share_network_subnet', 'dissociate_security_service'}),
+    ResourceType(
+        'share_network_subnet', get='get_subnet', delete='delete_subnet',
+        deletion_key='share_network_subnet_id', parent_key='sn_id',
+        parent_param='share_network_id',
+        dependents={'share', 'share_replica', 'share_group'}),
+    ResourceType(
+        'dissociate_security_service',
+        delete='remove_sec_service_from_share_network',
+        parent_param='share_network_id',
+        dependents={'share', 'share_replica', 'share_group'}),
+    ResourceType(
+        'security_service', get='get_security_service',
+        delete='delete_security_service', deletion_key='ss_id',
+        dependents={'dissociate_security_service'}),
+    ResourceType(
+        'message', get='get_message', delete='delete_message',
+        deletion_key='message_id'),
+    ResourceType(
+        'resource_lock', delete='delete_resource_lock', dependents=set()),
+    ResourceType(
+        'quotas', delete='reset_quotas', delete_params={'user_id': 'user_id'},
+        dependents=set()),
+)
+
+RESOURCE_TYPES = {rt.name: rt for rt in _RESOURCE_TYPES}
+_RESOURCE_TYPES_BY_DELETION_KEY = {
+    rt.deletion_key: rt for rt in _RESOURCE_TYPES if rt.deletion_key}
+
+
+def get_resource_type(name):
+    """Returns the type of resources called name.
+
+    :raises share_exceptions.InvalidResource: if there is no such type.
+    """
+    try:
+        return RESOURCE_TYPES[name]
+    except KeyError:
+        raise share_exceptions.InvalidResource(message=name)
+
+
+def get_resource_type_by_deletion_kwargs(kwargs):
+    """Returns the type of resource identified by 'is_resource_deleted' kwargs.
+
+    :raises share_exceptions.InvalidResource: if kwargs do not identify a
+        resource.
+    """
+    found = [_RESOURCE_TYPES_BY_DELETION_KEY[key] for key in kwargs
+             if key in _RESOURCE_TYPES_BY_DELETION_KEY]
+    # NOTE: resources with a parent are identified by both their ID and the
+    # ID of their parent, e.g. a subnet and its share network.
+    parent_keys = {rt.parent_key for rt in found}
+    found = [rt for rt in found if rt.deletion_key not in parent_keys]
+    if not found:
+        raise share_exceptions.InvalidResource(message=str(kwargs))
+    return found[0]
+
+
+def get_deletion_id(kwargs):
+    """Returns the ID of the resource 'is_resource_deleted' kwargs identify.
+
+    :raises share_exceptions.InvalidResource: if kwargs do not identify a
+        resource.
+    """
+    return kwargs[get_resource_type_by_deletion_kwargs(kwargs).deletion_key]
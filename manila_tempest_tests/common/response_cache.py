@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import threading
+import time
+
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+
+class ResponseCache(object):
+    """Thread safe cache of API responses with a time to live."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key, ttl):
+        """Returns the response cached for key, or None if expired/absent."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                self._hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self._misses += 1
+            return None
+
+    def set(self, key, response):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+
+    def invalidate(self):
+        """Drops all the cached responses."""
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Returns the number of cache 'hits', 'misses' and 'invalidations'."""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'invalidations': self._invalidations,
+            }
+
+
+_cache = ResponseCache()
+
+
+def get_cache():
+    """Returns the response cache shared by the clients of this process."""
+    return _cache
+
+
+@atexit.register
+def _log_cache_stats():
+    stats = _cache.stats()
+    if stats['hits'] or stats['misses']:
+        LOG.info("Share API response cache stats: %s", stats)
@@ -0,0 +1,80 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import collections
+import json
+import threading
+
+from oslo_log import log
+from tempest import config
+from tempest.lib import exceptions
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+# Methods that can be sent again without changing the outcome.
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'COPY')
+
+_lock = threading.Lock()
+_retries = collections.Counter()
+
+
+def is_idempotent(method, url, body=None):
+    """Whether a request can be sent again without changing its outcome.
+
+    Besides the idempotent HTTP methods, resource actions listed in
+    'share.retry_idempotent_actions' are idempotent. Other requests, e.g.
+    creations, are only considered so if 'share.retry_non_idempotent' is set.
+    """
+    if method in IDEMPOTENT_METHODS:
+        return True
+    if method == 'POST' and url.split('?', 1)[0].endswith('/action'):
+        try:
+            actions = set(json.loads(body))
+        except (TypeError, ValueError):
+            actions = set()
+        if actions and actions <= set(CONF.share.retry_idempotent_actions):
+            return True
+    return CONF.share.retry_non_idempotent
+
+
+def is_retriable(method, url, body, error):
+    """Whether a request that failed with error should be sent again.
+
+    :param error: RestClientException raised by the request.
+    """
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status not in CONF.share.retry_statuses:
+        return False
+    if isinstance(error, exceptions.OverLimit):
+        # Quota exceeded, that will not go away by itself.
+        return False
+    return is_idempotent(method, url, body)
+
+
+def record_retry(status):
+    with _lock:
+        _retries[status] += 1
+
+
+def get_retry_stats():
+    """Returns the number of retried requests by response status."""
+    with _lock:
+        return dict(_retries)
+
+
+@atexit.register
+def _log_retry_stats():
+    stats = get_retry_stats()
+    if stats:
+        LOG.info("Share API requests retried by response status: %s", stats)
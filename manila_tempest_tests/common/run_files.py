@@ -0,0 +1,99 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""State files shared by the test workers of a test run.
+
+Test workers are spawned by the same test runner process, whose PID they all
+know, so the files are named after it, and after the identity endpoint of
+the cloud under test so that runs against different clouds never share
+them. Outside of a test runner the parent process is e.g. the user's shell,
+which outlives the run, so the files are removed at the end of the run: the
+processes using a file are recorded next to it, under an external lock, and
+the last one of them to exit removes it.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from oslo_concurrency import lockutils
+from tempest import config
+
+CONF = config.CONF
+
+_lock = threading.Lock()
+_paths = set()
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _update_users(path, add):
+    """Adds or removes this process from the users of the file at path.
+
+    Processes which exited without removing themselves, e.g. killed test
+    workers, are dropped. The file is removed once it has no users left.
+    """
+    users_path = path + '.users'
+    with lockutils.lock('manila-run-files', external=True):
+        try:
+            with open(users_path) as users_file:
+                users = set(json.load(users_file))
+        except (OSError, ValueError):
+            users = set()
+        users = set(pid for pid in users if _is_running(pid))
+        if add:
+            users.add(os.getpid())
+        else:
+            users.discard(os.getpid())
+        if users:
+            with open(users_path, 'w') as users_file:
+                json.dump(sorted(users), users_file)
+            return
+        for stale_path in (path, users_path):
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+
+def get_path(name):
+    """Returns the path of the state file called name of this test run."""
+    cloud = CONF.identity.uri_v3 or CONF.identity.uri or ''
+    path = os.path.join(
+        tempfile.gettempdir(), 'manila-tempest-%s-%s-%s.json' % (
+            name, os.getppid(),
+            hashlib.sha256(cloud.encode('utf-8')).hexdigest()[:12]))
+    with _lock:
+        if path not in _paths:
+            _update_users(path, add=True)
+            _paths.add(path)
+    return path
+
+
+@atexit.register
+def _remove_files():
+    with _lock:
+        paths = list(_paths)
+        _paths.clear()
+    for path in paths:
+        _update_users(path, add=False)
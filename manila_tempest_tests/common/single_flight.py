@@ -0,0 +1,91 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import atexit
+import threading
+
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Coalesces identical concurrent calls into a single one.
+
+    While a call is in flight, identical calls wait for it and get its
+    result, or its exception, instead of running again. Calls made once it
+    is done run again, so results are never older than the calls asking for
+    them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._coalesced = 0
+
+    def do(self, key, func):
+        """Runs func, unless an identical call is already in flight.
+
+        :param key: hashable identifying identical calls.
+        :param func: callable to run.
+        :returns: the result of func, or of the identical call in flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            in_flight = call is not None
+            if in_flight:
+                self._coalesced += 1
+            else:
+                call = self._calls[key] = _Call()
+        if in_flight:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """Returns the number of calls that were 'coalesced'."""
+        with self._lock:
+            return {'coalesced': self._coalesced}
+
+
+_group = SingleFlight()
+
+
+def get_group():
+    """Returns the single flight group shared by the clients of a process."""
+    return _group
+
+
+@atexit.register
+def _log_coalesce_stats():
+    stats = _group.stats()
+    if stats['coalesced']:
+        LOG.info("Share API requests coalesced with identical in flight "
+                 "requests: %s", stats['coalesced'])
@@ -0,0 +1,215 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Clocks of the waiters and monotonic time budgets shared by chained waits.
+
+Each waiter has its own timeout, so a test chaining several waits could
+otherwise take several times the build timeout. A TimeBudget bounds all the
+waits made while it is in use: either passed explicitly to the waiters or
+entered as a context manager, which makes it the budget of every waiter
+that is not given one.
+
+Waiters read the time and sleep through a Clock, the real one unless another
+clock is passed to them or installed with using_clock, e.g. the virtual
+clock of the unit tests' simulation module, or the event driven backend is
+enabled.
+
+Budgets in use and installed clocks are per thread, so that the waits of
+background threads, e.g. the deletion reaper's, are not bounded by the
+budget of the test running meanwhile.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+
+from manila_tempest_tests.common import events
+
+_local = threading.local()
+
+
+def _get_budgets():
+    if not hasattr(_local, 'budgets'):
+        _local.budgets = []
+    return _local.budgets
+
+
+def _get_clocks():
+    if not hasattr(_local, 'clocks'):
+        _local.clocks = []
+    return _local.clocks
+
+
+class Clock(object):
+    """Monotonic time source and sleep function of the waiters."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        await asyncio.sleep(seconds)
+
+    def wait_for_events(self, resource_ids, seconds, since):
+        """Sleeps, possibly less if any of resource_ids changes.
+
+        :param since: monotonic time after which changes count.
+        """
+        self.sleep(seconds)
+
+    async def wait_for_events_async(self, resource_ids, seconds, since):
+        """Coroutine version of wait_for_events."""
+        await self.sleep_async(seconds)
+
+
+_clock = Clock()
+
+
+def get_clock():
+    """Returns the clock waiters use when they are not given one."""
+    clocks = _get_clocks()
+    if clocks:
+        return clocks[-1]
+    if events.enabled():
+        return events.get_clock()
+    return _clock
+
+
+@contextlib.contextmanager
+def using_clock(clock):
+    """Makes clock the default clock of the waiters within the context.
+
+    The clock is only installed for the calling thread.
+    """
+    clocks = _get_clocks()
+    clocks.append(clock)
+    try:
+        yield clock
+    finally:
+        clocks.remove(clock)
+
+
+class TimeBudget(object):
+    """Time left to a series of waits, measured with a monotonic clock.
+
+    :param seconds: length of the budget.
+    :param clock: Clock measuring the budget, defaults to get_clock().
+    """
+
+    def __init__(self, seconds, clock=None):
+        self.seconds = seconds
+        self.clock = clock or get_clock()
+        self.deadline = self.clock.monotonic() + seconds
+        self._budgets = []
+
+    def remaining(self):
+        """Returns the seconds left in the budget."""
+        return max(self.deadline - self.clock.monotonic(), 0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def use(self):
+        """Makes this budget the current one of the calling thread.
+
+        It stays the current one until release is called.
+        """
+        self._budgets = _get_budgets()
+        self._budgets.append(self)
+        return self
+
+    def release(self):
+        # NOTE: the budget may be released from another thread than the one
+        # using it, e.g. by a cleanup.
+        if self in self._budgets:
+            self._budgets.remove(self)
+
+    def __enter__(self):
+        return self.use()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def __str__(self):
+        return '%.1f of %s s left' % (self.remaining(), self.seconds)
+
+
+def get_current():
+    """Returns the innermost time budget in use by the calling thread.
+
+    None if the thread uses no budget.
+    """
+    budgets = _get_budgets()
+    return budgets[-1] if budgets else None
+
+
+class Countdown(object):
+    """Timeout of a single wait, bounded by a time budget.
+
+    :param timeout: seconds the wait may last.
+    :param budget: TimeBudget bounding the wait, defaults to the current one.
+    :param clock: Clock of the wait, defaults to get_clock().
+    """
+
+    def __init__(self, timeout, budget=None, clock=None):
+        self.timeout = timeout
+        self.budget = budget if budget is not None else get_current()
+        self.clock = clock or get_clock()
+        self.start = self.clock.monotonic()
+        self._polled_at = self.start
+
+    def elapsed(self):
+        return self.clock.monotonic() - self.start
+
+    def remaining(self):
+        """Returns the seconds left before the wait times out."""
+        remaining = max(self.timeout - self.elapsed(), 0)
+        if self.budget is not None:
+            remaining = min(remaining, self.budget.remaining())
+        return remaining
+
+    def sleep(self, seconds, watch=None):
+        """Sleeps until the next poll, or until the wait times out.
+
+        :param watch: IDs of the resources the wait is for. The sleep ends
+            early if any of them changes, with the event driven backend.
+        """
+        seconds = min(seconds, self.remaining())
+        if watch:
+            self.clock.wait_for_events(watch, seconds, self._polled_at)
+        else:
+            self.clock.sleep(seconds)
+        self._polled_at = self.clock.monotonic()
+
+    async def sleep_async(self, seconds, watch=None):
+        """Coroutine version of sleep, for the asyncio waiters."""
+        seconds = min(seconds, self.remaining())
+        if watch:
+            await self.clock.wait_for_events_async(
+                watch, seconds, self._polled_at)
+        else:
+            await self.clock.sleep_async(seconds)
+        self._polled_at = self.clock.monotonic()
+
+    def expired(self):
+        """Whether the wait timed out or its time budget is spent."""
+        return self.elapsed() >= self.timeout or bool(
+            self.budget and self.budget.expired())
+
+    def describe(self):
+        """Returns the state of the budget to append to timeout messages."""
+        if self.budget is None:
+            return ''
+        return ' Time budget: %s.' % self.budget
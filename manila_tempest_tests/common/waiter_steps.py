@@ -0,0 +1,114 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Drivers running the steps of the waiters.
+
+Each waiter is written once, as a generator of steps: it yields either a
+blocking call to make, e.g. a functools.partial of a client method, whose
+result (or exception) it gets back, or a Sleep until its next poll, and
+returns the outcome of the wait. run drives the steps from the calling
+thread, and run_async from an asyncio event loop, so the waiters of the
+waiters module and of the async_waiters module only differ in their driver.
+"""
+
+import functools
+
+
+class Sleep(object):
+    """Step of a waiter sleeping until its next poll.
+
+    :param countdown: time_budget.Countdown of the wait.
+    :param seconds: poll interval.
+    :param watch: IDs of the resources the wait is for, see Countdown.sleep.
+    """
+
+    def __init__(self, countdown, seconds, watch=None):
+        self.countdown = countdown
+        self.seconds = seconds
+        self.watch = watch
+
+
+def run(steps):
+    """Runs the steps of a waiter, blocking the calling thread.
+
+    :returns: the value the steps return.
+    """
+    result, error = None, None
+    while True:
+        try:
+            step = steps.throw(error) if error else steps.send(result)
+        except StopIteration as e:
+            return e.value
+        result, error = None, None
+        try:
+            if isinstance(step, Sleep):
+                step.countdown.sleep(step.seconds, watch=step.watch)
+            else:
+                result = step()
+        except Exception as e:
+            error = e
+
+
+async def run_async(steps, call):
+    """Runs the steps of a waiter without blocking the event loop.
+
+    :param call: coroutine function running a blocking call out of the
+        event loop, e.g. SharesV2AsyncClient.run.
+    :returns: the value the steps return.
+    """
+    result, error = None, None
+    try:
+        while True:
+            try:
+                step = steps.throw(error) if error else steps.send(result)
+            except StopIteration as e:
+                return e.value
+            result, error = None, None
+            try:
+                if isinstance(step, Sleep):
+                    await step.countdown.sleep_async(
+                        step.seconds, watch=step.watch)
+                else:
+                    result = await call(step)
+            except Exception as e:
+                error = e
+    finally:
+        steps.close()
+
+
+def waiter(steps):
+    """Makes a waiter of the generator function of its steps.
+
+    The waiter runs the steps with run. The generator function is kept as
+    its 'steps' attribute, for async_waiter.
+    """
+    @functools.wraps(steps)
+    def wait(*args, **kwargs):
+        return run(steps(*args, **kwargs))
+
+    wait.steps = steps
+    return wait
+
+
+def async_waiter(waiter):
+    """Returns the coroutine version of a waiter made with waiter.
+
+    It takes a SharesV2AsyncClient instead of a SharesV2Client, whose
+    wrapped client makes the blocking calls of the steps, in its thread
+    pool.
+    """
+    @functools.wraps(waiter)
+    async def wait(client, *args, **kwargs):
+        return await run_async(
+            waiter.steps(client.client, *args, **kwargs), client.run)
+
+    return wait
@@ -0,0 +1,226 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Timeline of the status transitions the waiters wait for.
+
+When 'share.waiter_timeline_enabled' is set, every wait records, for each
+resource it waits for, the status the resource was first seen in, the last
+status seen, how long it took to get there and how many times it was polled.
+The waits of each test are attached to its results, and each test worker
+writes the latency percentiles per resource type and transition, and its
+slowest waits, to 'share.waiter_timeline_dir' on exit.
+"""
+
+import atexit
+import contextlib
+import heapq
+import itertools
+import json
+import os
+import threading
+
+from oslo_log import log
+from tempest import config
+
+from manila_tempest_tests.common import api_metrics
+from manila_tempest_tests.common import resources
+from manila_tempest_tests import share_exceptions
+
+CONF = config.CONF
+LOG = log.getLogger(__name__)
+
+# Statuses recorded by the waits that do not poll a status, e.g. the waits
+# for the deletion of a resource or for the creation of a user message.
+EXISTING = 'existing'
+DELETED = 'deleted'
+ABSENT = 'absent'
+CREATED = 'created'
+
+# Number of slowest waits kept for the report of each test worker.
+SLOWEST_COUNT = 20
+
+
+class Timeline(object):
+    """Statuses observed by a single wait, by resource ID.
+
+    :param resource_name: name of the type of the resources waited for.
+    :param countdown: time_budget.Countdown of the wait.
+    """
+
+    def __init__(self, resource_name, countdown):
+        self.resource_name = resource_name
+        self.countdown = countdown
+        self._observations = {}
+
+    def observe(self, resource_id, status, resource_name=None):
+        """Records the status of a resource each time it is polled.
+
+        :param resource_name: type of the resource, if the wait is for
+            resources of several types.
+        """
+        seconds = self.countdown.elapsed()
+        observation = self._observations.get(resource_id)
+        if observation is None:
+            self._observations[resource_id] = {
+                'resource_name': resource_name or self.resource_name,
+                'resource_id': resource_id,
+                'from_status': status,
+                'to_status': status,
+                'seconds': round(seconds, 3),
+                'polls': 0,
+            }
+        else:
+            observation.update(to_status=status, seconds=round(seconds, 3),
+                               polls=observation['polls'] + 1)
+
+    def records(self, error=None):
+        """Returns the transition of each resource observed by the wait.
+
+        :param error: exception that ended the wait, if any. The failures of
+            share_exceptions.ResourcesWaitFailed are told apart by resource.
+        """
+        failures = getattr(error, 'failures', None)
+        records = []
+        for resource_id, observation in self._observations.items():
+            resource_error = (error if failures is None
+                              else failures.get(resource_id))
+            records.append(dict(observation, error=resource_error and
+                                type(resource_error).__name__))
+        return records
+
+
+class TimelineRecorder(object):
+    """Thread safe per transition latency histograms of the waits.
+
+    Transitions are keyed by resource type, initial and final status. Like
+    the API call recorder, waits are also recorded in the open scopes.
+    """
+
+    def __init__(self, slowest_count=SLOWEST_COUNT):
+        self.slowest_count = slowest_count
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._stats = {}
+        self._slowest = []
+        self._sequence = itertools.count()
+        self._scopes = []
+
+    def record(self, record):
+        key = (record['resource_name'], record['from_status'],
+               record['to_status'])
+        with self._lock:
+            self._histograms.setdefault(
+                key, api_metrics.Histogram()).record(record['seconds'])
+            stats = self._stats.setdefault(key, {'polls': 0, 'errors': 0})
+            stats['polls'] += record['polls']
+            stats['errors'] += int(record['error'] is not None)
+            # NOTE: the sequence number breaks ties, dicts do not compare.
+            item = (record['seconds'], next(self._sequence), record)
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, item)
+            else:
+                heapq.heappushpop(self._slowest, item)
+            for scope in self._scopes:
+                scope.append(record)
+
+    def open_scope(self):
+        """Starts recording waits in a new scope, returns the scope."""
+        scope = []
+        with self._lock:
+            self._scopes.append(scope)
+        return scope
+
+    def close_scope(self, scope):
+        """Stops recording waits in scope and returns them."""
+        with self._lock:
+            self._scopes.remove(scope)
+        return scope
+
+    def summary(self):
+        """Returns the transitions and slowest waits of this process."""
+        with self._lock:
+            transitions = []
+            for key, histogram in sorted(self._histograms.items(),
+                                         key=lambda item: -item[1].total):
+                row = dict(zip(('resource_name', 'from_status', 'to_status'),
+                               key))
+                row.update(histogram.summary())
+                row.update(self._stats[key])
+                transitions.append(row)
+            slowest = [record for _seconds, _sequence, record in
+                       sorted(self._slowest, reverse=True)]
+        return {'transitions': transitions, 'slowest': slowest}
+
+
+_recorder = TimelineRecorder()
+
+
+def get_recorder():
+    """Returns the waiter timeline recorder of this process."""
+    return _recorder
+
+
+@contextlib.contextmanager
+def track(resource_name, countdown):
+    """Records the transitions observed by the wait within the context.
+
+    Yields the Timeline the wait reports the polled statuses to.
+    """
+    timeline = Timeline(resource_name, countdown)
+    error = None
+    try:
+        yield timeline
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if CONF.share.waiter_timeline_enabled:
+            for record in timeline.records(error):
+                _recorder.record(record)
+
+
+def get_deleted_resource(args, kwargs):
+    """Returns the type name and ID of the resource a deletion wait is for.
+
+    :param args: positional arguments of 'is_resource_deleted'.
+    :param kwargs: keyword arguments of 'is_resource_deleted'.
+    """
+    try:
+        resource_type = resources.get_resource_type_by_deletion_kwargs(kwargs)
+    except share_exceptions.InvalidResource:
+        return 'resource', str(kwargs or args)
+    return resource_type.name, kwargs[resource_type.deletion_key]
+
+
+def dump(directory):
+    """Writes the summary of the process' waits as JSON.
+
+    :returns: path of the written file.
+    """
+    path = os.path.join(directory,
+                        'manila-waiter-timeline-%s.json' % os.getpid())
+    with open(path, 'w') as json_file:
+        json.dump(_recorder.summary(), json_file, indent=2)
+    return path
+
+
+@atexit.register
+def _dump_waiter_timeline():
+    if not (CONF.share.waiter_timeline_enabled and
+            CONF.share.waiter_timeline_dir):
+        return
+    try:
+        os.makedirs(CONF.share.waiter_timeline_dir, exist_ok=True)
+        LOG.info("Waiter timeline written to %s",
+                 dump(CONF.share.waiter_timeline_dir))
+    except OSError as e:
+        LOG.error("Failed to write the waiter timeline: %s", e)
@@ -13,240 +13,714 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import time
+import functools
 
 from tempest import config
 from tempest.lib import exceptions
 
+from manila_tempest_tests.common import constants
+from manila_tempest_tests.common import microversions
+from manila_tempest_tests.common import migration_progress
+from manila_tempest_tests.common import polling
+from manila_tempest_tests.common import resources
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.common import waiter_steps
+from manila_tempest_tests.common import waiter_timeline
 from manila_tempest_tests.services.share.v2.json import shares_client
 from manila_tempest_tests import share_exceptions
+from manila_tempest_tests import utils
 
 CONF = config.CONF
-LATEST_MICROVERSION = CONF.share.max_api_microversion
+LATEST_MICROVERSION = microversions.latest()
+# Status recorded in the waiter timeline for shares in the recycle bin.
+SOFT_DELETED_STATUS = 'soft_deleted'
 
 
-def _get_access_rule(body, rule_id):
-    for rule in body:
-        if rule['id'] in rule_id:
-            return rule
+class StallDetector(object):
+    """Notices resources whose status and 'updated_at' stopped changing.
 
+    Resources without 'updated_at' are never considered stalled.
 
-def _get_name_of_raise_method(resource_name):
-    if resource_name == 'snapshot_access':
-        return 'AccessRuleBuildErrorException'
-    if resource_name == 'share_replica':
-        return 'ShareInstanceBuildErrorException'
-    resource_name = resource_name.title()
-    name = resource_name.replace('_', '')
-    return name + 'BuildErrorException'
+    :param window: seconds without changes after which a resource is
+        stalled, defaults to 'share.stall_timeout'. 0 disables detection.
+    :param clock: time_budget.Clock, defaults to the current one.
+    """
 
+    # Attributes describing the last known state of a stalled resource.
+    DIAGNOSTIC_ATTRS = ('host', 'task_state', 'replica_state',
+                        'share_server_id', 'progress', 'access_rules_status')
 
+    def __init__(self, resource_name, window=None, clock=None):
+        self.resource_name = resource_name
+        self.window = CONF.share.stall_timeout if window is None else window
+        self.clock = clock or time_budget.get_clock()
+        self._changes = {}
+
+    def check(self, resource_id, resource, status):
+        """Checks a resource each time it is polled.
+
+        :raises share_exceptions.ResourceStalled: if neither the status nor
+            the 'updated_at' of the resource changed for the window.
+        """
+        if not self.window or not resource or 'updated_at' not in resource:
+            return
+        state = (status, resource['updated_at'])
+        now = self.clock.monotonic()
+        last_state, changed_at = self._changes.get(resource_id, (None, now))
+        if state != last_state:
+            self._changes[resource_id] = (state, now)
+        elif now - changed_at >= self.window:
+            details = {attr: resource[attr] for attr in self.DIAGNOSTIC_ATTRS
+                       if attr in resource}
+            raise share_exceptions.ResourceStalled(
+                "Last known state: %s" % details,
+                resource_name=self.resource_name.replace('_', ' '),
+                resource_id=resource_id, status=status,
+                updated_at=resource['updated_at'],
+                seconds=int(now - changed_at))
+
+
+@waiter_steps.waiter
 def wait_for_resource_status(client, resource_id, status,
                              resource_name='share', rule_id=None,
-                             status_attr='status',
+                             status_attr=None,
                              raise_rule_in_error_state=True,
                              version=LATEST_MICROVERSION,
-                             timeout=None):
-    """Waits for a resource to reach a given status."""
-
-    get_resource_action = {
-        'share': 'get_share',
-        'snapshot': 'get_snapshot',
-        'share_server': 'show_share_server',
-        'share_instance': 'get_share_instance',
-        'snapshot_instance': 'get_snapshot_instance',
-        'access_rule': 'list_access_rules',
-        'snapshot_access': 'list_snapshot_access_rules',
-        'share_group': 'get_share_group',
-        'share_group_snapshot': 'get_share_group_snapshot',
-        'share_replica': 'get_share_replica',
-        'share_backup': 'get_share_backup'
-    }
-
-    action_name = get_resource_action[resource_name]
-    # This code snippet is intended to set the dictionary key of the returned
-    # response for share access rule and for snapshot access rule.
-    if 'access' in resource_name:
-        rn = '_'.join(action_name.split('_')[1:-1]) + '_list'
-    else:
-        rn = resource_name
+                             timeout=None, budget=None, clock=None):
+    """Waits for a resource to reach a given status.
+
+    :param resource_id: ID of the resource, or of the share or snapshot
+        of the access rule 'rule_id'.
+    :param status_attr: attribute holding the status to check, defaults to
+        the status attribute of the resource type.
+    :param budget: time_budget.TimeBudget also bounding the wait, defaults to
+        the current one, if any. The other waiters take it as well.
+    :param clock: time_budget.Clock reading the time and sleeping between
+        polls, defaults to the current one. The other waiters take it too.
+    """
+    resource_type = resources.get_resource_type(resource_name)
+    status_attr = status_attr or resource_type.status_attr
 
     # Since API v2 requests require an additional parameter for micro-versions,
     # it's necessary to pass the required parameters according to the version.
-    resource_action = getattr(client, action_name)
-    method_args = [resource_id]
     method_kwargs = {}
     if isinstance(client, shares_client.SharesV2Client):
         method_kwargs.update({'version': version})
-    body = resource_action(*method_args, **method_kwargs)[rn]
 
-    if 'access' in resource_name:
-        status_attr = 'state'
-        body = _get_access_rule(body, rule_id)
+    def get_resource():
+        if resource_type.lists_rules:
+            return functools.partial(
+                resource_type.fetch, client, rule_id, parent_id=resource_id,
+                **method_kwargs)
+        return functools.partial(
+            resource_type.fetch, client, resource_id, **method_kwargs)
 
-    resource_status = body[status_attr]
-    start = int(time.time())
+    resource_status_check_time_out = client.build_timeout
+    if timeout is not None:
+        resource_status_check_time_out = timeout
+    countdown = time_budget.Countdown(
+        resource_status_check_time_out, budget, clock)
+    with waiter_timeline.track(resource_name, countdown) as timeline:
+        resource = yield get_resource()
+        resource_status = resource[status_attr]
+        timeline.observe(rule_id or resource_id, resource_status)
+        stall_detector = StallDetector(resource_name, clock=clock)
+        stall_detector.check(resource_id, resource, resource_status)
+        intervals = polling.get_poll_intervals(client)
+
+        exp_status = status if isinstance(status, list) else [status]
+        while resource_status not in exp_status:
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=(resource_id, rule_id))
+            resource = yield get_resource()
+            resource_status = resource[status_attr]
+            timeline.observe(rule_id or resource_id, resource_status)
+
+            if resource_status in exp_status:
+                return
+            elif ('error' in resource_status.lower() and
+                    raise_rule_in_error_state):
+                raise resource_type.error(resource_id=resource_id)
+            stall_detector.check(resource_id, resource, resource_status)
+            if countdown.expired():
+                message = ('%s %s failed to reach %s status (current %s) '
+                           'within the required time (%s s).' %
+                           (resource_name.replace('_', ' '), resource_id,
+                            status, resource_status,
+                            resource_status_check_time_out))
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+
+
+def list_resources(client, resource_type, resource_ids, params=None,
+                   created_since=None, **kwargs):
+    """Lists the resources with the given IDs, for the batched waiters.
+
+    The resources of the types that can be iterated over are listed page by
+    page from the newest one, until all of them are found, or until the
+    resources are older than created_since. Resources missing from the list,
+    e.g. owned by another project, are not in the returned dict.
+
+    :param params: filters of the list request.
+    :param created_since: creation time of the oldest resource to list.
+    :returns: dict of the listed resources, by ID.
+    """
+    resource_ids = set(resource_ids)
+    listed = {}
+    if resource_type.iter:
+        params = dict(params or {}, sort_key='created_at', sort_dir='desc')
+        for resource in getattr(client, resource_type.iter)(
+                detailed=True, params=params, **kwargs):
+            if created_since and resource['created_at'] < created_since:
+                break
+            if resource['id'] in resource_ids:
+                listed[resource['id']] = resource
+                if len(listed) == len(resource_ids):
+                    break
+        return listed
+    if params:
+        kwargs['params'] = params
+    for resource in getattr(client, resource_type.list)(**kwargs)[
+            resource_type.list_key]:
+        if resource['id'] in resource_ids:
+            listed[resource['id']] = resource
+    return listed
+
+
+@waiter_steps.waiter
+def wait_for_resources_status(client, resource_ids, status,
+                              resource_name='share', status_attr=None,
+                              version=LATEST_MICROVERSION, timeout=None,
+                              budget=None, clock=None, retry=None,
+                              params=None):
+    """Waits for several resources to reach a given status.
+
+    The statuses of all resources are fetched with one detailed list request
+    per poll instead of one GET per resource, see list_resources. Resources
+    missing from the list (e.g. owned by another project) are fetched
+    individually.
+
+    :param timeout: seconds each resource may take to reach the status.
+    :param retry: function called, as soon as a resource fails, with its ID
+        and its exception. It returns the ID of a resource replacing the
+        failed one in the wait, e.g. a re-created share, or None for the
+        failure to be reported. Replacing resources get a timeout of their
+        own.
+    :param params: filters of the list request, e.g. {'share_id': share_id}
+        for the replicas of a share.
+    :raises share_exceptions.ResourcesWaitFailed: once every resource is
+        either in the expected status or failed, if any of them ended up in
+        an error status or did not reach the status within the timeout. Its
+        ``failures`` attribute maps each failed id to its own exception.
+    """
+    resource_type = resources.get_resource_type(resource_name)
+    if not resource_type.list:
+        raise share_exceptions.InvalidResource(
+            message="%s resources can not be listed" % resource_name)
+    status_attr = status_attr or resource_type.status_attr
+    method_kwargs = {}
+    if isinstance(client, shares_client.SharesV2Client):
+        method_kwargs.update({'version': version})
 
     exp_status = status if isinstance(status, list) else [status]
     resource_status_check_time_out = client.build_timeout
     if timeout is not None:
         resource_status_check_time_out = timeout
-    while resource_status not in exp_status:
-        time.sleep(client.build_interval)
-        body = resource_action(*method_args, **method_kwargs)[rn]
-
-        if 'access' in resource_name:
-            status_attr = 'state'
-            body = _get_access_rule(body, rule_id)
-
-        resource_status = body[status_attr]
-
-        if resource_status in exp_status:
-            return
-        elif 'error' in resource_status.lower() and raise_rule_in_error_state:
-            raise_method = _get_name_of_raise_method(resource_name)
-            resource_exception = getattr(share_exceptions, raise_method)
-            raise resource_exception(resource_id=resource_id)
-        if int(time.time()) - start >= resource_status_check_time_out:
-            message = ('%s %s failed to reach %s status (current %s) '
-                       'within the required time (%s s).' %
-                       (resource_name.replace('_', ' '), resource_id, status,
-                        resource_status, resource_status_check_time_out))
-            raise exceptions.TimeoutException(message)
-
+    pending = list(dict.fromkeys(resource_ids))
+    statuses = {}
+    created_at = {}
+    failures = {}
+    stall_detector = StallDetector(resource_name, clock=clock)
+    countdown = time_budget.Countdown(
+        resource_status_check_time_out, budget, clock)
+    # NOTE: the countdown of each resource, which starts over for the
+    # resources replacing failed ones.
+    countdowns = {resource_id: countdown for resource_id in pending}
+    intervals = polling.get_poll_intervals(client)
+    with waiter_timeline.track(resource_name, countdown) as timeline:
+        while True:
+            created_since = None
+            if all(resource_id in created_at for resource_id in pending):
+                created_since = min(created_at[resource_id]
+                                    for resource_id in pending)
+            listed = yield functools.partial(
+                list_resources, client, resource_type, pending, params=params,
+                created_since=created_since, **method_kwargs)
+            failed = {}
+            for resource_id in list(pending):
+                resource = listed.get(resource_id)
+                if resource is None:
+                    resource = yield functools.partial(
+                        resource_type.fetch, client, resource_id,
+                        **method_kwargs)
+                if resource.get('created_at'):
+                    created_at[resource_id] = resource['created_at']
+                statuses[resource_id] = resource[status_attr]
+                timeline.observe(resource_id, statuses[resource_id])
+                if statuses[resource_id] in exp_status:
+                    pending.remove(resource_id)
+                elif 'error' in statuses[resource_id].lower():
+                    failed[resource_id] = resource_type.error(
+                        resource_id=resource_id)
+                elif countdowns[resource_id].expired():
+                    message = ('%s %s failed to reach %s status (current %s) '
+                               'within the required time (%s s).' %
+                               (resource_name.replace('_', ' '), resource_id,
+                                status, statuses[resource_id],
+                                resource_status_check_time_out))
+                    failed[resource_id] = exceptions.TimeoutException(
+                        message + countdowns[resource_id].describe())
+                else:
+                    try:
+                        stall_detector.check(
+                            resource_id, resource, statuses[resource_id])
+                    except share_exceptions.ResourceStalled as e:
+                        failed[resource_id] = e
+
+            for resource_id, error in failed.items():
+                pending.remove(resource_id)
+                replacement = None
+                if retry is not None and not (
+                        countdown.budget and countdown.budget.expired()):
+                    replacement = yield functools.partial(
+                        retry, resource_id, error)
+                if replacement is None:
+                    failures[resource_id] = error
+                    continue
+                pending.append(replacement)
+                countdowns[replacement] = time_budget.Countdown(
+                    resource_status_check_time_out, budget, clock)
+
+            if not pending:
+                break
+            # NOTE: sleeps until the next poll, or until the first pending
+            # resource times out. Resources replacing failed ones may time
+            # out after the countdown of the wait.
+            next_timeout = min(
+                (countdowns[resource_id] for resource_id in pending),
+                key=time_budget.Countdown.remaining)
+            yield waiter_steps.Sleep(next_timeout, next(intervals),
+                                     watch=pending)
+
+        if failures:
+            raise share_exceptions.ResourcesWaitFailed(
+                resource_name=resource_name, status=status,
+                failures=failures)
+
+
+@waiter_steps.waiter
+def wait_for_access_rules_status(client, resource_id, rule_ids, status,
+                                 resource_name='access_rule',
+                                 raise_rule_in_error_state=True,
+                                 version=LATEST_MICROVERSION, timeout=None,
+                                 budget=None, clock=None):
+    """Waits for several access rules of a resource to reach a given status.
+
+    The access rules of the share or snapshot are listed once per poll and
+    indexed by ID, instead of being listed once per rule and poll.
+
+    :param resource_name: 'access_rule' or 'snapshot_access'.
+    :raises share_exceptions.ResourcesWaitFailed: once every rule is either
+        in the expected status or failed, if any of them ended up in an
+        error status or did not reach the status within the timeout.
+    """
+    resource_type = resources.get_resource_type(resource_name)
+    if not resource_type.lists_rules:
+        raise share_exceptions.InvalidResource(
+            message="%s resources are not access rules" % resource_name)
+    list_action = getattr(client, resource_type.get)
+    method_kwargs = {}
+    if isinstance(client, shares_client.SharesV2Client):
+        method_kwargs.update({'version': version})
 
+    exp_status = status if isinstance(status, list) else [status]
+    resource_status_check_time_out = client.build_timeout
+    if timeout is not None:
+        resource_status_check_time_out = timeout
+    pending = list(dict.fromkeys(rule_ids))
+    statuses = {}
+    failures = {}
+    countdown = time_budget.Countdown(
+        resource_status_check_time_out, budget, clock)
+    intervals = polling.get_poll_intervals(client)
+    with waiter_timeline.track(resource_name, countdown) as timeline:
+        while True:
+            listed = {rule['id']: rule for rule in (
+                yield functools.partial(
+                    list_action, resource_id, **method_kwargs))[
+                        resource_type.response_key]}
+            for rule_id in list(pending):
+                rule = listed.get(rule_id)
+                statuses[rule_id] = rule and rule[resource_type.status_attr]
+                timeline.observe(rule_id, statuses[rule_id])
+                if statuses[rule_id] in exp_status:
+                    pending.remove(rule_id)
+                elif (statuses[rule_id] and raise_rule_in_error_state and
+                        'error' in statuses[rule_id].lower()):
+                    failures[rule_id] = resource_type.error(
+                        resource_id=rule_id)
+                    pending.remove(rule_id)
+
+            if not pending:
+                break
+            if countdown.expired():
+                for rule_id in pending:
+                    message = ('%s %s failed to reach %s status (current %s) '
+                               'within the required time (%s s).' %
+                               (resource_name.replace('_', ' '), rule_id,
+                                status, statuses[rule_id],
+                                resource_status_check_time_out))
+                    failures[rule_id] = exceptions.TimeoutException(
+                        message + countdown.describe())
+                break
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=[resource_id] + pending)
+
+        if failures:
+            raise share_exceptions.ResourcesWaitFailed(
+                resource_name=resource_name, status=status,
+                failures=failures)
+
+
+@waiter_steps.waiter
 def wait_for_migration_status(client, share_id, dest_host, status_to_wait,
-                              version=LATEST_MICROVERSION):
-    """Waits for a share to migrate to a certain host."""
+                              version=LATEST_MICROVERSION, budget=None,
+                              clock=None):
+    """Waits for a share to migrate to a certain host.
+
+    While the migration is in progress, if stall detection or the progress
+    timelines are enabled, its progress is polled as well to detect stalled
+    migrations and to poll long migrations less often.
+    """
     statuses = ((status_to_wait,)
                 if not isinstance(status_to_wait, (tuple, list, set))
                 else status_to_wait)
-    share = client.get_share(share_id, version=version)['share']
     migration_timeout = CONF.share.migration_timeout
-    start = int(time.time())
-    while share['task_state'] not in statuses:
-        time.sleep(client.build_interval)
-        share = client.get_share(share_id, version=version)['share']
-        if share['task_state'] in statuses:
-            break
-        elif share['task_state'] == 'migration_error':
-            raise share_exceptions.ShareMigrationException(
-                share_id=share['id'], src=share['host'], dest=dest_host)
-        elif int(time.time()) - start >= migration_timeout:
-            message = ('Share %(share_id)s failed to reach a status in'
-                       '%(status)s when migrating from host %(src)s to '
-                       'host %(dest)s within the required time '
-                       '%(timeout)s.' % {
-                           'src': share['host'],
-                           'dest': dest_host,
-                           'share_id': share['id'],
-                           'timeout': client.build_timeout,
-                           'status': str(statuses),
-                       })
-            raise exceptions.TimeoutException(message)
+    countdown = time_budget.Countdown(migration_timeout, budget, clock)
+    get_share = functools.partial(client.get_share, share_id, version=version)
+    share = (yield get_share)['share']
+    tracker = migration_progress.ProgressTracker('share', share_id,
+                                                 clock=clock)
+    intervals = polling.get_poll_intervals(client)
+    try:
+        with waiter_timeline.track('share_migration', countdown) as timeline:
+            timeline.observe(share_id, share['task_state'])
+            while share['task_state'] not in statuses:
+                yield waiter_steps.Sleep(
+                    countdown, tracker.next_interval(next(intervals)),
+                    watch=[share_id])
+                share = (yield get_share)['share']
+                timeline.observe(share_id, share['task_state'])
+                progress = None
+                if tracker.enabled and (
+                        share['task_state'] in
+                        migration_progress.PROGRESS_TASK_STATES):
+                    progress = yield functools.partial(
+                        migration_progress.get_share_progress, client,
+                        share_id, version)
+                tracker.update(share['task_state'], progress)
+                if share['task_state'] in statuses:
+                    break
+                elif share['task_state'] == 'migration_error':
+                    raise share_exceptions.ShareMigrationException(
+                        share_id=share['id'], src=share['host'],
+                        dest=dest_host)
+                elif countdown.expired():
+                    message = ('Share %(share_id)s failed to reach a status '
+                               'in%(status)s when migrating from host '
+                               '%(src)s to host %(dest)s within the required '
+                               'time %(timeout)s.' % {
+                                   'src': share['host'],
+                                   'dest': dest_host,
+                                   'share_id': share['id'],
+                                   'timeout': client.build_timeout,
+                                   'status': str(statuses),
+                               })
+                    raise exceptions.TimeoutException(
+                        message + countdown.describe())
+    finally:
+        migration_progress.record(tracker)
     return share
 
 
-def wait_for_snapshot_access_rule_deletion(client, snapshot_id, rule_id):
-    rule = client.get_snapshot_access_rule(snapshot_id, rule_id)
-    start = int(time.time())
-
-    while rule is not None:
-        time.sleep(client.build_interval)
+@waiter_steps.waiter
+def wait_for_share_server_migration_status(client, server_id, status_to_wait,
+                                           version=LATEST_MICROVERSION,
+                                           timeout=None, budget=None,
+                                           clock=None):
+    """Waits for a share server migration to reach a certain task state.
 
-        rule = client.get_snapshot_access_rule(snapshot_id, rule_id)
-
-        if rule is None:
-            return
-        if int(time.time()) - start >= client.build_timeout:
-            message = ('The snapshot access rule %(id)s failed to delete '
-                       'within the required time (%(time)ss).' %
-                       {
-                           'time': client.build_timeout,
-                           'id': rule_id,
-                       })
-            raise exceptions.TimeoutException(message)
-
-
-def wait_for_message(client, resource_id):
-    """Waits until a message for a resource with given id exists"""
-    start = int(time.time())
+    Like wait_for_migration_status, it follows the progress of the migration.
+    """
+    statuses = ((status_to_wait,)
+                if not isinstance(status_to_wait, (tuple, list, set))
+                else status_to_wait)
+    migration_timeout = timeout or CONF.share.share_server_migration_timeout
+    countdown = time_budget.Countdown(migration_timeout, budget, clock)
+    show_server = functools.partial(
+        client.show_share_server, server_id, version=version)
+    server = (yield show_server)['share_server']
+    tracker = migration_progress.ProgressTracker('share_server', server_id,
+                                                 clock=clock)
+    intervals = polling.get_poll_intervals(client)
+    try:
+        with waiter_timeline.track('share_server_migration',
+                                   countdown) as timeline:
+            timeline.observe(server_id, server['task_state'])
+            while server['task_state'] not in statuses:
+                yield waiter_steps.Sleep(
+                    countdown, tracker.next_interval(next(intervals)),
+                    watch=[server_id])
+                server = (yield show_server)['share_server']
+                timeline.observe(server_id, server['task_state'])
+                progress = None
+                if tracker.enabled and (
+                        server['task_state'] in
+                        migration_progress.PROGRESS_TASK_STATES):
+                    progress = yield functools.partial(
+                        migration_progress.get_share_server_progress, client,
+                        server_id, version)
+                tracker.update(server['task_state'], progress)
+                if server['task_state'] in statuses:
+                    break
+                elif server['task_state'] == 'migration_error':
+                    raise share_exceptions.ShareServerMigrationException(
+                        server_id=server_id)
+                elif countdown.expired():
+                    message = ('Share server %(server_id)s failed to reach a '
+                               'task state in %(status)s within the required '
+                               'time %(timeout)s.' % {
+                                   'server_id': server_id,
+                                   'timeout': migration_timeout,
+                                   'status': str(statuses),
+                               })
+                    raise exceptions.TimeoutException(
+                        message + countdown.describe())
+    finally:
+        migration_progress.record(tracker)
+    return server
+
+
+@waiter_steps.waiter
+def wait_for_snapshot_access_rule_deletion(client, snapshot_id, rule_id,
+                                           budget=None, clock=None):
+    countdown = time_budget.Countdown(client.build_timeout, budget, clock)
+    get_rule = functools.partial(
+        client.get_snapshot_access_rule, snapshot_id, rule_id)
+    with waiter_timeline.track('snapshot_access', countdown) as timeline:
+        rule = yield get_rule
+        timeline.observe(rule_id, rule['state'] if rule
+                         else waiter_timeline.DELETED)
+        intervals = polling.get_poll_intervals(client)
+
+        while rule is not None:
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=(snapshot_id, rule_id))
+
+            rule = yield get_rule
+            timeline.observe(rule_id, rule['state'] if rule
+                             else waiter_timeline.DELETED)
+
+            if rule is None:
+                return
+            if countdown.expired():
+                message = ('The snapshot access rule %(id)s failed to delete '
+                           'within the required time (%(time)ss).' %
+                           {
+                               'time': client.build_timeout,
+                               'id': rule_id,
+                           })
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+
+
+def get_message_params(params, created_since, version):
+    """Adds the created_since filter to params if version supports it."""
+    params = dict(params)
+    if created_since and utils.is_microversion_ge(
+            version, constants.MESSAGES_QUERY_BY_TIMESTAMP_VERSION):
+        params['created_since'] = created_since
+    return params
+
+
+@waiter_steps.waiter
+def wait_for_message(client, resource_id, created_since=None,
+                     version=LATEST_MICROVERSION, budget=None, clock=None):
+    """Waits until a message for a resource with given id exists
+
+    Only the messages of the resource are listed, and only those created
+    since created_since, if given, e.g. the creation time of the resource.
+    """
+    countdown = time_budget.Countdown(client.build_timeout, budget, clock)
+    intervals = polling.get_poll_intervals(client)
+    params = get_message_params(
+        {'resource_id': resource_id}, created_since, version)
     message = None
 
-    while not message:
-        time.sleep(client.build_interval)
-        for msg in client.list_messages()['messages']:
-            if msg['resource_id'] == resource_id:
-                return msg
-
-        if int(time.time()) - start >= client.build_timeout:
-            message = ('No message for resource with id %s was created in'
-                       ' the required time (%s s).' %
-                       (resource_id, client.build_timeout))
-            raise exceptions.TimeoutException(message)
-
-
-def wait_for_soft_delete(client, share_id, version=LATEST_MICROVERSION):
+    with waiter_timeline.track('message', countdown) as timeline:
+        timeline.observe(resource_id, waiter_timeline.ABSENT)
+        while not message:
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=[resource_id])
+            for msg in (yield functools.partial(
+                    client.list_messages, params=params,
+                    version=version))['messages']:
+                if msg['resource_id'] == resource_id:
+                    timeline.observe(resource_id, waiter_timeline.CREATED)
+                    return msg
+            timeline.observe(resource_id, waiter_timeline.ABSENT)
+
+            if countdown.expired():
+                message = ('No message for resource with id %s was created '
+                           'in the required time (%s s).' %
+                           (resource_id, client.build_timeout))
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+
+
+@waiter_steps.waiter
+def wait_for_messages(client, resource_ids, created_since=None,
+                      version=LATEST_MICROVERSION, budget=None, clock=None):
+    """Waits until a message exists for each resource with given ids
+
+    Each poll lists the messages created since the newest message of the
+    previous poll, starting from created_since if given, so that polls do
+    not list the same messages over and over.
+
+    :returns: dict of the first message of each resource by resource ID.
+    """
+    countdown = time_budget.Countdown(client.build_timeout, budget, clock)
+    intervals = polling.get_poll_intervals(client)
+    pending = set(resource_ids)
+    found = {}
+    cursor = created_since
+
+    with waiter_timeline.track('message', countdown) as timeline:
+        while True:
+            params = get_message_params(
+                {'sort_key': 'created_at', 'sort_dir': 'asc'}, cursor,
+                version)
+            for msg in (yield functools.partial(
+                    client.list_messages, params=params,
+                    version=version))['messages']:
+                if msg['resource_id'] in pending:
+                    found[msg['resource_id']] = msg
+                    pending.remove(msg['resource_id'])
+                    timeline.observe(msg['resource_id'],
+                                     waiter_timeline.CREATED)
+                cursor = max(cursor or msg['created_at'], msg['created_at'])
+            for resource_id in pending:
+                timeline.observe(resource_id, waiter_timeline.ABSENT)
+            if not pending:
+                return found
+
+            if countdown.expired():
+                message = ('No message for resources with ids %s was created '
+                           'in the required time (%s s).' %
+                           (', '.join(sorted(pending)),
+                            client.build_timeout))
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=pending)
+
+
+def get_recycle_bin_status(share):
+    """Returns the status of a share, 'soft_deleted' if in recycle bin."""
+    if share['is_soft_deleted']:
+        return SOFT_DELETED_STATUS
+    return share['status']
+
+
+@waiter_steps.waiter
+def wait_for_soft_delete(client, share_id, version=LATEST_MICROVERSION,
+                         budget=None, clock=None):
     """Wait for a share soft delete to recycle bin."""
-    share = client.get_share(share_id, version=version)['share']
-    start = int(time.time())
-    while not share['is_soft_deleted']:
-        time.sleep(client.build_interval)
-        share = client.get_share(share_id, version=version)['share']
-        if share['is_soft_deleted']:
-            break
-        elif int(time.time()) - start >= client.build_timeout:
-            message = ('Share %(share_id)s failed to be soft deleted to '
-                       'recycle bin within the required time '
-                       '%(timeout)s.' % {
-                           'share_id': share['id'],
-                           'timeout': client.build_timeout,
-                       })
-            raise exceptions.TimeoutException(message)
-
-
-def wait_for_restore(client, share_id, version=LATEST_MICROVERSION):
+    countdown = time_budget.Countdown(client.build_timeout, budget, clock)
+    get_share = functools.partial(client.get_share, share_id, version=version)
+    with waiter_timeline.track('share', countdown) as timeline:
+        share = (yield get_share)['share']
+        timeline.observe(share_id, get_recycle_bin_status(share))
+        intervals = polling.get_poll_intervals(client)
+        while not share['is_soft_deleted']:
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=[share_id])
+            share = (yield get_share)['share']
+            timeline.observe(share_id, get_recycle_bin_status(share))
+            if share['is_soft_deleted']:
+                break
+            elif countdown.expired():
+                message = ('Share %(share_id)s failed to be soft deleted to '
+                           'recycle bin within the required time '
+                           '%(timeout)s.' % {
+                               'share_id': share['id'],
+                               'timeout': client.build_timeout,
+                           })
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+
+
+@waiter_steps.waiter
+def wait_for_restore(client, share_id, version=LATEST_MICROVERSION,
+                     budget=None, clock=None):
     """Wait for a share restore from recycle bin."""
-    share = client.get_share(share_id, version=version)['share']
-    start = int(time.time())
-    while share['is_soft_deleted']:
-        time.sleep(client.build_interval)
-        share = client.get_share(share_id, version=version)['share']
-        if not share['is_soft_deleted']:
-            break
-        elif int(time.time()) - start >= client.build_timeout:
-            message = ('Share %(share_id)s failed to restore from '
-                       'recycle bin within the required time '
-                       '%(timeout)s.' % {
-                           'share_id': share['id'],
-                           'timeout': client.build_timeout,
-                       })
-            raise exceptions.TimeoutException(message)
-
-
+    countdown = time_budget.Countdown(client.build_timeout, budget, clock)
+    get_share = functools.partial(client.get_share, share_id, version=version)
+    with waiter_timeline.track('share', countdown) as timeline:
+        share = (yield get_share)['share']
+        timeline.observe(share_id, get_recycle_bin_status(share))
+        intervals = polling.get_poll_intervals(client)
+        while share['is_soft_deleted']:
+            yield waiter_steps.Sleep(countdown, next(intervals),
+                                     watch=[share_id])
+            share = (yield get_share)['share']
+            timeline.observe(share_id, get_recycle_bin_status(share))
+            if not share['is_soft_deleted']:
+                break
+            elif countdown.expired():
+                message = ('Share %(share_id)s failed to restore from '
+                           'recycle bin within the required time '
+                           '%(timeout)s.' % {
+                               'share_id': share['id'],
+                               'timeout': client.build_timeout,
+                           })
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+
+
+@waiter_steps.waiter
 def wait_for_subnet_create_check(client, share_network_id,
                                  neutron_net_id=None,
                                  neutron_subnet_id=None,
-                                 availability_zone=None):
-    result = client.subnet_create_check(
-        share_network_id, neutron_net_id=neutron_net_id,
-        neutron_subnet_id=neutron_subnet_id,
+                                 availability_zone=None, budget=None,
+                                 clock=None):
+    countdown = time_budget.Countdown(client.build_timeout, budget, clock)
+    check = functools.partial(
+        client.subnet_create_check, share_network_id,
+        neutron_net_id=neutron_net_id, neutron_subnet_id=neutron_subnet_id,
         availability_zone=availability_zone)
-    start = int(time.time())
-    while not result['compatible']:
-        time.sleep(client.build_interval)
-        result = client.subnet_create_check(
-            share_network_id, neutron_net_id=neutron_net_id,
-            neutron_subnet_id=neutron_subnet_id,
-            availability_zone=availability_zone)
-        if result['compatible']:
-            break
-        elif int(time.time()) - start >= client.build_timeout or (
-                result['compatible'] is False):
-            message = ('Subnet create check failed within the '
-                       'required time %(timeout)s seconds for share network '
-                       '%(share_network)s.' % {
-                           'timeout': client.build_timeout,
-                           'share_network': share_network_id,
-                       })
-            raise exceptions.TimeoutException(message)
+    with waiter_timeline.track('share_network', countdown) as timeline:
+        result = yield check
+        timeline.observe(share_network_id, get_compatibility(result))
+        intervals = polling.get_poll_intervals(client)
+        while not result['compatible']:
+            yield waiter_steps.Sleep(countdown, next(intervals))
+            result = yield check
+            timeline.observe(share_network_id, get_compatibility(result))
+            if result['compatible']:
+                break
+            elif countdown.expired() or result['compatible'] is False:
+                message = ('Subnet create check failed within the '
+                           'required time %(timeout)s seconds for share '
+                           'network %(share_network)s.' % {
+                               'timeout': client.build_timeout,
+                               'share_network': share_network_id,
+                           })
+                raise exceptions.TimeoutException(
+                    message + countdown.describe())
+
+
+def get_compatibility(result):
+    """Returns the outcome of a subnet create check, as a status."""
+    return {True: 'compatible', False: 'incompatible'}.get(
+        result['compatible'], 'checking')
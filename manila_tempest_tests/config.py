@@ -51,6 +51,24 @@ ShareGroup = [
                default="2.96",
                help="The maximum api microversion is configured to be the "
                     "value of the latest microversion supported by Manila."),
+    cfg.BoolOpt("microversion_negotiation",
+                default=False,
+                help="Whether to ask the Share API for the microversions it "
+                     "supports and narrow down the configured "
+                     "'min_api_microversion' to 'max_api_microversion' "
+                     "range to them. Tests that require other "
+                     "microversions are skipped, and requests for the "
+                     "configured maximum microversion use the highest one "
+                     "the API supports instead. The API is asked once per "
+                     "test run, the test workers share the result through "
+                     "'microversion_cache_file'."),
+    cfg.StrOpt("microversion_cache_file",
+               help="File where the microversion range negotiated with the "
+                    "Share API is stored for all the workers of a test run. "
+                    "Defaults to a file in the temporary directory named "
+                    "after the test runner process and the identity "
+                    "endpoint, removed when the last test worker using it "
+                    "exits."),
     cfg.StrOpt("region",
                default="",
                help="The share region name to use. If empty, the value "
@@ -209,6 +227,230 @@ ShareGroup = [
                default=500,
                help="Timeout in seconds to wait for a share to become"
                     "available."),
+    cfg.StrOpt("poll_strategy",
+               default="fixed",
+               choices=["fixed", "backoff"],
+               help="Strategy used by the waiters to space out status "
+                    "checks. 'fixed' sleeps 'build_interval' seconds between "
+                    "checks. 'backoff' does a fast first check after "
+                    "'poll_first_interval' seconds, then starts at "
+                    "'build_interval' and grows by 'poll_backoff_factor' up "
+                    "to 'poll_max_interval', with random jitter."),
+    cfg.FloatOpt("poll_first_interval",
+                 default=0.5,
+                 min=0,
+                 help="Time in seconds before the first status check when "
+                      "'poll_strategy' is 'backoff'."),
+    cfg.FloatOpt("poll_max_interval",
+                 default=15,
+                 min=0,
+                 help="Maximum time in seconds between status checks when "
+                      "'poll_strategy' is 'backoff'."),
+    cfg.FloatOpt("poll_backoff_factor",
+                 default=2,
+                 min=1,
+                 help="Multiplier applied to the interval between status "
+                      "checks when 'poll_strategy' is 'backoff'."),
+    cfg.FloatOpt("poll_jitter",
+                 default=0.1,
+                 min=0,
+                 max=1,
+                 help="Fraction of the interval between status checks that "
+                      "is randomly added or subtracted when 'poll_strategy' "
+                      "is 'backoff'."),
+    cfg.StrOpt("waiter_backend",
+               default="polling",
+               choices=["polling", "events"],
+               help="How the waiters learn about status changes. 'polling' "
+                    "only polls the API. 'events' also listens to the "
+                    "'event_source', wakes waiters up on changes of the "
+                    "resources they wait for, and only polls every "
+                    "'event_fallback_interval' seconds."),
+    cfg.StrOpt("event_source",
+               default="notifications",
+               help="Source of the resource change events of the 'events' "
+                    "waiter backend: 'notifications' for manila "
+                    "notifications (requires oslo.messaging), or the import "
+                    "path of an EventSource subclass."),
+    cfg.IntOpt("event_fallback_interval",
+               default=60,
+               min=1,
+               help="Poll interval of the waiters, in seconds, with the "
+                    "'events' waiter backend."),
+    cfg.StrOpt("event_transport_url",
+               secret=True,
+               help="oslo.messaging transport URL of the manila "
+                    "notifications, for the 'notifications' event source. "
+                    "Defaults to the oslo.messaging configuration."),
+    cfg.StrOpt("event_topic",
+               default="notifications",
+               help="Topic of the manila notifications, for the "
+                    "'notifications' event source."),
+    cfg.IntOpt("stall_timeout",
+               default=0,
+               min=0,
+               help="Number of seconds after which the resource status "
+                    "waiters give up on a resource whose status and "
+                    "'updated_at' did not change, instead of waiting for "
+                    "the whole build timeout. It must exceed the time the "
+                    "slowest backend operation may take without updating "
+                    "the resource. 0 disables stall detection."),
+    cfg.IntOpt("test_time_budget",
+               default=0,
+               min=0,
+               help="Number of seconds all the waits of a test may take "
+                    "together, so that a test chaining several waits can "
+                    "not take several build timeouts. The waits made by the "
+                    "cleanups of the test are not bounded by it. 0 disables "
+                    "the budget."),
+    cfg.BoolOpt("http_connection_pooling",
+                default=False,
+                help="Whether the share clients keep their HTTP connections "
+                     "to the Share API alive and share them between all the "
+                     "clients of a test worker, instead of opening a new "
+                     "connection for each request. It is not used when "
+                     "clients are configured with a proxy."),
+    cfg.IntOpt("http_num_pools",
+               default=10,
+               min=1,
+               help="Number of hosts to keep connection pools for when "
+                    "'http_connection_pooling' is enabled."),
+    cfg.IntOpt("http_pool_maxsize",
+               default=10,
+               min=1,
+               help="Number of idle connections kept per host when "
+                    "'http_connection_pooling' is enabled."),
+    cfg.IntOpt("discovery_cache_ttl",
+               default=0,
+               min=0,
+               help="Time in seconds the share clients cache the responses "
+                    "of read-only discovery calls (pool names, availability "
+                    "zones, default share type, extensions, limits and "
+                    "services). Share type, quota and service changes "
+                    "invalidate the cache. Usage counters returned by the "
+                    "limits API may be stale for up to this time. 0 disables "
+                    "the cache."),
+    cfg.IntOpt("list_page_size",
+               default=100,
+               min=1,
+               help="Number of resources requested per page by the share "
+                    "clients' 'iter_*' methods, which fetch list results "
+                    "page by page."),
+    cfg.BoolOpt("api_metrics_enabled",
+                default=False,
+                help="Whether the share clients record the latency of the "
+                     "Share API calls per HTTP method, URL template, "
+                     "microversion and status. The calls made by each test "
+                     "are attached to its results."),
+    cfg.StrOpt("api_metrics_dir",
+               help="Directory where each test worker writes the latency "
+                    "percentiles and call counts of the Share API calls it "
+                    "made, as JSON and CSV, when 'api_metrics_enabled' is "
+                    "set."),
+    cfg.BoolOpt("waiter_timeline_enabled",
+                default=False,
+                help="Whether the waiters record, for each resource they "
+                     "wait for, its initial and final status, the duration "
+                     "of the wait and the number of polls. The waits of each "
+                     "test are attached to its results."),
+    cfg.StrOpt("waiter_timeline_dir",
+               help="Directory where each test worker writes the latency "
+                    "percentiles of the status transitions it waited for, "
+                    "per resource type, and its slowest waits, as JSON, "
+                    "when 'waiter_timeline_enabled' is set."),
+    cfg.FloatOpt("rate_limit",
+                 default=0,
+                 min=0,
+                 help="Maximum number of requests per second the share "
+                      "clients of all the test workers send to the Share "
+                      "API. Requests over the rate wait for their turn "
+                      "instead of being rejected by the API as over limit. "
+                      "0 means no client side rate limit."),
+    cfg.IntOpt("rate_limit_burst",
+               default=10,
+               min=1,
+               help="Number of requests that can be sent at once before "
+                    "'rate_limit' applies."),
+    cfg.BoolOpt("rate_limit_from_api",
+                default=False,
+                help="Whether to rate limit the requests of the share "
+                     "clients, per HTTP method, to the rate limits returned "
+                     "by the Share API limits. 'rate_limit' is used when the "
+                     "API does not return any rate limit."),
+    cfg.IntOpt("retry_attempts",
+               default=0,
+               min=0,
+               help="Number of times the share clients send again an "
+                    "idempotent request that failed with one of "
+                    "'retry_statuses', e.g. while the API restarts. 0 "
+                    "disables retries."),
+    cfg.ListOpt("retry_statuses",
+                default=[413, 429, 503],
+                item_type=types.Integer(),
+                help="HTTP statuses of the responses to retry. Over quota "
+                     "413 responses are never retried. 409 is not retried "
+                     "by default, since negative tests expect conflicts "
+                     "right away."),
+    cfg.FloatOpt("retry_interval",
+                 default=1,
+                 min=0,
+                 help="Seconds to wait before the first retry of a request, "
+                      "unless the API asks for another delay. The following "
+                      "retries wait twice as long as the previous one."),
+    cfg.FloatOpt("retry_max_interval",
+                 default=30,
+                 min=0,
+                 help="Maximum number of seconds to wait between retries."),
+    cfg.ListOpt("retry_idempotent_actions",
+                default=['access_list', 'os-access_list',
+                         'reset_status', 'os-reset_status',
+                         'reset_task_state', 'os-reset_task_state',
+                         'force_delete', 'os-force_delete'],
+                help="Resource actions that can be retried, since sending "
+                     "them again does not change their outcome. Requests "
+                     "with GET, HEAD, PUT, DELETE and COPY methods are always "
+                     "considered idempotent."),
+    cfg.BoolOpt("retry_non_idempotent",
+                default=False,
+                help="Whether to also retry the requests that are not "
+                     "idempotent, such as resource creations. Retrying them "
+                     "may create duplicate resources."),
+    cfg.BoolOpt("coalesce_get_requests",
+                default=False,
+                help="Whether concurrent identical GET requests of a test "
+                     "worker, i.e. for the same URL, microversion and token, "
+                     "share a single in flight request and its response, "
+                     "e.g. when concurrent waiters poll the same share."),
+    cfg.IntOpt("async_client_max_requests",
+               default=64,
+               min=1,
+               help="Maximum number of requests the asyncio share clients "
+                    "of a test worker send concurrently."),
+    cfg.IntOpt("cleanup_max_workers",
+               default=1,
+               min=1,
+               help="Maximum number of resources deleted concurrently when "
+                    "cleaning up test resources. Resources are still deleted "
+                    "after the resources that depend on them. The default, "
+                    "1, deletes resources one by one in the reverse order "
+                    "of their creation."),
+    cfg.BoolOpt("fixture_pool_enabled",
+                default=False,
+                help="Whether test classes share the share networks and "
+                     "public share types they clean up with the class "
+                     "with the other test classes of the same test worker "
+                     "that need equivalent ones. Pooled fixtures are "
+                     "deleted when the test worker exits. Share networks "
+                     "are only pooled without dynamic credentials and "
+                     "security services, share types only if admin "
+                     "credentials are configured when dynamic credentials "
+                     "are used."),
+    cfg.BoolOpt("defer_deletion_waits",
+                default=False,
+                help="Whether the cleanup of the resources created by a test "
+                     "only requests their deletion and lets a background "
+                     "thread wait for them to be deleted. Failed deletions "
+                     "are reported in the cleanup of the test class."),
     cfg.BoolOpt("suppress_errors_in_cleanup",
                 default=False,
                 help="Whether to suppress errors with clean up operation "
@@ -357,6 +599,19 @@ ShareGroup = [
                default=1500,
                help="Time to wait for share server migration before "
                     "timing out (seconds)."),
+    cfg.IntOpt("migration_stall_timeout",
+               default=0,
+               min=0,
+               help="Number of seconds after which the share and share "
+                    "server migration waiters fail if the progress reported "
+                    "by the migration did not grow. Drivers that only report "
+                    "0 and 100 percent need it to exceed their longest "
+                    "migration. 0 disables stall detection."),
+    cfg.StrOpt("migration_progress_dir",
+               help="Directory where each test worker writes the progress "
+                    "timelines of the share and share server migrations it "
+                    "waited for, as JSON, when it exits. Unset by default, "
+                    "in which case they are only logged."),
     cfg.StrOpt("default_share_type_name",
                help="Default share type name to use in tempest tests."),
     cfg.StrOpt("backend_replication_type",
@@ -69,7 +69,7 @@ class ManilaTempestPlugin(plugins.TempestPlugin):
             'name': 'share_v2',
             'service_version': 'share.v2',
             'module_path': 'manila_tempest_tests.services.share.v2',
-            'client_names': ['SharesV2Client'],
+            'client_names': ['SharesV2Client', 'SharesV2AsyncClient'],
         }
         v2_params.update(shares_config)
         return [v2_params]
@@ -12,7 +12,9 @@
 # License for the specific language governing permissions and limitations under
 # the License.
 
+from manila_tempest_tests.services.share.v2.json.shares_async_client import \
+    SharesV2AsyncClient
 from manila_tempest_tests.services.share.v2.json.shares_client import \
     SharesV2Client
 
-__all__ = ['SharesV2Client']
+__all__ = ['SharesV2AsyncClient', 'SharesV2Client']
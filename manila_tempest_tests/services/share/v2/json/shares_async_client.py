@@ -0,0 +1,118 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+from concurrent import futures
+import functools
+import threading
+
+from tempest import config
+
+from manila_tempest_tests.common import waiter_steps
+from manila_tempest_tests.services.share.v2.json import shares_client
+
+CONF = config.CONF
+
+# SharesV2Client methods available as coroutines of SharesV2AsyncClient.
+ASYNC_METHODS = (
+    # Shares
+    'create_share', 'get_share', 'list_shares', 'list_shares_with_detail',
+    'delete_share', 'extend_share', 'shrink_share', 'reset_state',
+    'get_share_instance', 'show_share_server', 'get_share_group',
+    'get_share_group_snapshot', 'subnet_create_check', 'list_messages',
+    # Snapshots
+    'create_snapshot', 'get_snapshot', 'list_snapshots',
+    'list_snapshots_with_detail', 'delete_snapshot', 'get_snapshot_instance',
+    'list_snapshot_access_rules', 'get_snapshot_access_rule',
+    # Access rules
+    'create_access_rule', 'list_access_rules', 'get_access_rule',
+    'delete_access_rule',
+    # Replicas
+    'create_share_replica', 'get_share_replica', 'list_share_replicas',
+    'delete_share_replica', 'promote_share_replica',
+    # Backups
+    'create_share_backup', 'get_share_backup', 'list_share_backups',
+    'delete_share_backup', 'restore_share_backup',
+)
+
+_executor_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(
+                max_workers=CONF.share.async_client_max_requests,
+                thread_name_prefix='manila-async-client')
+        return _executor
+
+
+def _async_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.call(name, *args, **kwargs)
+
+    method.__name__ = name
+    method.__qualname__ = 'SharesV2AsyncClient.%s' % name
+    method.__doc__ = 'Coroutine version of SharesV2Client.%s.' % name
+    return method
+
+
+class SharesV2AsyncClient(object):
+    """Asyncio counterpart of SharesV2Client.
+
+    The requests are sent by a SharesV2Client, so they are authenticated,
+    checked and versioned the same way, in a thread pool shared by the
+    clients of the process and bounded by 'share.async_client_max_requests'.
+    Waiting between polls does not hold any thread, which lets a single event
+    loop drive hundreds of concurrent operations.
+    """
+
+    def __init__(self, auth_provider, **kwargs):
+        self.client = shares_client.SharesV2Client(auth_provider, **kwargs)
+
+    @classmethod
+    def from_client(cls, client):
+        """Returns an async client sending requests with client."""
+        async_client = cls.__new__(cls)
+        async_client.client = client
+        return async_client
+
+    @property
+    def build_interval(self):
+        return self.client.build_interval
+
+    @property
+    def build_timeout(self):
+        return self.client.build_timeout
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs), a blocking call, without blocking."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_executor(), functools.partial(func, *args, **kwargs))
+
+    async def call(self, name, *args, **kwargs):
+        """Runs the SharesV2Client method called name without blocking."""
+        return await self.run(getattr(self.client, name), *args, **kwargs)
+
+    async def call_with_client(self, func, *args, **kwargs):
+        """Runs func(client, *args, **kwargs) without blocking."""
+        return await self.run(func, self.client, *args, **kwargs)
+
+    wait_for_resource_deletion = waiter_steps.async_waiter(
+        shares_client.SharesV2Client.wait_for_resource_deletion)
+
+
+for _name in ASYNC_METHODS:
+    setattr(SharesV2AsyncClient, _name, _async_method(_name))
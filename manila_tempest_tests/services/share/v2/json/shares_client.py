@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+from concurrent import futures
+import functools
 import json
 import re
 import time
@@ -23,13 +26,31 @@ from tempest.lib.common import rest_client
 from tempest.lib.common.utils import data_utils
 from tempest.lib import exceptions
 
+from manila_tempest_tests.common import api_metrics
+from manila_tempest_tests.common import connection_pool
 from manila_tempest_tests.common import constants
+from manila_tempest_tests.common import microversions
+from manila_tempest_tests.common import polling
+from manila_tempest_tests.common import rate_limiter
+from manila_tempest_tests.common import resources
+from manila_tempest_tests.common import response_cache
+from manila_tempest_tests.common import retries
+from manila_tempest_tests.common import single_flight
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.common import waiter_steps
+from manila_tempest_tests.common import waiter_timeline
 from manila_tempest_tests import share_exceptions
 from manila_tempest_tests import utils
 
 CONF = config.CONF
-LATEST_MICROVERSION = CONF.share.max_api_microversion
+LATEST_MICROVERSION = microversions.latest()
 EXPERIMENTAL = {'X-OpenStack-Manila-API-Experimental': 'True'}
+# Mutating requests on these resources invalidate the cached responses of
+# the discovery calls (pools, availability zones, default share type,
+# extensions, limits and services).
+DISCOVERY_CACHE_INVALIDATING_RESOURCES = (
+    'types', 'quota-sets', 'os-quota-sets', 'services', 'os-services',
+)
 
 
 class SharesV2Client(rest_client.RestClient):
@@ -47,10 +68,26 @@ class SharesV2Client(rest_client.RestClient):
             self.share_protocol = CONF.share.enable_protocols[0]
         self.share_network_id = CONF.share.share_network_id
         self.share_size = CONF.share.share_size
+        if (CONF.share.http_connection_pooling and
+                not kwargs.get('proxy_url')):
+            # Share keep-alive connections with all the clients of the
+            # process instead of opening a new connection per request.
+            self.http_obj = connection_pool.get_transport(
+                disable_ssl_certificate_validation=self.dscv,
+                ca_certs=kwargs.get('ca_certs'),
+                timeout=kwargs.get('http_timeout'),
+                follow_redirects=kwargs.get('follow_redirects', True),
+                num_pools=CONF.share.http_num_pools,
+                maxsize=CONF.share.http_pool_maxsize)
 
     def inject_microversion_header(self, headers, version,
                                    extra_headers=False):
         """Inject the required manila microversion header."""
+        if (CONF.share.microversion_negotiation and
+                isinstance(version, microversions.LatestMicroversion)):
+            # Requests default to the configured maximum microversion, which
+            # the API may not support. Send the highest one it supports.
+            version = utils.get_supported_microversion_range()[1]
         new_headers = self.get_headers()
         new_headers[self.API_MICROVERSIONS_HEADER] = version
         if extra_headers and headers:
@@ -59,36 +96,162 @@ class SharesV2Client(rest_client.RestClient):
             new_headers = headers
         return new_headers
 
+    @classmethod
+    def expected_success(cls, expected_code, read_code):
+        # NOTE: responses with a 404 status are only returned, instead of
+        # raised, for DELETE requests retried after the resource was deleted,
+        # see _send.
+        if read_code == 404:
+            return
+        super(SharesV2Client, cls).expected_success(expected_code, read_code)
+
     def verify_request_id(self, response):
         response_headers = [r.lower() for r in response.keys()]
         assert_msg = ("Response is missing request ID. Response "
                       "headers are: %s") % response
         assert 'x-compute-request-id' in response_headers, assert_msg
 
+    def _send(self, method, url, version, send, *args, **kwargs):
+        """Sends a request with the 'send' method of the parent class.
+
+        Idempotent requests failing with one of 'share.retry_statuses' are
+        sent again, up to 'share.retry_attempts' times, with an exponential
+        backoff or after the delay requested by the API, within the current
+        time budget. A DELETE request failing with 404 once retried is
+        successful: the resource was deleted by a previous attempt.
+        """
+        body = args[0] if args else kwargs.get('body')
+        intervals = None
+        attempt = 0
+        while True:
+            try:
+                return self._send_once(method, url, version, send, *args,
+                                       **kwargs)
+            except exceptions.NotFound as e:
+                if not attempt or method != 'DELETE':
+                    raise
+                self.LOG.info("%s %s failed with status 404 once retried, "
+                              "the resource is deleted.", method, url)
+                return e.resp, ''
+            except exceptions.RestClientException as e:
+                budget = time_budget.get_current()
+                if (attempt >= CONF.share.retry_attempts or
+                        not retries.is_retriable(method, url, body, e) or
+                        (budget is not None and budget.expired())):
+                    raise
+                if intervals is None:
+                    # The first retry waits 'retry_interval', the following
+                    # ones twice as long as the previous one.
+                    intervals = polling.backoff_intervals(
+                        2 * CONF.share.retry_interval,
+                        CONF.share.retry_interval,
+                        CONF.share.retry_max_interval, 2,
+                        CONF.share.poll_jitter)
+                delay = next(intervals)
+                if 'retry-after' in e.resp:
+                    try:
+                        delay = self._get_retry_after_delay(e.resp)
+                    except ValueError:
+                        pass
+                if budget is not None:
+                    delay = min(delay, budget.remaining())
+                attempt += 1
+                retries.record_retry(e.resp.status)
+                self.LOG.warning(
+                    "%s %s failed with status %s, retrying in %.1f seconds "
+                    "(attempt %d of %d).", method, url, e.resp.status, delay,
+                    attempt, CONF.share.retry_attempts)
+                time_budget.get_clock().sleep(delay)
+
+    def _send_once(self, method, url, version, send, *args, **kwargs):
+        """Sends a request once.
+
+        When 'share.rate_limit' or 'share.rate_limit_from_api' is set, the
+        request first waits for the client side rate limiter to let it
+        through. When 'share.api_metrics_enabled' is set, the latency of the
+        request is recorded per method, URL template, microversion and
+        status.
+        """
+        if CONF.share.rate_limit or CONF.share.rate_limit_from_api:
+            rate_limiter.get_limiter().acquire(
+                method, lambda: self.get_limits()['limits']['rate'])
+        if not CONF.share.api_metrics_enabled:
+            return send(url, *args, **kwargs)
+        status = None
+        start = time.monotonic()
+        try:
+            resp, body = send(url, *args, **kwargs)
+            status = resp.status
+            return resp, body
+        except exceptions.RestClientException as e:
+            status = getattr(getattr(e, 'resp', None), 'status', None)
+            raise
+        finally:
+            api_metrics.get_recorder().record(
+                method, url, version, status, time.monotonic() - start)
+
     # Overwrite all http verb calls to inject the micro version header
     def post(self, url, body, headers=None, extra_headers=False,
              version=LATEST_MICROVERSION):
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        resp, body = super(SharesV2Client, self).post(url, body,
-                                                      headers=headers)
+        resp, body = self._send('POST', url, version,
+                                super(SharesV2Client, self).post, body,
+                                headers=headers)
+        self._invalidate_discovery_cache(url)
         self.verify_request_id(resp)
         return resp, body
 
     def get(self, url, headers=None, extra_headers=False,
-            version=LATEST_MICROVERSION):
+            version=LATEST_MICROVERSION, cache=False):
+        """Sends a GET request.
+
+        :param cache: whether the response can be served from, and stored
+            in, the discovery response cache. The cache is only used when
+            'share.discovery_cache_ttl' is set.
+
+        When 'share.coalesce_get_requests' is set, concurrent identical GET
+        requests of the client's process are sent only once.
+        """
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        resp, body = super(SharesV2Client, self).get(url, headers=headers)
+        cache_key = None
+        if cache and CONF.share.discovery_cache_ttl:
+            cache_key = (self.base_url, url, version, self.user_id,
+                         self.project_id)
+            cached = response_cache.get_cache().get(
+                cache_key, CONF.share.discovery_cache_ttl)
+            if cached is not None:
+                return cached
+        send = functools.partial(self._send, 'GET', url, version,
+                                 super(SharesV2Client, self).get,
+                                 headers=headers)
+        if CONF.share.coalesce_get_requests:
+            # Identical requests of other threads share the one in flight.
+            resp, body = single_flight.get_group().do(
+                (self.base_url, url, tuple(sorted(headers.items())),
+                 self.token), send)
+        else:
+            resp, body = send()
         self.verify_request_id(resp)
+        if cache_key is not None:
+            response_cache.get_cache().set(cache_key, (resp, body))
         return resp, body
 
+    def _invalidate_discovery_cache(self, url):
+        """Drops cached discovery responses a mutating request may affect."""
+        resource = url.split('?', 1)[0].split('/', 1)[0]
+        if resource in DISCOVERY_CACHE_INVALIDATING_RESOURCES:
+            response_cache.get_cache().invalidate()
+
     def delete(self, url, headers=None, body=None, extra_headers=False,
                version=LATEST_MICROVERSION):
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        resp, body = super(SharesV2Client, self).delete(url, headers=headers,
-                                                        body=body)
+        resp, body = self._send('DELETE', url, version,
+                                super(SharesV2Client, self).delete,
+                                headers=headers, body=body)
+        self._invalidate_discovery_cache(url)
         self.verify_request_id(resp)
         return resp, body
 
@@ -96,14 +259,20 @@ class SharesV2Client(rest_client.RestClient):
               version=LATEST_MICROVERSION):
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        return super(SharesV2Client, self).patch(url, body, headers=headers)
+        resp, body = self._send('PATCH', url, version,
+                                super(SharesV2Client, self).patch, body,
+                                headers=headers)
+        self._invalidate_discovery_cache(url)
+        return resp, body
 
     def put(self, url, body, headers=None, extra_headers=False,
             version=LATEST_MICROVERSION):
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        resp, body = super(SharesV2Client, self).put(url, body,
-                                                     headers=headers)
+        resp, body = self._send('PUT', url, version,
+                                super(SharesV2Client, self).put, body,
+                                headers=headers)
+        self._invalidate_discovery_cache(url)
         self.verify_request_id(resp)
         return resp, body
 
@@ -111,7 +280,9 @@ class SharesV2Client(rest_client.RestClient):
              version=LATEST_MICROVERSION):
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        resp, body = super(SharesV2Client, self).head(url, headers=headers)
+        resp, body = self._send('HEAD', url, version,
+                                super(SharesV2Client, self).head,
+                                headers=headers)
         self.verify_request_id(resp)
         return resp, body
 
@@ -119,7 +290,9 @@ class SharesV2Client(rest_client.RestClient):
              version=LATEST_MICROVERSION):
         headers = self.inject_microversion_header(headers, version,
                                                   extra_headers=extra_headers)
-        resp, body = super(SharesV2Client, self).copy(url, headers=headers)
+        resp, body = self._send('COPY', url, version,
+                                super(SharesV2Client, self).copy,
+                                headers=headers)
         self.verify_request_id(resp)
         return resp, body
 
@@ -208,28 +381,239 @@ class SharesV2Client(rest_client.RestClient):
         return super(SharesV2Client, self)._parse_resp(
             body, top_key_to_verify=top_key_to_verify)
 
-    def _is_resource_deleted(self, func, res_id, resource_name, **kwargs):
+    def _is_resource_deleted(self, resource_type, res_id, parent_id=None):
         try:
-            res = func(res_id, **kwargs)[resource_name]
+            res = resource_type.fetch(self, res_id, parent_id=parent_id)
         except exceptions.NotFound:
             return True
+        if res is None:
+            return True
 
         if res.get('status') in ['error_deleting', 'error']:
             # Resource has "error_deleting" status and can not be deleted.
-            resource_type = func.__name__.split('_', 1)[-1]
             raise share_exceptions.ResourceReleaseFailed(
-                res_type=resource_type, res_id=res_id)
+                res_type=resource_type.name, res_id=res_id)
         return False
 
-    def wait_for_resource_deletion(self, *args, **kwargs):
-        """Waits for a resource to be deleted."""
-        start_time = int(time.time())
+    @waiter_steps.waiter
+    def wait_for_resource_deletion(self, *args, budget=None, clock=None,
+                                   **kwargs):
+        """Waits for a resource to be deleted.
+
+        :param budget: time_budget.TimeBudget also bounding the wait,
+            defaults to the current one, if any.
+        :param clock: time_budget.Clock reading the time and sleeping between
+            polls, defaults to the current one.
+        """
+        countdown = time_budget.Countdown(self.build_timeout, budget, clock)
+        intervals = polling.get_poll_intervals(self)
+        resource_name, resource_id = waiter_timeline.get_deleted_resource(
+            args, kwargs)
+        is_deleted = functools.partial(self.is_resource_deleted, *args,
+                                       **kwargs)
+        with waiter_timeline.track(resource_name, countdown) as timeline:
+            while True:
+                if (yield is_deleted):
+                    timeline.observe(resource_id, waiter_timeline.DELETED)
+                    return
+                timeline.observe(resource_id, waiter_timeline.EXISTING)
+                if countdown.expired():
+                    message = ('Resource %s was not deleted within the '
+                               'required time (%s s).' % (kwargs or args,
+                                                          self.build_timeout))
+                    raise exceptions.TimeoutException(
+                        message + countdown.describe())
+                yield waiter_steps.Sleep(countdown, next(intervals),
+                                         watch=list(kwargs.values()))
+
+    def delete_resources(self, specs, ignore_not_found=False,
+                         max_workers=None, budget=None, clock=None):
+        """Deletes resources concurrently and waits for all of them to go.
+
+        :param specs: list of dicts identifying each resource like the
+            kwargs of is_resource_deleted, e.g. {'share_id': share_id}.
+            A spec may also name, under 'action', the method of this client
+            deleting the resource, e.g. 'unmanage_share_server', instead of
+            the 'delete' method of the resource type.
+        :param ignore_not_found: whether resources that are already gone
+            when their deletion is requested count as deleted.
+        :param max_workers: number of deletions requested concurrently,
+            defaults to 'share.cleanup_max_workers'. With 1, deletions are
+            requested one by one from the calling thread.
+        :raises share_exceptions.ResourcesWaitFailed: once every resource is
+            either deleted or failed, if any deletion request or wait failed.
+            Its ``failures`` attribute maps each failed id to its exception.
+        :raises share_exceptions.InvalidResource: before any deletion, if a
+            spec does not identify a resource this client can delete.
+        """
+        specs = [dict(spec) for spec in specs]
+        actions = [spec.pop('action', None) for spec in specs]
+        for spec, action in zip(specs, actions):
+            resource_type = resources.get_resource_type_by_deletion_kwargs(
+                spec)
+            method = action or resource_type.delete
+            if method is None:
+                raise share_exceptions.InvalidResource(
+                    message="%s resources can not be deleted: %s" % (
+                        resource_type.name, spec))
+            if not hasattr(self, method):
+                raise share_exceptions.InvalidResource(
+                    message="%s has no deletion method %s" % (spec, method))
+        types_name = ', '.join(sorted(set(
+            resources.get_resource_type_by_deletion_kwargs(spec).name
+            for spec in specs)))
+        failures = {}
+
+        def delete(spec, action):
+            resource_type = resources.get_resource_type_by_deletion_kwargs(
+                spec)
+            args = [spec[resource_type.deletion_key]]
+            if resource_type.parent_param:
+                args.insert(0, spec[resource_type.parent_key])
+            try:
+                getattr(self, action or resource_type.delete)(*args)
+            except exceptions.NotFound:
+                if not ignore_not_found:
+                    raise
+
+        max_workers = max_workers or CONF.share.cleanup_max_workers
+        if max_workers == 1:
+            # NOTE: no executor, which also lets the pooled fixtures be
+            # deleted at exit, when no new thread can be started.
+            for spec, action in zip(specs, actions):
+                try:
+                    delete(spec, action)
+                except Exception as e:
+                    failures[resources.get_deletion_id(spec)] = e
+        else:
+            with futures.ThreadPoolExecutor(
+                    max_workers=max_workers) as executor:
+                requests = {executor.submit(delete, spec, action): spec
+                            for spec, action in zip(specs, actions)}
+                for future in futures.as_completed(requests):
+                    if future.exception() is not None:
+                        resource_id = resources.get_deletion_id(
+                            requests[future])
+                        failures[resource_id] = future.exception()
+
+        try:
+            self.wait_for_resources_deletion(
+                [spec for spec in specs
+                 if resources.get_deletion_id(spec) not in failures],
+                budget=budget, clock=clock)
+        except share_exceptions.ResourcesWaitFailed as e:
+            failures.update(e.failures)
+        if failures:
+            raise share_exceptions.ResourcesWaitFailed(
+                resource_name=types_name,
+                status=waiter_timeline.DELETED, failures=failures)
+
+    def wait_for_resources_deletion(self, specs, budget=None, clock=None):
+        """Waits for several resources to be deleted.
+
+        Each poll lists the resources of each type once, instead of getting
+        each resource that is still listed. Resources missing from the list
+        are checked with is_resource_deleted: list calls return at most
+        'osapi_max_limit' resources, so a resource may be missing without
+        being deleted. So are resources owned by another project, whose
+        type can not be listed, or that are the only pending resource of
+        their type, since a list call returns all the resources of the
+        project.
+
+        :param specs: list of is_resource_deleted kwargs, one per resource.
+        :raises share_exceptions.ResourcesWaitFailed: once every resource is
+            either deleted or failed, if any of them failed to be released
+            or was not deleted within the timeout.
+        """
+        pending = {resources.get_deletion_id(spec): spec for spec in specs}
+        types = {resource_id: resources.get_resource_type_by_deletion_kwargs(
+            spec) for resource_id, spec in pending.items()}
+        types_name = ', '.join(sorted(set(
+            resource_type.name for resource_type in types.values())))
+        failures = {}
+        countdown = time_budget.Countdown(self.build_timeout, budget, clock)
+        intervals = polling.get_poll_intervals(self)
+        with waiter_timeline.track(types_name, countdown) as timeline:
+            while True:
+                listed = {}
+                pending_types = collections.Counter(
+                    types[resource_id] for resource_id in pending)
+                for resource_type, count in pending_types.items():
+                    if (count > 1 and resource_type.list and
+                            not resource_type.parent_key):
+                        listed[resource_type.name] = {
+                            resource['id']: resource for resource in
+                            getattr(self, resource_type.list)()[
+                                resource_type.list_key]}
+                for resource_id, spec in list(pending.items()):
+                    resource_type = types[resource_id]
+                    resources_listed = listed.get(resource_type.name)
+                    try:
+                        if resource_id in (resources_listed or {}):
+                            resource = resources_listed[resource_id]
+                            if resource.get('status') in ['error_deleting',
+                                                          'error']:
+                                raise share_exceptions.ResourceReleaseFailed(
+                                    res_type=resource_type.name,
+                                    res_id=resource_id)
+                            deleted = False
+                        else:
+                            deleted = self.is_resource_deleted(**spec)
+                    except share_exceptions.ResourceReleaseFailed as e:
+                        failures[resource_id] = e
+                        del pending[resource_id]
+                        continue
+                    timeline.observe(
+                        resource_id, waiter_timeline.DELETED if deleted
+                        else waiter_timeline.EXISTING,
+                        resource_name=resource_type.name)
+                    if deleted:
+                        del pending[resource_id]
+
+                if not pending:
+                    break
+                if countdown.expired():
+                    for resource_id, spec in pending.items():
+                        message = ('Resource %s was not deleted within the '
+                                   'required time (%s s).' %
+                                   (spec, self.build_timeout))
+                        failures[resource_id] = exceptions.TimeoutException(
+                            message + countdown.describe())
+                    break
+                countdown.sleep(next(intervals), watch=list(pending))
+
+            if failures:
+                raise share_exceptions.ResourcesWaitFailed(
+                    resource_name=types_name,
+                    status=waiter_timeline.DELETED, failures=failures)
+
+    def _iter_pages(self, list_method, resource_key, params=None,
+                    page_size=None, params_arg='params', **kwargs):
+        """Yields the resources of a list call one page at a time.
+
+        Pages are requested with the 'limit' and 'offset' query parameters,
+        so that only one page is held in memory and callers that stop
+        iterating early do not fetch the remaining pages.
+
+        :param list_method: list method of this client to call for a page.
+        :param resource_key: key of the resource list in the response body.
+        :param params: query parameters (filters) of the list call.
+        :param page_size: number of resources per page, defaults to
+            'share.list_page_size'.
+        :param params_arg: name of the argument of list_method that takes
+            the query parameters.
+        """
+        params = dict(params or {})
+        page_size = page_size or CONF.share.list_page_size
+        offset = int(params.pop('offset', 0))
         while True:
-            if self.is_resource_deleted(*args, **kwargs):
+            params.update({'limit': page_size, 'offset': offset})
+            kwargs[params_arg] = params
+            resources = list_method(**kwargs)[resource_key]
+            yield from resources
+            if len(resources) < page_size:
                 return
-            if int(time.time()) - start_time >= self.build_timeout:
-                raise exceptions.TimeoutException
-            time.sleep(self.build_interval)
+            offset += len(resources)
 
     def update_share(self, share_id, version=LATEST_MICROVERSION, **kwargs):
         body = json.dumps({'share': kwargs})
@@ -305,32 +689,36 @@ class SharesV2Client(rest_client.RestClient):
         return rest_client.ResponseBody(resp, body)
 
     def get_default_share_type(self, version=LATEST_MICROVERSION):
-        resp, body = self.get("types/default", version=version)
+        resp, body = self.get("types/default", version=version, cache=True)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
     def get_limits(self, version=LATEST_MICROVERSION):
-        resp, body = self.get("limits", version=version)
+        resp, body = self.get("limits", version=version, cache=True)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
     def list_extensions(self, version=LATEST_MICROVERSION):
-        resp, body = self.get("extensions", version=version)
+        resp, body = self.get("extensions", version=version, cache=True)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
     def list_pools(self, detail=False, search_opts=None,
                    version=LATEST_MICROVERSION):
-        """Get list of scheduler pools."""
+        """Get list of scheduler pools.
+
+        Pool names are cached, not their details, whose capacities change
+        with every share created, deleted, extended or shrunk.
+        """
         uri = 'scheduler-stats/pools'
         if detail:
             uri += '/detail'
         if search_opts:
             uri += "?%s" % parse.urlencode(search_opts)
-        resp, body = self.get(uri, version=version)
+        resp, body = self.get(uri, version=version, cache=not detail)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
@@ -366,79 +754,19 @@ class SharesV2Client(rest_client.RestClient):
     def is_resource_deleted(self, *args, **kwargs):
         """Verifies whether provided resource deleted or not.
 
-        :param kwargs: dict with expected keys 'share_id', 'snapshot_id',
-        :param kwargs: 'sn_id', 'ss_id', 'vt_id' and 'server_id'
+        :param kwargs: dict with the key identifying the resource type and
+            the resource, e.g. 'share_id', 'snapshot_id', 'sn_id', 'ss_id'
+            or 'server_id', see the 'deletion_key' of the resource types.
+            Resources with a parent also need the ID of the parent, e.g.
+            'share_network_subnet_id' and 'sn_id', or 'rule_id' and
+            'share_id'.
         :raises share_exceptions.InvalidResource
         """
-        if "share_instance_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_instance, kwargs.get("share_instance_id"),
-                "share_instance")
-        elif "share_group_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_group, kwargs.get("share_group_id"),
-                "share_group")
-        elif "share_group_snapshot_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_group_snapshot,
-                kwargs.get("share_group_snapshot_id"), "share_group_snapshot")
-        elif "share_group_type_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_group_type, kwargs.get("share_group_type_id"),
-                "share_group_type")
-        elif "replica_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_replica, kwargs.get("replica_id"),
-                "share_replica")
-        elif "message_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_message, kwargs.get("message_id"), "message")
-        elif "share_network_subnet_id" in kwargs:
-            subnet_kwargs = {
-                "share_network_id": kwargs["sn_id"]}
-            return self._is_resource_deleted(
-                self.get_subnet, kwargs.get("share_network_subnet_id"),
-                "share_network_subnet", **subnet_kwargs
-            )
-        elif "share_id" in kwargs:
-            if "rule_id" in kwargs:
-                rule_id = kwargs.get("rule_id")
-                share_id = kwargs.get("share_id")
-                rules = self.list_access_rules(share_id)['access_list']
-                for rule in rules:
-                    if rule["id"] == rule_id:
-                        return False
-                return True
-            else:
-                return self._is_resource_deleted(
-                    self.get_share, kwargs.get("share_id"), "share")
-        elif "snapshot_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_snapshot, kwargs.get("snapshot_id"), "snapshot")
-        elif "sn_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_network, kwargs.get("sn_id"), "share_network")
-        elif "ss_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_security_service, kwargs.get("ss_id"),
-                "security_service")
-        elif "vt_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_volume_type, kwargs.get("vt_id"), "volume_type")
-        elif "st_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_type, kwargs.get("st_id"), "share_type")
-        elif "server_id" in kwargs:
-            return self._is_resource_deleted(
-                self.show_share_server, kwargs.get("server_id"),
-                "share_server")
-        elif "backup_id" in kwargs:
-            return self._is_resource_deleted(
-                self.get_share_backup, kwargs.get("backup_id"),
-                "share_backup")
-        else:
-            raise share_exceptions.InvalidResource(
-                message=str(kwargs))
+        resource_type = resources.get_resource_type_by_deletion_kwargs(
+            kwargs)
+        return self._is_resource_deleted(
+            resource_type, kwargs[resource_type.deletion_key],
+            parent_id=kwargs.get(resource_type.parent_key))
 
 ###############
 
@@ -505,6 +833,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_shares(self, detailed=False, params=None, page_size=None,
+                    version=LATEST_MICROVERSION, experimental=False):
+        """Iterate over shares, fetching them page by page."""
+        return self._iter_pages(
+            self.list_shares, 'shares', params=params, page_size=page_size,
+            detailed=detailed, version=version, experimental=experimental)
+
     def list_shares_in_recycle_bin(self, detailed=False,
                                    params=None, version=LATEST_MICROVERSION,
                                    experimental=False):
@@ -816,6 +1151,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_snapshots(self, detailed=False, params=None, page_size=None,
+                       version=LATEST_MICROVERSION):
+        """Iterate over share snapshots, fetching them page by page."""
+        return self._iter_pages(
+            self.list_snapshots, 'snapshots', params=params,
+            page_size=page_size, detailed=detailed, version=version)
+
     def list_snapshots_for_share(self, share_id, detailed=False,
                                  version=LATEST_MICROVERSION):
         """Get list of snapshots for given share."""
@@ -1140,7 +1482,7 @@ class SharesV2Client(rest_client.RestClient):
                 url = 'availability-zones'
             else:
                 url = 'os-availability-zone'
-        resp, body = self.get(url, version=version)
+        resp, body = self.get(url, version=version, cache=True)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
@@ -1157,7 +1499,7 @@ class SharesV2Client(rest_client.RestClient):
                 url = 'os-services'
         if params:
             url += '?%s' % parse.urlencode(params)
-        resp, body = self.get(url, version=version)
+        resp, body = self.get(url, version=version, cache=True)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
@@ -1401,6 +1743,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_share_groups(self, detailed=False, params=None, page_size=None,
+                          version=LATEST_MICROVERSION):
+        """Iterate over share groups, fetching them page by page."""
+        return self._iter_pages(
+            self.list_share_groups, 'share_groups', params=params,
+            page_size=page_size, detailed=detailed, version=version)
+
     def get_share_group(self, share_group_id, version=LATEST_MICROVERSION):
         """Get share group info."""
         uri = 'share-groups/%s' % share_group_id
@@ -1898,10 +2247,14 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
-    def list_share_replicas(self, share_id=None, version=LATEST_MICROVERSION):
+    def list_share_replicas(self, share_id=None, version=LATEST_MICROVERSION,
+                            params=None):
         """Get list of replicas."""
+        params = dict(params or {})
+        if share_id is not None:
+            params['share_id'] = share_id
         uri = "share-replicas/detail"
-        uri += ("?share_id=%s" % share_id) if share_id is not None else ''
+        uri += ("?%s" % parse.urlencode(params)) if params else ''
         headers, extra_headers = utils.get_extra_headers(
             version, constants.SHARE_REPLICA_GRADUATION_VERSION)
         resp, body = self.get(uri, headers=headers,
@@ -2066,6 +2419,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_share_networks(self, detailed=False, params=None,
+                            page_size=None, version=LATEST_MICROVERSION):
+        """Iterate over share networks, fetching them page by page."""
+        return self._iter_pages(
+            self.list_share_networks, 'share_networks', params=params,
+            page_size=page_size, detailed=detailed, version=version)
+
     def list_share_networks_with_detail(self, params=None,
                                         version=LATEST_MICROVERSION):
         """Get detailed list of share networks w/o filters."""
@@ -2133,17 +2493,28 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
-    def list_share_backups(self, share_id=None, version=LATEST_MICROVERSION):
+    def list_share_backups(self, share_id=None, version=LATEST_MICROVERSION,
+                           params=None):
         """Get list of backups."""
         uri = "share-backups/detail"
+        params = dict(params or {})
         if share_id:
-            uri += (f'?share_id={share_id}')
+            params['share_id'] = share_id
+        if params:
+            uri += '?%s' % parse.urlencode(params)
         resp, body = self.get(uri, headers=EXPERIMENTAL,
                               extra_headers=True, version=version)
         self.expected_success(200, resp.status)
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_share_backups(self, share_id=None, params=None, page_size=None,
+                           version=LATEST_MICROVERSION):
+        """Iterate over share backups, fetching them page by page."""
+        return self._iter_pages(
+            self.list_share_backups, 'share_backups', params=params,
+            page_size=page_size, share_id=share_id, version=version)
+
     def create_share_backup(self, share_id, name=None, description=None,
                             backup_options=None, version=LATEST_MICROVERSION):
         """Create a share backup."""
@@ -2306,6 +2677,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_messages(self, params=None, page_size=None,
+                      version=LATEST_MICROVERSION):
+        """Iterate over messages, fetching them page by page."""
+        return self._iter_pages(
+            self.list_messages, 'messages', params=params,
+            page_size=page_size, version=version)
+
     def delete_message(self, message_id, version=LATEST_MICROVERSION):
         """Delete a single message."""
         url = 'messages/%s' % message_id
@@ -2368,6 +2746,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_security_services(self, detailed=False, params=None,
+                               page_size=None, version=LATEST_MICROVERSION):
+        """Iterate over security services, fetching them page by page."""
+        return self._iter_pages(
+            self.list_security_services, 'security_services', params=params,
+            page_size=page_size, detailed=detailed, version=version)
+
     def delete_security_service(self, ss_id, version=LATEST_MICROVERSION):
         resp, body = self.delete("security-services/%s" % ss_id,
                                  version=version)
@@ -2648,6 +3033,13 @@ class SharesV2Client(rest_client.RestClient):
         body = json.loads(body)
         return rest_client.ResponseBody(resp, body)
 
+    def iter_resource_locks(self, filters=None, page_size=None,
+                            version=LATEST_MICROVERSION):
+        """Iterate over resource locks, fetching them page by page."""
+        return self._iter_pages(
+            self.list_resource_locks, 'resource_locks', params=filters,
+            page_size=page_size, params_arg='filters', version=version)
+
     def update_resource_lock(self,
                              lock_id,
                              resource_action=None,
@@ -90,3 +90,29 @@ class ShareServerMigrationException(exceptions.TempestException):
 
 class ShareBackupBuildErrorException(exceptions.TempestException):
     message = ("Share backup %(backup_id)s failed and is in ERROR status")
+
+
+class ResourcesWaitFailed(exceptions.TempestException):
+    message = ("%(count)s %(resource_name)s resource(s) failed to reach "
+               "%(status)s status")
+
+    def __init__(self, *args, **kwargs):
+        # NOTE: maps the id of each failed resource to the exception that
+        # describes its own failure.
+        self.failures = kwargs.get('failures', {})
+        kwargs.setdefault('count', len(self.failures))
+        args = args or tuple(
+            "%s: %s" % (res_id, exc) for res_id, exc in self.failures.items())
+        super(ResourcesWaitFailed, self).__init__(*args, **kwargs)
+
+
+class ResourceStalled(exceptions.TimeoutException):
+    message = ("%(resource_name)s %(resource_id)s is stuck in %(status)s "
+               "status: neither its status nor its updated_at "
+               "(%(updated_at)s) changed for %(seconds)s seconds")
+
+
+class MigrationStalled(exceptions.TimeoutException):
+    message = ("Migration of %(resource_name)s %(resource_id)s is stuck at "
+               "%(progress)s%% in %(task_state)s task state: its progress "
+               "did not grow for %(seconds)s seconds")
@@ -34,6 +34,9 @@ SHARE_REPLICA_QUOTAS_MICROVERSION = "2.53"
 @ddt.ddt
 class SharesAdminQuotasTest(base.BaseSharesAdminTest):
 
+    # Tests set quotas for the class share type.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(SharesAdminQuotasTest, cls).skip_checks()
@@ -186,6 +189,9 @@ class SharesAdminQuotasTest(base.BaseSharesAdminTest):
 @ddt.ddt
 class SharesAdminQuotasUpdateTest(base.BaseSharesAdminTest):
 
+    # Tests set quotas for the class share type.
+    pool_fixtures = False
+
     # We want to force a fresh project for this test class, since we'll be
     # manipulating project quotas - and any pre-existing projects may have
     # resources, quotas and the like that might interfere with our test cases.
@@ -910,9 +916,8 @@ class SharesAdminQuotasUpdateTest(base.BaseSharesAdminTest):
             self.assertEqual(s_use, quotas['shares']['in_use'])
 
         # Delete shares and then check usages
-        for share_id in (share_1['id'], share_2['id']):
-            self.client.delete_share(share_id)
-            self.client.wait_for_resource_deletion(share_id=share_id)
+        self.client.delete_resources(
+            [{'share_id': share_1['id']}, {'share_id': share_2['id']}])
         for kwargs in ({}, {'share_type': st_1['name']},
                        {'user_id': self.user_id}, {'share_type': st_2['id']}):
             quotas = self.client.detail_quotas(
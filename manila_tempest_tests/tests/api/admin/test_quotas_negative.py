@@ -35,6 +35,9 @@ SHARE_REPLICA_QUOTAS_MICROVERSION = "2.53"
 @ddt.ddt
 class SharesAdminQuotasNegativeTest(base.BaseSharesAdminTest):
 
+    # Tests set quotas for the class share type.
+    pool_fixtures = False
+
     # We want to force some fresh projects for this test class, since we'll be
     # manipulating project quotas - and any pre-existing projects may have
     # resources, quotas and the like that might interfere with our test cases.
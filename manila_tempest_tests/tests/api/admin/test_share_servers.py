@@ -285,13 +285,8 @@ class ShareServersAdminTest(base.BaseSharesAdminTest):
                 self.assertEqual(new_sn["id"], s["share_network_id"])
 
             # Delete shares, so we will have share server without shares
-            for s in shares:
-                self.shares_v2_client.delete_share(s["id"])
-
-            # Wait for shares deletion
-            for s in shares:
-                self.shares_v2_client.wait_for_resource_deletion(
-                    share_id=s["id"])
+            self.shares_v2_client.delete_resources(
+                [{'share_id': s["id"]} for s in shares])
 
             # List shares by share server id, we expect empty list
             empty = self.shares_v2_client.list_shares_with_detail(
@@ -30,6 +30,9 @@ CONF = config.CONF
 @ddt.ddt
 class ExtraSpecsAdminNegativeTest(base.BaseSharesMixedTest):
 
+    # Tests update the extra specs of the share types they create.
+    pool_fixtures = False
+
     @classmethod
     def resource_setup(cls):
         super(ExtraSpecsAdminNegativeTest, cls).resource_setup()
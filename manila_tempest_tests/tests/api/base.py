@@ -13,7 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from concurrent import futures
 import copy
+import functools
 import re
 import traceback
 
@@ -23,9 +25,17 @@ from tempest.lib.common import cred_client
 from tempest.lib.common.utils import data_utils
 from tempest.lib import exceptions
 from tempest import test
+from testtools import content
 
 from manila_tempest_tests import clients
+from manila_tempest_tests.common import api_metrics
 from manila_tempest_tests.common import constants
+from manila_tempest_tests.common import fixture_pool
+from manila_tempest_tests.common import microversions
+from manila_tempest_tests.common import reaper
+from manila_tempest_tests.common import resources
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.common import waiter_timeline
 from manila_tempest_tests.common import waiters
 from manila_tempest_tests import share_exceptions
 from manila_tempest_tests import utils
@@ -58,7 +68,37 @@ TAGS_PATTERN = re.compile(
     r"(?=.*\[.*\b(%(p)s|%(n)s)\b.*\])(?=.*\[.*\b(%(a)s|%(b)s|%(ab)s)\b.*\])" %
     TAGS_MAPPER)
 
-LATEST_MICROVERSION = CONF.share.max_api_microversion
+LATEST_MICROVERSION = microversions.latest()
+
+
+def _blocks_cleanup(later, earlier):
+    """Whether cleanup resource 'later' must be deleted before 'earlier'.
+
+    'later' is a resource that was added for cleanup after 'earlier'.
+    Resources of types without known dependents are never deleted
+    concurrently with other resources.
+    """
+    earlier_type = resources.RESOURCE_TYPES.get(earlier["type"])
+    later_type = resources.RESOURCE_TYPES.get(later["type"])
+    if (earlier_type is None or earlier_type.dependents is None or
+            later_type is None or later_type.dependents is None):
+        return True
+    if later["type"] not in earlier_type.dependents:
+        return False
+    # NOTE: narrow down the dependency when the resources tell what they
+    # belong to.
+    if later["type"] == "share_replica" and earlier["type"] == "share":
+        return later.get("share_id", earlier["id"]) == earlier["id"]
+    if later["type"] == "share" and earlier["type"] == "share_group":
+        return later.get("share_group_id", earlier["id"]) == earlier["id"]
+    if (later["type"] in ("share_network_subnet",
+                          "dissociate_security_service") and
+            earlier["type"] == "share_network"):
+        return later["extra_params"]["share_network_id"] == earlier["id"]
+    if (later["type"] == "dissociate_security_service" and
+            earlier["type"] == "security_service"):
+        return later["id"] == earlier["id"]
+    return True
 
 
 def verify_test_has_appropriate_tags(self):
@@ -108,6 +148,11 @@ class BaseSharesTest(test.BaseTestCase):
     # Will be cleaned up in tearDown method
     method_resources = []
 
+    # Whether the share network and share types created in the class setup
+    # may be shared with other classes, see fixture_pool. Classes modifying
+    # them must set it to False.
+    pool_fixtures = True
+
     # NOTE(andreaf) Override the client manager class to be used, so that
     # a stable class is used, which includes plugin registered services as well
     client_manager = clients.Clients
@@ -151,6 +196,8 @@ class BaseSharesTest(test.BaseTestCase):
         os = getattr(cls, 'os_%s' % cls.credentials[0])
         # Initialise share client for test credentials
         cls.shares_v2_client = os.share_v2.SharesV2Client()
+        if CONF.share.microversion_negotiation:
+            microversions.negotiate(cls.shares_v2_client)
         # Initialise network clients for test credentials
         cls.networks_client = None
         cls.subnets_client = None
@@ -173,13 +220,62 @@ class BaseSharesTest(test.BaseTestCase):
 
     def setUp(self):
         super(BaseSharesTest, self).setUp()
+        if CONF.share.api_metrics_enabled:
+            # NOTE: added first so that the calls made by the other cleanups
+            # are attached too.
+            self.addCleanup(self._attach_api_calls,
+                            api_metrics.get_recorder().open_scope())
+        if CONF.share.waiter_timeline_enabled:
+            self.addCleanup(self._attach_waiter_timeline,
+                            waiter_timeline.get_recorder().open_scope())
         self.addCleanup(self.clear_resources)
         verify_test_has_appropriate_tags(self)
+        self.time_budget = None
+        if CONF.share.test_time_budget:
+            self.time_budget = time_budget.TimeBudget(
+                CONF.share.test_time_budget).use()
+            self.addCleanup(self.time_budget.release)
+
+    def tearDown(self):
+        # NOTE: release the budget before the cleanups run, so that it does
+        # not cut the waits for the deletion of the test's resources short.
+        if self.time_budget is not None:
+            self.time_budget.release()
+        super(BaseSharesTest, self).tearDown()
+
+    def _attach_api_calls(self, scope):
+        """Attaches the summary of the test's Share API calls to its result."""
+        calls = api_metrics.get_recorder().close_scope(scope)
+        self.addDetail('manila-api-calls', content.json_content(calls))
+
+    def _attach_waiter_timeline(self, scope):
+        """Attaches the waits of the test to its result."""
+        waits = waiter_timeline.get_recorder().close_scope(scope)
+        self.addDetail('manila-waiter-timeline', content.json_content(waits))
 
     @classmethod
     def resource_cleanup(cls):
-        cls.clear_resources(cls.class_resources)
-        super(BaseSharesTest, cls).resource_cleanup()
+        # NOTE: the class resources, pooled fixtures and credentials are
+        # released even if a deferred deletion failed, whose failure is
+        # raised once they are.
+        try:
+            cls.wait_for_deferred_deletions()
+        finally:
+            try:
+                cls.clear_resources(cls.class_resources)
+            finally:
+                fixture_pool.get_pool().release(cls)
+                super(BaseSharesTest, cls).resource_cleanup()
+
+    @classmethod
+    def _can_pool_fixtures(cls, cleanup_in_class):
+        """Whether the fixtures being created may come from the pool.
+
+        :param cleanup_in_class: whether the fixtures are cleaned up with the
+            class, only those may be pooled.
+        """
+        return bool(CONF.share.fixture_pool_enabled and cls.pool_fixtures and
+                    cleanup_in_class)
 
     @classmethod
     def provide_and_associate_security_services(
@@ -285,8 +381,10 @@ class BaseSharesTest(test.BaseTestCase):
             # Share-network already exists, use it
             return shares_client.share_network_id
 
-        sn_name = "autogenerated_by_tempest"
-        sn_desc = "This share-network was created by tempest"
+        sn_kwargs = {
+            'name': "autogenerated_by_tempest",
+            'description': "This share-network was created by tempest",
+        }
 
         if not CONF.share.create_networks_when_multitenancy_enabled:
             # We need a new share network, but don't need to associate
@@ -294,12 +392,7 @@ class BaseSharesTest(test.BaseTestCase):
             # when manila is configured with "StandaloneNetworkPlugin"
             # or "NeutronSingleNetworkPlugin" where all tenants share
             # a single backend network where shares are exported.
-            sn = cls.create_share_network(cleanup_in_class=True,
-                                          client=shares_client,
-                                          add_security_services=True,
-                                          name=sn_name,
-                                          description=sn_desc)
-            return sn['id']
+            return cls._provide_share_network(shares_client, sn_kwargs)
 
         # Retrieve non-public network list owned by the tenant
         filters = {'project_id': shares_client.tenant_id,
@@ -320,18 +413,34 @@ class BaseSharesTest(test.BaseTestCase):
                 "CONF.share.create_networks_when_multitenancy_enabled is "
                 "set to True.")
 
-        net_id = tenant_networks_with_subnet[0]['id']
-        subnet_id = tenant_networks_with_subnet[0]['subnets'][0]
+        sn_kwargs['neutron_net_id'] = tenant_networks_with_subnet[0]['id']
+        sn_kwargs['neutron_subnet_id'] = (
+            tenant_networks_with_subnet[0]['subnets'][0])
 
         # Create suitable share-network
-        sn = cls.create_share_network(cleanup_in_class=True,
-                                      client=shares_client,
-                                      add_security_services=True,
-                                      name=sn_name,
-                                      description=sn_desc,
-                                      neutron_net_id=net_id,
-                                      neutron_subnet_id=subnet_id)
+        return cls._provide_share_network(shares_client, sn_kwargs)
 
+    @classmethod
+    def _provide_share_network(cls, shares_client, sn_kwargs):
+        """Creates the share network of the class, or takes it from the pool.
+
+        Share networks are not pooled with dynamic credentials, which are
+        deleted with the class, nor with security services, which are
+        cleaned up with the class.
+        """
+        if (not cls._can_pool_fixtures(cleanup_in_class=True) or
+                CONF.auth.use_dynamic_credentials or
+                CONF.share.security_service):
+            sn = cls.create_share_network(cleanup_in_class=True,
+                                          client=shares_client,
+                                          add_security_services=True,
+                                          **sn_kwargs)
+            return sn['id']
+        params = dict(sn_kwargs, project_id=shares_client.tenant_id)
+        sn = fixture_pool.get_pool().acquire(
+            'share_network', params, cls, shares_client,
+            lambda: shares_client.create_share_network(
+                **sn_kwargs)['share_network'])
         return sn['id']
 
     @classmethod
@@ -414,6 +523,9 @@ class BaseSharesTest(test.BaseTestCase):
     def create_shares(cls, share_data_list):
         """Creates several shares in parallel with retries.
 
+        Shares are requested one after another and then awaited together,
+        with one list request per poll, each one retried independently of
+        the others.
         Use this method when you want to create more than one share at same
         time. Especially if config option 'share.share_creation_retry_number'
         has value more than zero (0).
@@ -452,46 +564,86 @@ class BaseSharesTest(test.BaseTestCase):
             local_d["share"] = cls._create_share(
                 *local_d["args"], **local_d["kwargs"])
             local_d["cnt"] = 0
-            local_d["available"] = False
             local_d["wait_for_status"] = wait_for_status
             data.append(local_d)
 
-        while not all(d["available"] for d in data):
-            for d in data:
-                if not d["wait_for_status"]:
-                    d["available"] = True
-                if d["available"]:
-                    continue
-                client = d["kwargs"]["client"]
-                share_id = d["share"]["id"]
-                try:
-                    waiters.wait_for_resource_status(
-                        client, share_id, "available")
-                    d["available"] = True
-                except (share_exceptions.ShareBuildErrorException,
-                        exceptions.TimeoutException) as e:
-                    if CONF.share.share_creation_retry_number > d["cnt"]:
-                        d["cnt"] += 1
-                        msg = ("Share '%s' failed to be built. "
-                               "Trying create another." % share_id)
-                        LOG.error(msg)
-                        LOG.error(e)
-                        cg_id = d["kwargs"].get("consistency_group_id")
-                        if cg_id:
-                            # NOTE(vponomaryov): delete errored share
-                            # immediately in case share is part of CG.
-                            client.delete_share(
-                                share_id,
-                                params={"consistency_group_id": cg_id})
-                            client.wait_for_resource_deletion(
-                                share_id=share_id)
-                        d["share"] = cls._create_share(
-                            *d["args"], **d["kwargs"])
-                    else:
-                        raise
+        cls._wait_for_shares_with_retries(
+            [d for d in data if d["wait_for_status"]])
 
         return [d["share"] for d in data]
 
+    @classmethod
+    def _wait_for_shares_with_retries(cls, data):
+        """Waits for the shares of 'create_shares' data to become available.
+
+        The shares of each client are awaited together, those of different
+        clients concurrently. A share that fails to be built is re-created
+        as soon as its failure is seen, up to
+        'share.share_creation_retry_number' times, while the others are
+        still awaited.
+        """
+        retriable = (share_exceptions.ShareBuildErrorException,
+                     exceptions.TimeoutException)
+        data_by_id = {d["share"]["id"]: d for d in data}
+
+        def retry(share_id, e):
+            d = data_by_id[share_id]
+            if (not isinstance(e, retriable) or
+                    CONF.share.share_creation_retry_number <= d["cnt"]):
+                return None
+            cls._recreate_share(d, e)
+            data_by_id[d["share"]["id"]] = d
+            return d["share"]["id"]
+
+        def wait(client_data):
+            try:
+                waiters.wait_for_resources_status(
+                    client_data[0]["kwargs"]["client"],
+                    [d["share"]["id"] for d in client_data], "available",
+                    budget=budget, retry=retry)
+            except share_exceptions.ResourcesWaitFailed as e:
+                failures.update(e.failures)
+
+        data_by_client = {}
+        for d in data:
+            data_by_client.setdefault(
+                id(d["kwargs"]["client"]), []).append(d)
+        # NOTE: the budget of the test is passed explicitly, since budgets
+        # are per thread.
+        budget = time_budget.get_current()
+        failures = {}
+        if len(data_by_client) > 1:
+            with futures.ThreadPoolExecutor(
+                    max_workers=len(data_by_client)) as executor:
+                list(executor.map(wait, data_by_client.values()))
+        else:
+            for client_data in data_by_client.values():
+                wait(client_data)
+        for d in data:
+            if d["share"]["id"] in failures:
+                raise failures[d["share"]["id"]]
+
+    @classmethod
+    def _recreate_share(cls, d, e):
+        """Re-creates a share of 'create_shares' data that was not built."""
+        client = d["kwargs"]["client"]
+        share_id = d["share"]["id"]
+        d["cnt"] += 1
+        msg = ("Share '%s' failed to be built. "
+               "Trying create another." % share_id)
+        LOG.error(msg)
+        LOG.error(e)
+        cg_id = d["kwargs"].get("consistency_group_id")
+        if cg_id:
+            # NOTE(vponomaryov): delete errored share
+            # immediately in case share is part of CG.
+            client.delete_share(
+                share_id,
+                params={"consistency_group_id": cg_id})
+            client.wait_for_resource_deletion(
+                share_id=share_id)
+        d["share"] = cls._create_share(*d["args"], **d["kwargs"])
+
     @classmethod
     def create_share_group(cls, client=None, cleanup_in_class=True,
                            share_network_id=None, **kwargs):
@@ -679,7 +831,8 @@ class BaseSharesTest(test.BaseTestCase):
                              share_network_id=None,
                              client=None, cleanup_in_class=False,
                              cleanup=True, metadata=None,
-                             version=CONF.share.max_api_microversion):
+                             version=LATEST_MICROVERSION,
+                             wait_for_status=True):
         client = client or cls.shares_v2_client
         replica = client.create_share_replica(
             share_id, availability_zone=availability_zone,
@@ -698,15 +851,16 @@ class BaseSharesTest(test.BaseTestCase):
                 cls.class_resources.insert(0, resource)
             else:
                 cls.method_resources.insert(0, resource)
-        waiters.wait_for_resource_status(
-            client, replica["id"], constants.STATUS_AVAILABLE,
-            resource_name='share_replica')
+        if wait_for_status:
+            waiters.wait_for_resource_status(
+                client, replica["id"], constants.STATUS_AVAILABLE,
+                resource_name='share_replica')
         return replica
 
     @classmethod
     def create_backup_wait_for_active(cls, share_id, client=None,
                                       cleanup_in_class=False, cleanup=True,
-                                      version=CONF.share.max_api_microversion):
+                                      version=LATEST_MICROVERSION):
         client = client or cls.shares_v2_client
         backup_name = data_utils.rand_name('Backup')
         backup_options = CONF.share.driver_assisted_backup_test_driver_options
@@ -730,7 +884,7 @@ class BaseSharesTest(test.BaseTestCase):
 
     @classmethod
     def delete_share_replica(cls, replica_id, client=None,
-                             version=CONF.share.max_api_microversion):
+                             version=LATEST_MICROVERSION):
         client = client or cls.shares_v2_client
         try:
             client.delete_share_replica(replica_id, version=version)
@@ -740,7 +894,7 @@ class BaseSharesTest(test.BaseTestCase):
 
     @classmethod
     def promote_share_replica(cls, replica_id, client=None,
-                              version=CONF.share.max_api_microversion):
+                              version=LATEST_MICROVERSION):
         client = client or cls.shares_v2_client
         replica = client.promote_share_replica(
             replica_id, version=version)['share_replica']
@@ -888,110 +1042,157 @@ class BaseSharesTest(test.BaseTestCase):
         if it is not found, assumed it was deleted in test itself.
         It is expected, that all resources were added as LIFO
         due to restriction of deletion resources, that is in the chain.
+        A resource is only deleted once all resources added after it that
+        may block its deletion (see the 'dependents' of the resource types)
+        are gone; resources that do not depend on each other are deleted
+        concurrently by up to 'share.cleanup_max_workers' threads. With one
+        worker, resources are deleted one by one in LIFO order.
 
         :param resources: dict with keys 'type','id','client' and 'deleted'
         """
+        # NOTE: only the waits of the test method resources are deferred,
+        # class resources are cleaned up after 'wait_for_deferred_deletions'.
+        defer_waits = (resources is None and
+                       CONF.share.defer_deletion_waits)
         if resources is None:
             resources = cls.method_resources
+        pending = []
         for res in resources:
             if "deleted" not in res.keys():
                 res["deleted"] = False
             if "client" not in res.keys():
                 res["client"] = cls.shares_v2_client
             if not (res["deleted"]):
-                try:
-                    res_id = res['id']
-                    client = res["client"]
-                    with handle_cleanup_exceptions():
-                        if res["type"] == "share":
-                            cls.clear_share_replicas(res_id)
-                            share_group_id = res.get('share_group_id')
-                            if share_group_id:
-                                params = {'share_group_id': share_group_id}
-                                client.delete_share(res_id, params=params)
-                            else:
-                                client.delete_share(res_id)
-                            client.wait_for_resource_deletion(share_id=res_id)
-                        elif res["type"] == "snapshot":
-                            client.delete_snapshot(res_id)
-                            client.wait_for_resource_deletion(
-                                snapshot_id=res_id)
-                        elif (res["type"] == "share_network" and
-                                res_id != CONF.share.share_network_id):
-                            client.delete_share_network(res_id)
-                            client.wait_for_resource_deletion(sn_id=res_id)
-                        elif res["type"] == "dissociate_security_service":
-                            sn_id = res["extra_params"]["share_network_id"]
-                            client.remove_sec_service_from_share_network(
-                                sn_id=sn_id, ss_id=res_id
-                            )
-                        elif res["type"] == "security_service":
-                            client.delete_security_service(res_id)
-                            client.wait_for_resource_deletion(ss_id=res_id)
-                        elif res["type"] == "share_type":
-                            # Check if there are still shares using this
-                            # share type before attempting deletion to avoid
-                            # cascading cleanup issues
-                            shares_using_type = []
-                            try:
-                                shares_using_type = client.list_shares(
-                                    params={'share_type_id': res_id}
-                                )['shares']
-                            except Exception:
-                                pass
-                            if shares_using_type:
-                                # Skip deletion if any shares exist
-                                LOG.warning("Skipping share type deletion "
-                                            "for %s , still has %d shares "
-                                            "using it.",
-                                            res_id,
-                                            len(shares_using_type))
-                                res["deleted"] = True
-                                continue
-                            client.delete_share_type(res_id)
-                            client.wait_for_resource_deletion(st_id=res_id)
-                        elif res["type"] == "share_group":
-                            client.delete_share_group(res_id)
-                            client.wait_for_resource_deletion(
-                                share_group_id=res_id)
-                        elif res["type"] == "share_group_type":
-                            client.delete_share_group_type(res_id)
-                            client.wait_for_resource_deletion(
-                                share_group_type_id=res_id)
-                        elif res["type"] == "share_group_snapshot":
-                            client.delete_share_group_snapshot(res_id)
-                            client.wait_for_resource_deletion(
-                                share_group_snapshot_id=res_id)
-                        elif res["type"] == "share_replica":
-                            client.delete_share_replica(res_id)
-                            client.wait_for_resource_deletion(
-                                replica_id=res_id)
-                        elif res["type"] == "share_backup":
-                            client.delete_share_backup(res_id)
-                            client.wait_for_resource_deletion(backup_id=res_id)
-                        elif res["type"] == "share_network_subnet":
-                            sn_id = res["extra_params"]["share_network_id"]
-                            client.delete_subnet(sn_id, res_id)
-                            client.wait_for_resource_deletion(
-                                share_network_subnet_id=res_id,
-                                sn_id=sn_id)
-                        elif res["type"] == "quotas":
-                            user_id = res.get('user_id')
-                            client.reset_quotas(res_id, user_id=user_id)
-                        elif res["type"] == "resource_lock":
-                            client.delete_resource_lock(res_id)
-                        else:
-                            LOG.warning("Provided unsupported resource type "
-                                        "for cleanup '%s'. Skipping.",
-                                        res["type"])
-                except share_exceptions.ResourceReleaseFailed as e:
-                    # Resource is on error deleting state, so we remove it from
-                    # the list to delete, since it cannot be deleted anymore.
-                    # It raises because the current cleanup class or method
-                    # must fail.
-                    res["deleted"] = True
-                    raise e
-                res["deleted"] = True
+                pending.append(res)
+
+        blockers = [
+            {j for j in range(i) if _blocks_cleanup(pending[j], res)}
+            for i, res in enumerate(pending)
+        ]
+        # Resources other resources wait for can't have their waits deferred
+        blocking = set().union(*blockers)
+        if CONF.share.cleanup_max_workers == 1:
+            for i, res in enumerate(pending):
+                cls._clear_resource(
+                    res, defer_wait=defer_waits and i not in blocking)
+            return
+        started = set()
+        done = set()
+        running = {}
+        error = None
+        with futures.ThreadPoolExecutor(
+                max_workers=CONF.share.cleanup_max_workers) as executor:
+            while True:
+                # NOTE: stop scheduling deletions after the first failure,
+                # the resources left behind keep 'deleted' set to False.
+                if error is None:
+                    for i, res in enumerate(pending):
+                        if i not in started and blockers[i] <= done:
+                            started.add(i)
+                            future = executor.submit(
+                                cls._clear_resource, res,
+                                defer_wait=defer_waits and i not in blocking)
+                            running[future] = i
+                if not running:
+                    break
+                finished, __ = futures.wait(
+                    running, return_when=futures.FIRST_COMPLETED)
+                for future in finished:
+                    done.add(running.pop(future))
+                    if error is None:
+                        error = future.exception()
+        if error is not None:
+            raise error
+
+    @classmethod
+    def _clear_resource(cls, res, defer_wait=False):
+        """Deletes a single resource of 'clear_resources'.
+
+        :param defer_wait: if True, only request the deletion and let the
+            deletion reaper wait for the resource to be gone.
+        """
+        try:
+            res_id = res['id']
+            client = res["client"]
+            wait_for_deletion = client.wait_for_resource_deletion
+            if defer_wait:
+                wait_for_deletion = functools.partial(
+                    reaper.get_reaper().submit, client)
+            with handle_cleanup_exceptions():
+                resource_type = resources.RESOURCE_TYPES.get(res["type"])
+                if resource_type is None or resource_type.delete is None:
+                    LOG.warning("Provided unsupported resource type "
+                                "for cleanup '%s'. Skipping.",
+                                res["type"])
+                elif not cls._skip_resource_deletion(res):
+                    args = [res_id]
+                    kwargs = {param: res.get(key) for param, key in
+                              resource_type.delete_params.items()}
+                    parent_id = None
+                    if resource_type.parent_param:
+                        parent_id = (
+                            res["extra_params"][resource_type.parent_param])
+                        args.insert(0, parent_id)
+                    if res["type"] == "share":
+                        cls.clear_share_replicas(res_id)
+                        share_group_id = res.get('share_group_id')
+                        if share_group_id:
+                            kwargs['params'] = {
+                                'share_group_id': share_group_id}
+                    getattr(client, resource_type.delete)(*args, **kwargs)
+                    if resource_type.deletion_key:
+                        wait_kwargs = {resource_type.deletion_key: res_id}
+                        if resource_type.parent_key:
+                            wait_kwargs[resource_type.parent_key] = parent_id
+                        wait_for_deletion(**wait_kwargs)
+        except share_exceptions.ResourceReleaseFailed as e:
+            # Resource is on error deleting state, so we remove it from
+            # the list to delete, since it cannot be deleted anymore.
+            # It raises because the current cleanup class or method
+            # must fail.
+            res["deleted"] = True
+            raise e
+        res["deleted"] = True
+
+    @classmethod
+    def _skip_resource_deletion(cls, res):
+        """Whether a resource of 'clear_resources' must be left in place."""
+        if res["type"] == "share_network":
+            return res["id"] == CONF.share.share_network_id
+        if res["type"] == "share_type":
+            # Check if there are still shares using this
+            # share type before attempting deletion to avoid
+            # cascading cleanup issues
+            share_using_type = None
+            try:
+                share_using_type = next(res["client"].iter_shares(
+                    params={'share_type_id': res["id"]}, page_size=1), None)
+            except Exception:
+                pass
+            if share_using_type:
+                # Skip deletion if any shares exist
+                LOG.warning("Skipping share type deletion for %s , share %s "
+                            "is still using it.",
+                            res["id"], share_using_type['id'])
+                return True
+        return False
+
+    @classmethod
+    def wait_for_deferred_deletions(cls):
+        """Waits for the deletions deferred by 'clear_resources'.
+
+        Raises the first failure (preferring resources in error deleting
+        state) of the deferred waits; all of them are logged by the reaper.
+        """
+        failures = reaper.get_reaper().barrier()
+        if not failures:
+            return
+        error = next(
+            (f for f in failures
+             if isinstance(f, share_exceptions.ResourceReleaseFailed)),
+            failures[0])
+        with handle_cleanup_exceptions():
+            raise error
 
     # Useful assertions
     def assertDictMatch(self, d1, d2, approx_equal=False, tolerance=0.001):
@@ -1070,48 +1271,81 @@ class BaseSharesTest(test.BaseTestCase):
         self.addCleanup(self.shares_v2_client.delete_share, share['id'])
         waiters.wait_for_resource_status(
             self.shares_v2_client, share['id'], "error")
-        return waiters.wait_for_message(self.shares_v2_client, share['id'])
+        return waiters.wait_for_message(
+            self.shares_v2_client, share['id'],
+            created_since=share['created_at'])
 
     def allow_access(self, share_id, client=None, access_type=None,
                      access_level='rw', access_to=None, metadata=None,
                      version=LATEST_MICROVERSION, status='active',
                      raise_rule_in_error_state=True, lock_visibility=False,
                      lock_deletion=False, cleanup=True):
-
+        rule = {
+            'access_type': access_type,
+            'access_to': access_to,
+            'access_level': access_level,
+            'metadata': metadata,
+            'lock_visibility': lock_visibility,
+            'lock_deletion': lock_deletion,
+        }
+        try:
+            return self.allow_access_rules(
+                share_id, [rule], client=client, version=version,
+                status=status,
+                raise_rule_in_error_state=raise_rule_in_error_state,
+                cleanup=cleanup)[0]
+        except share_exceptions.ResourcesWaitFailed as e:
+            # NOTE: raise the exception describing the failure of the rule.
+            raise next(iter(e.failures.values()))
+
+    def allow_access_rules(self, share_id, rules, client=None,
+                           version=LATEST_MICROVERSION, status='active',
+                           raise_rule_in_error_state=True, cleanup=True):
+        """Creates several access rules on a share and waits for them.
+
+        :param rules: list of dicts with the 'access_type', 'access_to',
+            'access_level', 'metadata', 'lock_visibility' and
+            'lock_deletion' arguments of allow_access for each rule.
+        :returns: the created access rules, in the order of rules.
+        """
         client = client or self.shares_v2_client
         a_type, a_to = utils.get_access_rule_data_from_config(
             client.share_protocol)
-        access_type = access_type or a_type
-        access_to = access_to or a_to
 
-        kwargs = {
-            'access_type': access_type,
-            'access_to': access_to,
-            'access_level': access_level
-        }
-        delete_kwargs = (
-            {'unrestrict': True} if lock_deletion else {}
-        )
-        if client is self.shares_v2_client:
-            kwargs.update({'metadata': metadata, 'version': version})
-        if lock_visibility:
-            kwargs.update({'lock_visibility': True})
-        if lock_deletion:
-            kwargs.update({'lock_deletion': True})
-
-        rule = client.create_access_rule(share_id, **kwargs)['access']
-        waiters.wait_for_resource_status(
-            client, share_id, status, resource_name='access_rule',
-            rule_id=rule['id'], version=version,
+        created = []
+        for rule in rules:
+            kwargs = {
+                'access_type': rule.get('access_type') or a_type,
+                'access_to': rule.get('access_to') or a_to,
+                'access_level': rule.get('access_level', 'rw'),
+            }
+            lock_deletion = rule.get('lock_deletion', False)
+            delete_kwargs = (
+                {'unrestrict': True} if lock_deletion else {}
+            )
+            if client is self.shares_v2_client:
+                kwargs.update({'metadata': rule.get('metadata'),
+                               'version': version})
+            if rule.get('lock_visibility', False):
+                kwargs.update({'lock_visibility': True})
+            if lock_deletion:
+                kwargs.update({'lock_deletion': True})
+
+            access = client.create_access_rule(share_id, **kwargs)['access']
+            created.append(access)
+            if cleanup:
+                self.addCleanup(
+                    client.wait_for_resource_deletion, rule_id=access['id'],
+                    share_id=share_id, version=version)
+                self.addCleanup(
+                    client.delete_access_rule, share_id, access['id'],
+                    **delete_kwargs)
+
+        waiters.wait_for_access_rules_status(
+            client, share_id, [access['id'] for access in created], status,
+            version=version,
             raise_rule_in_error_state=raise_rule_in_error_state)
-        if cleanup:
-            self.addCleanup(
-                client.wait_for_resource_deletion, rule_id=rule['id'],
-                share_id=share_id, version=version)
-            self.addCleanup(
-                client.delete_access_rule, share_id, rule['id'],
-                **delete_kwargs)
-        return rule
+        return created
 
 
 class BaseSharesAdminTest(BaseSharesTest):
@@ -1138,10 +1372,23 @@ class BaseSharesAdminTest(BaseSharesTest):
     @classmethod
     def create_share_type(cls, name=None, is_public=True, client=None,
                           cleanup_in_class=True, extra_specs=None, **kwargs):
+        extra_specs = cls.add_extra_specs_to_dict(extra_specs=extra_specs)
+        if (name is None and client is None and is_public and
+                cls._can_pool_fixtures(cleanup_in_class)):
+            pool_client = fixture_pool.get_admin_client(
+                cls.admin_shares_v2_client)
+            if pool_client is not None:
+                params = dict(kwargs, is_public=is_public,
+                              extra_specs=extra_specs)
+                return fixture_pool.get_pool().acquire(
+                    'share_type', params, cls, pool_client,
+                    lambda: pool_client.create_share_type(
+                        data_utils.rand_name('tempest-pooled-share-type'),
+                        is_public, extra_specs=extra_specs,
+                        **kwargs)['share_type'])
         name = name or data_utils.rand_name(
             cls.__class__.__name__ + 'share-type')
         client = client or cls.admin_shares_v2_client
-        extra_specs = cls.add_extra_specs_to_dict(extra_specs=extra_specs)
         share_type = client.create_share_type(name, is_public,
                                               extra_specs=extra_specs,
                                               **kwargs)['share_type']
@@ -1274,7 +1521,9 @@ class BaseSharesAdminTest(BaseSharesTest):
         self.addCleanup(self.shares_v2_client.delete_share, share['id'])
         waiters.wait_for_resource_status(
             self.shares_v2_client, share['id'], "error")
-        return waiters.wait_for_message(self.shares_v2_client, share['id'])
+        return waiters.wait_for_message(
+            self.shares_v2_client, share['id'],
+            created_since=share['created_at'])
 
 
 class BaseSharesMixedTest(BaseSharesAdminTest):
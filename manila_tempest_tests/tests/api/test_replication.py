@@ -42,6 +42,9 @@ if utils.is_microversion_supported(REPLICA_METADATA_MICROVERSION):
 @ddt.ddt
 class ReplicationTest(base.BaseSharesMixedTest):
 
+    # Tests update the extra specs of the class share type.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(ReplicationTest, cls).skip_checks()
@@ -637,10 +640,16 @@ class ReplicationActionsTest(base.BaseSharesMixedTest):
         # Create replicas to 2 shares
         cls.replica1 = cls.create_share_replica(cls.shares[0]["id"],
                                                 cls.replica_zone,
-                                                cleanup_in_class=True)
+                                                cleanup_in_class=True,
+                                                wait_for_status=False)
         cls.replica2 = cls.create_share_replica(cls.shares[1]["id"],
                                                 cls.replica_zone,
-                                                cleanup_in_class=True)
+                                                cleanup_in_class=True,
+                                                wait_for_status=False)
+        waiters.wait_for_resources_status(
+            cls.shares_v2_client,
+            [cls.replica1["id"], cls.replica2["id"]],
+            constants.STATUS_AVAILABLE, resource_name='share_replica')
 
     @classmethod
     def _get_instance(cls, share):
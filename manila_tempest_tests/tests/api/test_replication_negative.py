@@ -32,6 +32,10 @@ _MIN_SUPPORTED_MICROVERSION = '2.11'
 
 
 class ReplicationNegativeBase(base.BaseSharesMixedTest):
+
+    # Tests update the extra specs of the class share type.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(ReplicationNegativeBase, cls).skip_checks()
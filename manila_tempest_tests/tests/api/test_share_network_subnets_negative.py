@@ -33,6 +33,10 @@ LATEST_MICROVERSION = CONF.share.max_api_microversion
 @ddt.ddt
 class ShareNetworkSubnetsNegativeTest(base.BaseSharesAdminTest):
 
+    # Tests add subnets and unmanaged share servers to the class share
+    # network.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(ShareNetworkSubnetsNegativeTest, cls).skip_checks()
@@ -157,6 +157,9 @@ class ShareNetworkListMixin(object):
 
 class ShareNetworksTest(base.BaseSharesMixedTest, ShareNetworkListMixin):
 
+    # Tests update the class share network.
+    pool_fixtures = False
+
     @classmethod
     def resource_setup(cls):
         super(ShareNetworksTest, cls).resource_setup()
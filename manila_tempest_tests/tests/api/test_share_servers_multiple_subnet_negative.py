@@ -27,6 +27,9 @@ CONF = config.CONF
 
 class ShareServerMultipleSubNegativeTest(base.BaseSharesMixedTest):
 
+    # Tests update the extra specs of the share types they create.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(ShareServerMultipleSubNegativeTest, cls).skip_checks()
@@ -26,6 +26,9 @@ CONF = config.CONF
 @ddt.ddt
 class ShareTypeAvailabilityZonesTest(base.BaseSharesMixedTest):
 
+    # Tests update the extra specs of the class share type.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(ShareTypeAvailabilityZonesTest, cls).skip_checks()
@@ -22,6 +22,9 @@ from manila_tempest_tests import utils
 @ddt.ddt
 class ShareTypeAvailabilityZonesNegativeTest(base.BaseSharesMixedTest):
 
+    # Tests update the extra specs of the class share type.
+    pool_fixtures = False
+
     @classmethod
     def skip_checks(cls):
         super(ShareTypeAvailabilityZonesNegativeTest, cls).skip_checks()
@@ -28,6 +28,9 @@ CONF = config.CONF
 class SharesFromSnapshotAcrossPools(base.BaseSharesMixedTest):
     """Test class for share creation from a snapshot across pools."""
 
+    # Tests update the extra specs of the class share type.
+    pool_fixtures = False
+
     @classmethod
     def resource_setup(cls):
         super(SharesFromSnapshotAcrossPools, cls).resource_setup()
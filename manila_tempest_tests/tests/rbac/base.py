@@ -18,7 +18,6 @@ from tempest import clients
 from tempest import config
 from tempest.lib import auth
 from tempest.lib.common.utils import data_utils
-from tempest.lib.common.utils import test_utils
 
 from manila_tempest_tests.common import waiters
 
@@ -48,19 +47,7 @@ class ShareRbacBaseTests(object):
 
     @classmethod
     def delete_resource(cls, client, **kwargs):
-        key_names = {
-            'st': 'share_type',
-            'sn': 'share_network',
-        }
-        key, resource_id = list(kwargs.items())[0]
-        key = key.rsplit('_', 1)[0]
-        resource_name = key_names[key] if key in key_names else key
-
-        del_action = getattr(client, 'delete_{}'.format(resource_name))
-        test_utils.call_and_ignore_notfound_exc(
-            del_action, resource_id)
-        test_utils.call_and_ignore_notfound_exc(
-            client.wait_for_resource_deletion, **kwargs)
+        client.delete_resources([kwargs], ignore_not_found=True)
 
     @classmethod
     def create_share(cls, client, share_type_id, size=None, name=None,
@@ -62,7 +62,8 @@ class ShareRbacUserMessageTests(rbac_base.ShareRbacBaseTests,
         self.addCleanup(client.delete_share, share['id'])
         waiters.wait_for_resource_status(client, share['id'], 'error')
 
-        message = waiters.wait_for_message(client, share['id'])
+        message = waiters.wait_for_message(
+            client, share['id'], created_since=share['created_at'])
         if cleanup:
             self.addCleanup(client.delete_message, message['id'])
         return message
@@ -23,9 +23,14 @@ from tempest import config
 from tempest.lib.common.utils import data_utils
 from tempest.lib.common.utils import test_utils
 from tempest.lib import exceptions
+from testtools import content
 
+from manila_tempest_tests.common import api_metrics
 from manila_tempest_tests.common import constants
+from manila_tempest_tests.common import microversions
 from manila_tempest_tests.common import remote_client
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.common import waiter_timeline
 from manila_tempest_tests.common import waiters as share_waiters
 from manila_tempest_tests.tests.api import base
 from manila_tempest_tests.tests.scenario import manager
@@ -57,6 +62,8 @@ class ShareScenarioTest(manager.NetworkScenarioTest):
         # Manila clients
         cls.shares_v2_client = cls.os_primary.share_v2.SharesV2Client()
         cls.shares_admin_v2_client = cls.os_admin.share_v2.SharesV2Client()
+        if CONF.share.microversion_negotiation:
+            microversions.negotiate(cls.shares_v2_client)
 
     @classmethod
     def skip_checks(cls):
@@ -72,6 +79,14 @@ class ShareScenarioTest(manager.NetworkScenarioTest):
     def setUp(self):
         base.verify_test_has_appropriate_tags(self)
         super(ShareScenarioTest, self).setUp()
+        # NOTE: added first so that the calls and waits of the other
+        # cleanups are attached too.
+        if CONF.share.api_metrics_enabled:
+            self.addCleanup(self._attach_api_calls,
+                            api_metrics.get_recorder().open_scope())
+        if CONF.share.waiter_timeline_enabled:
+            self.addCleanup(self._attach_waiter_timeline,
+                            waiter_timeline.get_recorder().open_scope())
 
         self.image_id = None
         # Setup image and flavor the test instance
@@ -131,6 +146,29 @@ class ShareScenarioTest(manager.NetworkScenarioTest):
             # Skip if DHSS=False
             self.share_network = self.create_share_network()
 
+        self.time_budget = None
+        if CONF.share.test_time_budget:
+            self.time_budget = time_budget.TimeBudget(
+                CONF.share.test_time_budget).use()
+            self.addCleanup(self.time_budget.release)
+
+    def tearDown(self):
+        # NOTE: release the budget before the cleanups run, so that it does
+        # not cut the waits for the deletion of the test's resources short.
+        if getattr(self, 'time_budget', None) is not None:
+            self.time_budget.release()
+        super(ShareScenarioTest, self).tearDown()
+
+    def _attach_api_calls(self, scope):
+        """Attaches the summary of the test's Share API calls to its result."""
+        calls = api_metrics.get_recorder().close_scope(scope)
+        self.addDetail('manila-api-calls', content.json_content(calls))
+
+    def _attach_waiter_timeline(self, scope):
+        """Attaches the waits of the test to its result."""
+        waits = waiter_timeline.get_recorder().close_scope(scope)
+        self.addDetail('manila-waiter-timeline', content.json_content(waits))
+
     def mount_share(self, location, remote_client, target_dir=None):
         raise NotImplementedError
 
@@ -566,10 +604,8 @@ class ShareScenarioTest(manager.NetworkScenarioTest):
         client = client or self.shares_admin_v2_client
         servers = client.list_share_servers(
             search_opts={"share_network": sn_id})['share_servers']
-        for server in servers:
-            client.delete_share_server(server['id'])
-        for server in servers:
-            client.wait_for_resource_deletion(server_id=server['id'])
+        client.delete_resources(
+            [{'server_id': server['id']} for server in servers])
 
     def _create_share_network(self, client=None, **kwargs):
         """Create a share network
@@ -611,6 +647,33 @@ class ShareScenarioTest(manager.NetworkScenarioTest):
             self.addCleanup(client.delete_access_rule, share_id, access['id'])
         return access
 
+    def _allow_access_rules(self, share_id, rules, client=None,
+                            cleanup=True):
+        """Allow share access to several clients at once
+
+        :param share_id: id of the share
+        :param rules: list of dicts with the access_type, access_level and
+            access_to arguments of _allow_access for each rule
+        :param client: client object
+        :returns: access objects, in the order of rules
+        """
+        client = client or self.shares_v2_client
+        accesses = []
+        for rule in rules:
+            access = client.create_access_rule(
+                share_id, rule.get('access_type', 'ip'),
+                rule.get('access_to', '0.0.0.0'),
+                rule.get('access_level', 'rw'))['access']
+            accesses.append(access)
+            if cleanup:
+                self.addCleanup(client.delete_access_rule, share_id,
+                                access['id'])
+
+        share_waiters.wait_for_access_rules_status(
+            client, share_id, [access['id'] for access in accesses],
+            'active')
+        return accesses
+
     def _allow_access_snapshot(self, snapshot_id, access_type="ip",
                                access_to="0.0.0.0/0", cleanup=True,
                                client=None):
@@ -637,6 +700,32 @@ class ShareScenarioTest(manager.NetworkScenarioTest):
 
         return access
 
+    def _allow_access_snapshot_rules(self, snapshot_id, rules, cleanup=True,
+                                     client=None):
+        """Allow snapshot access to several clients at once
+
+        :param snapshot_id: id of the snapshot
+        :param rules: list of dicts with the access_type and access_to
+            arguments of _allow_access_snapshot for each rule
+        :param client: shares client, normal/admin
+        :returns: access objects, in the order of rules
+        """
+        client = client or self.shares_v2_client
+        accesses = []
+        for rule in rules:
+            access = client.create_snapshot_access_rule(
+                snapshot_id, rule.get('access_type', 'ip'),
+                rule.get('access_to', '0.0.0.0/0'))['snapshot_access']
+            accesses.append(access)
+            if cleanup:
+                self.addCleanup(client.delete_snapshot_access_rule,
+                                snapshot_id, access['id'])
+
+        share_waiters.wait_for_access_rules_status(
+            client, snapshot_id, [access['id'] for access in accesses],
+            'active', resource_name='snapshot_access')
+        return accesses
+
     def _create_router_interface(self, subnet_id, client=None, router_id=None):
         """Create a router interface
 
@@ -0,0 +1,42 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import fixture as config_fixture
+from tempest.tests import base
+
+from manila_tempest_tests.common import time_budget
+
+
+class TestCase(base.TestCase):
+    """Base class of the unit tests, which need neither a cloud nor time.
+
+    The share options are reset after each test, and default to plain
+    polling at fixed intervals.
+    """
+
+    def setUp(self):
+        super(TestCase, self).setUp()
+        self.config_fixture = self.useFixture(config_fixture.Config())
+        self.flags(poll_strategy='fixed', waiter_backend='polling',
+                   stall_timeout=0, waiter_timeline_enabled=False,
+                   rate_limit=0, rate_limit_from_api=False)
+
+    def flags(self, **kwargs):
+        """Overrides share options for the duration of the test."""
+        self.config_fixture.config(group='share', **kwargs)
+
+    def use_clock(self, clock):
+        """Makes clock the clock of the waiters until the end of the test."""
+        using_clock = time_budget.using_clock(clock)
+        using_clock.__enter__()
+        self.addCleanup(using_clock.__exit__, None, None, None)
+        return clock
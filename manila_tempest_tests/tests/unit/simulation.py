@@ -0,0 +1,209 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Virtual time simulation of the waiters.
+
+Polling strategies, stall detection and batching can be compared without a
+cloud and without sleeping: a FakeSharesClient plays scripted status
+transitions of resources against a VirtualClock, which only advances when
+the waiters sleep. For instance::
+
+    clock = simulation.VirtualClock()
+    client = simulation.FakeSharesClient(clock)
+    client.add_resource('share', 'share-1',
+                        [(0, 'creating'), (42, 'available')])
+    result = simulation.run(clock, waiters.wait_for_resource_status,
+                            client, 'share-1', 'available')
+
+returns the virtual seconds the wait took and the requests it made.
+"""
+
+import collections
+
+from tempest.lib import exceptions
+
+from manila_tempest_tests.common import resources
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.services.share.v2.json import shares_client
+
+# Status of the scripted resources once they are deleted.
+DELETED = 'deleted'
+
+
+class VirtualClock(time_budget.Clock):
+    """Clock whose time only advances when sleeping."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def sleep_async(self, seconds):
+        self.sleep(seconds)
+
+
+class ScriptedResource(object):
+    """Resource going through scripted states.
+
+    :param resource_type: resources.ResourceType of the resource.
+    :param resource_id: ID of the resource.
+    :param timeline: list of (seconds, state) tuples, sorted by seconds,
+        where state is either the status of the resource from that time on,
+        or a dict of its attributes. 'updated_at' is the time of the latest
+        state unless a state sets it, 'created_at' the time of the first
+        one.
+    :param parent_id: ID of the share or snapshot of an access rule.
+    """
+
+    def __init__(self, resource_type, resource_id, timeline, parent_id=None):
+        self.resource_type = resource_type
+        self.resource_id = resource_id
+        self.timeline = timeline
+        self.parent_id = parent_id
+
+    def get(self, now):
+        """Returns the resource at time now, None if it does not exist."""
+        resource = None
+        for at, state in self.timeline:
+            if at > now:
+                break
+            if not isinstance(state, dict):
+                state = {self.resource_type.status_attr: state}
+            resource = dict(resource or {}, updated_at='%.3f' % at)
+            resource.update(state)
+        if resource is None or (
+                resource.get(self.resource_type.status_attr) == DELETED):
+            return None
+        resource['id'] = self.resource_id
+        resource.setdefault('created_at', '%012.3f' % self.timeline[0][0])
+        return resource
+
+
+class FakeSharesClient(object):
+    """Client serving scripted resources in virtual time.
+
+    It answers the get, list and iter calls of the types of the resources
+    registry, and is_resource_deleted, and counts the requests it serves.
+    Iterating over resources counts as a single request.
+
+    :param clock: VirtualClock of the simulation.
+    """
+
+    def __init__(self, clock, build_interval=1, build_timeout=300):
+        self.clock = clock
+        self.build_interval = build_interval
+        self.build_timeout = build_timeout
+        self.requests = collections.Counter()
+        self._resources = collections.OrderedDict()
+
+    def add_resource(self, resource_name, resource_id, timeline,
+                     parent_id=None):
+        """Adds a scripted resource, see ScriptedResource."""
+        self._resources[resource_id] = ScriptedResource(
+            resources.get_resource_type(resource_name), resource_id,
+            timeline, parent_id=parent_id)
+
+    def _current(self, resource_type, parent_id=None):
+        for scripted in self._resources.values():
+            if scripted.resource_type is not resource_type:
+                continue
+            if parent_id is not None and scripted.parent_id != parent_id:
+                continue
+            resource = scripted.get(self.clock.now)
+            if resource is not None:
+                yield resource
+
+    def _getter(self, name, resource_type):
+        def get(resource_id, **kwargs):
+            self.requests[name] += 1
+            if resource_type.lists_rules:
+                return {resource_type.response_key: list(
+                    self._current(resource_type, parent_id=resource_id))}
+            scripted = self._resources.get(resource_id)
+            resource = scripted and scripted.get(self.clock.now)
+            if resource is None:
+                raise exceptions.NotFound(resource_id)
+            return {resource_type.response_key: resource}
+        return get
+
+    def _lister(self, name, resource_type):
+        def list_resources(**kwargs):
+            self.requests[name] += 1
+            return {resource_type.list_key: list(
+                self._current(resource_type))}
+        return list_resources
+
+    def _iterator(self, name, resource_type):
+        def iter_resources(**kwargs):
+            self.requests[name] += 1
+            return iter(sorted(self._current(resource_type),
+                               key=lambda resource: resource['created_at'],
+                               reverse=True))
+        return iter_resources
+
+    def __getattr__(self, name):
+        for resource_type in resources.RESOURCE_TYPES.values():
+            if name == resource_type.get:
+                return self._getter(name, resource_type)
+            if name == resource_type.list:
+                return self._lister(name, resource_type)
+            if name == resource_type.iter:
+                return self._iterator(name, resource_type)
+        raise AttributeError(name)
+
+    def is_resource_deleted(self, *args, **kwargs):
+        resource_type = resources.get_resource_type_by_deletion_kwargs(
+            kwargs)
+        self.requests['is_resource_deleted'] += 1
+        scripted = self._resources.get(kwargs[resource_type.deletion_key])
+        return scripted is None or scripted.get(self.clock.now) is None
+
+    # NOTE: the deletion waiters of the real client, so that they are
+    # simulated as is.
+    wait_for_resource_deletion = (
+        shares_client.SharesV2Client.wait_for_resource_deletion)
+    wait_for_resources_deletion = (
+        shares_client.SharesV2Client.wait_for_resources_deletion)
+
+
+def run(clock, waiter, *args, **kwargs):
+    """Runs waiter with clock as the clock of the waiters.
+
+    :returns: dict with the virtual 'seconds' the waiter took, its 'polls'
+        (sleeps) and, if it is a method of a FakeSharesClient or its first
+        argument is one, the 'requests' it made by client method. An 'error'
+        holds the exception raised by the waiter, if any.
+    """
+    start = clock.now
+    sleeps = len(clock.sleeps)
+    client = getattr(waiter, '__self__', None)
+    if not isinstance(client, FakeSharesClient):
+        client = args[0] if args else None
+    requests_before = collections.Counter(
+        getattr(client, 'requests', None) or {})
+    result = {}
+    with time_budget.using_clock(clock):
+        try:
+            waiter(*args, **kwargs)
+        except Exception as e:
+            result['error'] = e
+    result['seconds'] = clock.now - start
+    result['polls'] = len(clock.sleeps) - sleeps
+    if isinstance(client, FakeSharesClient):
+        result['requests'] = dict(client.requests - requests_before)
+    return result
@@ -0,0 +1,72 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from http import server
+import threading
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import connection_pool
+from manila_tempest_tests.tests.unit import base
+
+
+class _Handler(server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.connection_headers.append(self.headers.get('connection'))
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledHttpTest(base.TestCase):
+
+    def setUp(self):
+        super(PooledHttpTest, self).setUp()
+        self.server = server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.connection_headers = []
+        thread = threading.Thread(target=self.server.serve_forever,
+                                  daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'http://127.0.0.1:%s/v2/shares' % self.server.server_port
+
+    @decorators.idempotent_id('c0c6a876-b833-44a0-83b0-b14f41401f40')
+    def test_connections_kept_alive(self):
+        transport = connection_pool.PooledHttp()
+        before = connection_pool.get_connection_stats()
+        for _ in range(3):
+            resp, body = transport.request(self.url, 'GET')
+            self.assertEqual(200, resp.status)
+            self.assertEqual('200', resp['status'])
+            self.assertEqual(self.url, resp['content-location'])
+            self.assertEqual(b'{}', body)
+        after = connection_pool.get_connection_stats()
+        self.assertEqual(3, after['requests'] - before['requests'])
+        self.assertEqual(
+            1, after['new_connections'] - before['new_connections'])
+        self.assertEqual([None] * 3, self.server.connection_headers)
+
+    @decorators.idempotent_id('63e84355-cd06-41bf-a960-e4ec301594c9')
+    def test_get_transport_shared(self):
+        self.assertIs(connection_pool.get_transport(timeout=10),
+                      connection_pool.get_transport(timeout=10))
+        self.assertIsNot(connection_pool.get_transport(timeout=10),
+                         connection_pool.get_transport(timeout=20))
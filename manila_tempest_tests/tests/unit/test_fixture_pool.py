@@ -0,0 +1,90 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import fixture_pool
+from manila_tempest_tests import share_exceptions
+from manila_tempest_tests.tests.unit import base
+
+
+class FixturePoolTest(base.TestCase):
+
+    def setUp(self):
+        super(FixturePoolTest, self).setUp()
+        self.pool = fixture_pool.FixturePool()
+        self.client = mock.Mock()
+        self.created = 0
+
+    def create(self):
+        self.created += 1
+        return {'id': 'share-type-%s' % self.created, 'extra_specs': {}}
+
+    def acquire(self, holder, params=None):
+        return self.pool.acquire('share_type', params or {'public': True},
+                                 holder, self.client, self.create)
+
+    @decorators.idempotent_id('486a5c57-cc62-4c6b-a689-9167e2f83889')
+    def test_fingerprint(self):
+        self.assertEqual(
+            fixture_pool.fingerprint('share_type', {'a': 1, 'b': 2}),
+            fixture_pool.fingerprint('share_type', {'b': 2, 'a': 1}))
+        self.assertNotEqual(
+            fixture_pool.fingerprint('share_type', {'a': 1}),
+            fixture_pool.fingerprint('share_network', {'a': 1}))
+
+    @decorators.idempotent_id('d1d61839-b703-462b-90bf-f55fdf7f0cd6')
+    def test_acquire_reuses_fixtures_of_other_holders(self):
+        self.assertEqual('share-type-1', self.acquire('class-1')['id'])
+        self.assertEqual('share-type-1', self.acquire('class-2')['id'])
+        self.assertEqual('share-type-2', self.acquire('class-1')['id'])
+        self.assertEqual('share-type-3',
+                         self.acquire('class-2', {'public': False})['id'])
+        self.assertEqual((3, 1), (self.pool.created, self.pool.reused))
+
+    @decorators.idempotent_id('132a0c40-cfc7-400e-9620-8ef64f23dc66')
+    def test_acquire_returns_copies(self):
+        self.acquire('class-1')['extra_specs']['changed'] = True
+        self.assertEqual({}, self.acquire('class-2')['extra_specs'])
+
+    @decorators.idempotent_id('b46ff7e0-92a2-4fc2-8d2d-594c50cd907c')
+    def test_release(self):
+        self.acquire('class-1')
+        self.pool.release('class-1')
+        self.assertEqual('share-type-1', self.acquire('class-1')['id'])
+        self.assertEqual(1, self.pool.created)
+
+    @decorators.idempotent_id('11a5170f-d333-4d63-93f0-d0a80e311d45')
+    def test_clear(self):
+        self.acquire('class-1')
+        self.acquire('class-1')
+        self.assertEqual([], self.pool.clear())
+        self.client.delete_resources.assert_called_once_with(
+            [{'st_id': 'share-type-1'}, {'st_id': 'share-type-2'}],
+            ignore_not_found=True, max_workers=1)
+        self.assertEqual('share-type-3', self.acquire('class-1')['id'])
+
+    @decorators.idempotent_id('7d4ad36e-6e1e-4d0e-ad57-27e049c925e7')
+    def test_clear_keeps_the_fixtures_left_behind(self):
+        self.acquire('class-1')
+        self.acquire('class-1')
+        self.client.delete_resources.side_effect = (
+            share_exceptions.ResourcesWaitFailed(
+                resource_name='share_type', status='deleted',
+                failures={'share-type-2': Exception('still in use')}))
+        left = self.pool.clear()
+        self.assertEqual(['share-type-2'],
+                         [fixture['resource']['id'] for fixture in left])
+        # It stays in the pool.
+        self.assertEqual('share-type-2', self.acquire('class-2')['id'])
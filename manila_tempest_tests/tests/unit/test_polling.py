@@ -0,0 +1,75 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import polling
+from manila_tempest_tests.tests.unit import base
+
+
+class FakeClient(object):
+    build_interval = 3
+
+
+def take(intervals, count):
+    return list(itertools.islice(intervals, count))
+
+
+class PollingTest(base.TestCase):
+
+    @decorators.idempotent_id('9a0f6d2e-5c8b-4f71-a3e4-2b7d1c6e8f90')
+    def test_fixed_intervals(self):
+        self.assertEqual([3, 3, 3], take(polling.fixed_intervals(3), 3))
+
+    @decorators.idempotent_id('4e1b7c3a-8d2f-4a65-9b0c-7f3e2d1a5c84')
+    def test_backoff_intervals(self):
+        intervals = polling.backoff_intervals(
+            1, first_interval=0.5, max_interval=10, factor=2, jitter=0)
+        self.assertEqual([0.5, 1, 2, 4, 8, 10, 10], take(intervals, 7))
+
+    @decorators.idempotent_id('c7d2a9e1-3f4b-4c86-8e5a-1d9b0f2c6a73')
+    def test_backoff_intervals_first_interval_capped(self):
+        intervals = polling.backoff_intervals(
+            1, first_interval=5, max_interval=2, factor=2, jitter=0)
+        self.assertEqual([2, 1, 2, 2], take(intervals, 4))
+
+    @decorators.idempotent_id('2f8e6b4d-1a7c-4d93-b5e2-9c0a3f7d1b65')
+    def test_backoff_intervals_jitter(self):
+        intervals = take(polling.backoff_intervals(
+            4, first_interval=1, max_interval=100, factor=1, jitter=0.25),
+            50)
+        self.assertEqual(1, intervals[0])
+        for interval in intervals[1:]:
+            self.assertGreaterEqual(interval, 3)
+            self.assertLessEqual(interval, 5)
+        self.assertGreater(len(set(intervals[1:])), 1)
+
+    @decorators.idempotent_id('8b3c5e7f-6d1a-4e29-a0f4-5e2b8c9d3a17')
+    def test_get_poll_intervals_fixed(self):
+        self.assertEqual([3, 3], take(
+            polling.get_poll_intervals(FakeClient()), 2))
+
+    @decorators.idempotent_id('5d9a1f3b-2e6c-4b07-8c1d-3a4f6e0b9c52')
+    def test_get_poll_intervals_backoff(self):
+        self.flags(poll_strategy='backoff', poll_first_interval=0.5,
+                   poll_max_interval=10, poll_backoff_factor=3,
+                   poll_jitter=0)
+        self.assertEqual([0.5, 3, 9, 10], take(
+            polling.get_poll_intervals(FakeClient()), 4))
+
+    @decorators.idempotent_id('e6f0b2c4-9a3d-4f18-b7e5-0c2d4a6f8b31')
+    def test_get_poll_intervals_events(self):
+        self.flags(waiter_backend='events', event_fallback_interval=60)
+        self.assertEqual([60, 60], take(
+            polling.get_poll_intervals(FakeClient()), 2))
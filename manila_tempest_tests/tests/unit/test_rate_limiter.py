@@ -0,0 +1,109 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import rate_limiter
+from manila_tempest_tests.common import run_files
+from manila_tempest_tests.tests.unit import base
+
+
+class RateLimiterTest(base.TestCase):
+
+    def setUp(self):
+        super(RateLimiterTest, self).setUp()
+        state_dir = self.useFixture(fixtures.TempDir()).path
+        self.patchobject(run_files, 'get_path',
+                         side_effect=lambda name: os.path.join(
+                             state_dir, name + '.json'))
+        self.time = self.patch(
+            'manila_tempest_tests.common.rate_limiter.time')
+        self.time.time.return_value = 100.0
+
+    @decorators.idempotent_id('0ec6da93-dd20-42cd-9d35-4db70a58ff08')
+    def test_buckets_from_rate_limits(self):
+        buckets = rate_limiter.buckets_from_rate_limits([
+            {'limit': [
+                {'verb': 'POST', 'value': 60, 'unit': 'MINUTE'},
+                {'verb': 'POST', 'value': 2, 'unit': 'SECOND'},
+                {'verb': '*', 'value': 3600, 'unit': 'HOUR'},
+                {'verb': 'GET', 'value': 0, 'unit': 'SECOND'},
+                {'verb': 'PUT', 'value': 5, 'unit': 'FORTNIGHT'},
+            ]},
+        ])
+        self.assertEqual({'POST', rate_limiter.ALL_METHODS}, set(buckets))
+        self.assertEqual((1, 60), (buckets['POST'].rate,
+                                   buckets['POST'].burst))
+        self.assertEqual(1, buckets[rate_limiter.ALL_METHODS].rate)
+
+    @decorators.idempotent_id('c2b5e889-c7d3-4934-8f6b-77920f33e3f4')
+    def test_token_bucket(self):
+        bucket = rate_limiter.TokenBucket('test', rate=2, burst=2)
+        self.assertEqual([0, 0, 0.5, 1.0],
+                         [bucket.reserve() for _ in range(4)])
+        # The tokens taken in advance are paid back first.
+        self.time.time.return_value = 101.0
+        self.assertEqual(0.5, bucket.reserve())
+        self.time.time.return_value = 200.0
+        self.assertEqual(0, bucket.reserve())
+
+    @decorators.idempotent_id('68c8ffb3-4ee7-417d-894c-5ac4e70f3fd8')
+    def test_token_bucket_shared_through_its_file(self):
+        rate_limiter.TokenBucket('test', rate=1, burst=1).reserve()
+        self.assertEqual(
+            1, rate_limiter.TokenBucket('test', rate=1, burst=1).reserve())
+
+    @decorators.idempotent_id('4fe31ec8-e0c7-415d-89e7-4246985d63ee')
+    def test_acquire_throttles(self):
+        self.flags(rate_limit=1, rate_limit_burst=1)
+        limiter = rate_limiter.RateLimiter()
+        limiter.acquire('GET', get_rate_limits=None)
+        self.time.sleep.assert_not_called()
+        limiter.acquire('POST', get_rate_limits=None)
+        self.time.sleep.assert_called_once_with(1.0)
+        self.assertEqual(
+            {'requests': 2, 'throttled': 1, 'throttle_seconds': 1.0},
+            limiter.stats())
+
+    @decorators.idempotent_id('6e1c8b5d-ac73-475b-8d70-609ae6a656c2')
+    def test_acquire_unlimited(self):
+        limiter = rate_limiter.RateLimiter()
+        for _ in range(5):
+            limiter.acquire('GET', get_rate_limits=None)
+        self.time.sleep.assert_not_called()
+        self.assertEqual(0, limiter.stats()['throttled'])
+
+    @decorators.idempotent_id('ddd01e4d-041c-4140-8596-bec97cf9a7b4')
+    def test_acquire_rate_limits_from_api(self):
+        self.flags(rate_limit_from_api=True)
+        limiter = rate_limiter.RateLimiter()
+        rate_limits = [{'limit': [
+            {'verb': 'POST', 'value': 1, 'unit': 'SECOND'}]}]
+        for method in ('POST', 'GET', 'POST'):
+            limiter.acquire(method, lambda: rate_limits)
+        self.time.sleep.assert_called_once_with(1.0)
+
+    @decorators.idempotent_id('b00d7a35-62d4-461f-8858-7219eec00a4d')
+    def test_acquire_rate_limits_from_api_fallback(self):
+        self.flags(rate_limit_from_api=True, rate_limit=1,
+                   rate_limit_burst=1)
+
+        def get_rate_limits():
+            raise Exception('limits unavailable')
+
+        limiter = rate_limiter.RateLimiter()
+        limiter.acquire('GET', get_rate_limits)
+        limiter.acquire('GET', get_rate_limits)
+        self.time.sleep.assert_called_once_with(1.0)
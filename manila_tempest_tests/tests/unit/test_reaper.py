@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from tempest.lib import decorators
+from tempest.lib import exceptions
+
+from manila_tempest_tests.common import reaper
+from manila_tempest_tests.tests.unit import base
+
+
+class DeletionReaperTest(base.TestCase):
+
+    def setUp(self):
+        super(DeletionReaperTest, self).setUp()
+        self.reaper = reaper.DeletionReaper()
+
+    @decorators.idempotent_id('a9476d66-b323-4487-b6bf-d4f8f937f7d2')
+    def test_barrier_waits_for_the_deletions(self):
+        client = mock.Mock()
+        self.reaper.submit(client, share_id='share-1')
+        self.reaper.submit(client, snapshot_id='snapshot-1')
+        self.assertEqual([], self.reaper.barrier())
+        client.wait_for_resource_deletion.assert_has_calls([
+            mock.call(share_id='share-1'),
+            mock.call(snapshot_id='snapshot-1')])
+
+    @decorators.idempotent_id('4712cef8-7171-4d03-9c0a-344976f13048')
+    def test_barrier_returns_the_failures_once(self):
+        error = exceptions.TimeoutException('share-1 not deleted')
+        client = mock.Mock()
+        client.wait_for_resource_deletion.side_effect = [error, None]
+        self.reaper.submit(client, share_id='share-1')
+        self.reaper.submit(client, share_id='share-2')
+        self.assertEqual([error], self.reaper.barrier())
+        self.assertEqual([], self.reaper.barrier())
+
+    @decorators.idempotent_id('8e024d10-c719-4874-be0e-30f5c7cb4afa')
+    def test_barrier_without_deletions(self):
+        self.assertEqual([], self.reaper.barrier())
@@ -0,0 +1,94 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import resources
+from manila_tempest_tests import share_exceptions
+from manila_tempest_tests.tests.unit import base
+
+
+class FakeClient(object):
+
+    def get_share(self, share_id, **kwargs):
+        return {'share': {'id': share_id, 'kwargs': kwargs}}
+
+    def get_subnet(self, subnet_id, share_network_id=None, **kwargs):
+        return {'share_network_subnet': {
+            'id': subnet_id, 'share_network_id': share_network_id}}
+
+    def list_access_rules(self, share_id, **kwargs):
+        return {'access_list': [{'id': 'rule-1'}, {'id': 'rule-2'}]}
+
+
+class ResourcesTest(base.TestCase):
+
+    @decorators.idempotent_id('31bd534b-ada6-460b-a95f-68384ac7f03b')
+    def test_get_resource_type(self):
+        resource_type = resources.get_resource_type('share')
+        self.assertEqual('share', resource_type.name)
+        self.assertEqual('share', resource_type.response_key)
+        self.assertEqual('status', resource_type.status_attr)
+        self.assertEqual('state',
+                         resources.get_resource_type('access_rule')
+                         .status_attr)
+
+    @decorators.idempotent_id('46df1305-261b-4780-9b60-9751faad4fa6')
+    def test_get_resource_type_unknown(self):
+        self.assertRaises(share_exceptions.InvalidResource,
+                          resources.get_resource_type, 'unknown')
+
+    @decorators.idempotent_id('51d39d42-c156-4d24-a863-05598365ad02')
+    def test_get_resource_type_by_deletion_kwargs(self):
+        self.assertEqual(
+            'snapshot', resources.get_resource_type_by_deletion_kwargs(
+                {'snapshot_id': 'snapshot-1'}).name)
+        # A subnet is identified by its ID and its share network's.
+        self.assertEqual(
+            'share_network_subnet',
+            resources.get_resource_type_by_deletion_kwargs(
+                {'sn_id': 'network-1',
+                 'share_network_subnet_id': 'subnet-1'}).name)
+        self.assertRaises(share_exceptions.InvalidResource,
+                          resources.get_resource_type_by_deletion_kwargs,
+                          {'unknown_id': 'unknown-1'})
+
+    @decorators.idempotent_id('9d0884d2-c8b4-4bcd-91dc-42ee3c394bfe')
+    def test_get_deletion_id(self):
+        self.assertEqual('subnet-1', resources.get_deletion_id(
+            {'sn_id': 'network-1', 'share_network_subnet_id': 'subnet-1'}))
+
+    @decorators.idempotent_id('5fee024e-9768-4b62-ac35-791ee1588925')
+    def test_fetch(self):
+        client = FakeClient()
+        self.assertEqual(
+            {'id': 'share-1', 'kwargs': {'version': '2.1'}},
+            resources.get_resource_type('share').fetch(
+                client, 'share-1', version='2.1'))
+        self.assertEqual(
+            {'id': 'subnet-1', 'share_network_id': 'network-1'},
+            resources.get_resource_type('share_network_subnet').fetch(
+                client, 'subnet-1', parent_id='network-1'))
+
+    @decorators.idempotent_id('3861812d-c4cf-4c88-a114-fcda00ec9e03')
+    def test_fetch_access_rule(self):
+        access_rule = resources.get_resource_type('access_rule')
+        self.assertEqual({'id': 'rule-2'}, access_rule.fetch(
+            FakeClient(), 'rule-2', parent_id='share-1'))
+        self.assertIsNone(access_rule.fetch(
+            FakeClient(), 'rule-3', parent_id='share-1'))
+
+    @decorators.idempotent_id('86f01364-3fb6-46d0-baa8-c902f9ce1353')
+    def test_dependents(self):
+        self.assertIn('snapshot',
+                      resources.get_resource_type('share').dependents)
+        self.assertIsNone(resources.get_resource_type('message').dependents)
@@ -0,0 +1,52 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import response_cache
+from manila_tempest_tests.tests.unit import base
+
+
+class ResponseCacheTest(base.TestCase):
+
+    def setUp(self):
+        super(ResponseCacheTest, self).setUp()
+        self.time = self.patch(
+            'manila_tempest_tests.common.response_cache.time')
+        self.time.monotonic.return_value = 100.0
+        self.cache = response_cache.ResponseCache()
+
+    @decorators.idempotent_id('693a6382-cc8f-4e00-80e4-62205ac24736')
+    def test_get_within_ttl(self):
+        self.cache.set('key', 'response')
+        self.time.monotonic.return_value = 109.0
+        self.assertEqual('response', self.cache.get('key', ttl=10))
+        self.assertIsNone(self.cache.get('other', ttl=10))
+        self.assertEqual({'hits': 1, 'misses': 1, 'invalidations': 0},
+                         self.cache.stats())
+
+    @decorators.idempotent_id('a8bf37d8-5e44-4ba7-b7f0-5d564b2d1ca6')
+    def test_get_expired(self):
+        self.cache.set('key', 'response')
+        self.time.monotonic.return_value = 110.0
+        self.assertIsNone(self.cache.get('key', ttl=10))
+        # Expired entries are dropped.
+        self.time.monotonic.return_value = 100.0
+        self.assertIsNone(self.cache.get('key', ttl=10))
+
+    @decorators.idempotent_id('f09fcaf9-44e4-46ba-98db-8d0030e3f238')
+    def test_invalidate(self):
+        self.cache.invalidate()
+        self.cache.set('key', 'response')
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get('key', ttl=10))
+        self.assertEqual(1, self.cache.stats()['invalidations'])
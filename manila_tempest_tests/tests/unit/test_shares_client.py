@@ -0,0 +1,94 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from tempest.lib import decorators
+from tempest.lib import exceptions
+
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.services.share.v2.json import shares_client
+from manila_tempest_tests.tests.unit import base
+from manila_tempest_tests.tests.unit import simulation
+
+
+class FakeResponse(dict):
+
+    def __init__(self, status, headers=None):
+        super(FakeResponse, self).__init__(headers or {})
+        self.status = status
+
+
+def unavailable():
+    return exceptions.UnexpectedResponseCode(resp=FakeResponse(503))
+
+
+class SendRetriesTest(base.TestCase):
+
+    def setUp(self):
+        super(SendRetriesTest, self).setUp()
+        self.flags(retry_attempts=3, retry_interval=1, retry_max_interval=30,
+                   poll_jitter=0)
+        self.client = shares_client.SharesV2Client(
+            mock.Mock(), service='share', region='RegionOne')
+        self.clock = simulation.VirtualClock()
+        self.use_clock(self.clock)
+        self.send = mock.Mock()
+
+    def send_request(self, method='GET'):
+        return self.client._send(method, 'shares/share-1', '2.1', self.send)
+
+    @decorators.idempotent_id('15eeed5b-8429-4e23-b51b-8e9437053965')
+    def test_backoff(self):
+        ok = (FakeResponse(200), '{}')
+        self.send.side_effect = [unavailable(), unavailable(), ok]
+        self.assertEqual(ok, self.send_request())
+        self.assertEqual([1, 2], self.clock.sleeps)
+
+    @decorators.idempotent_id('54079a9f-010e-484c-bf6d-92ef6256bcbb')
+    def test_attempts_exhausted(self):
+        self.send.side_effect = unavailable()
+        self.assertRaises(exceptions.UnexpectedResponseCode,
+                          self.send_request)
+        self.assertEqual([1, 2, 4], self.clock.sleeps)
+
+    @decorators.idempotent_id('c8d70bb2-e63d-4fc9-8297-964d9eb1fd4e')
+    def test_retry_after(self):
+        error = exceptions.UnexpectedResponseCode(
+            resp=FakeResponse(503, {'retry-after': '7'}))
+        self.send.side_effect = [error, (FakeResponse(200), '{}')]
+        self.send_request()
+        self.assertEqual([7], self.clock.sleeps)
+
+    @decorators.idempotent_id('a3878d7e-0af4-42aa-992f-d959bf8d32b9')
+    def test_within_time_budget(self):
+        self.send.side_effect = unavailable()
+        with time_budget.TimeBudget(2.5, clock=self.clock):
+            self.assertRaises(exceptions.UnexpectedResponseCode,
+                              self.send_request)
+        self.assertEqual([1, 1.5], self.clock.sleeps)
+
+    @decorators.idempotent_id('ad2ea2c7-2c55-4801-b6c9-134466e8edf5')
+    def test_not_found_on_retried_delete(self):
+        not_found = exceptions.NotFound(resp=FakeResponse(404))
+        self.send.side_effect = [unavailable(), not_found]
+        resp, body = self.send_request(method='DELETE')
+        self.assertEqual(404, resp.status)
+        # The callers' status check lets it through.
+        self.client.expected_success(202, resp.status)
+
+    @decorators.idempotent_id('86f2028a-f24d-4e13-92f8-6a12dd9396a3')
+    def test_not_found_on_first_delete(self):
+        self.send.side_effect = exceptions.NotFound(resp=FakeResponse(404))
+        self.assertRaises(exceptions.NotFound, self.send_request,
+                          method='DELETE')
+        self.assertEqual([], self.clock.sleeps)
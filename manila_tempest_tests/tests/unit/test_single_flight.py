@@ -0,0 +1,83 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from concurrent import futures
+import threading
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import single_flight
+from manila_tempest_tests.tests.unit import base
+
+
+class SingleFlightTest(base.TestCase):
+
+    def setUp(self):
+        super(SingleFlightTest, self).setUp()
+        self.group = single_flight.SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow_call(self, result=None, error=None):
+        def call():
+            self.calls += 1
+            self.started.set()
+            self.release.wait(10)
+            if error is not None:
+                raise error
+            return result
+        return call
+
+    def run_concurrently(self, key, func, count):
+        with futures.ThreadPoolExecutor(count) as executor:
+            first = executor.submit(self.group.do, key, func)
+            self.started.wait(10)
+            others = [executor.submit(self.group.do, key, func)
+                      for _ in range(count - 1)]
+            # Wait until the other calls joined the one in flight.
+            while self.group.stats()['coalesced'] < count - 1:
+                threading.Event().wait(0.01)
+            self.release.set()
+            return [first] + others
+
+    @decorators.idempotent_id('7808b569-0658-4b86-a9ab-d98a15243ef1')
+    def test_concurrent_calls_coalesced(self):
+        results = self.run_concurrently(
+            'key', self.slow_call(result='result'), 4)
+        self.assertEqual(['result'] * 4, [r.result() for r in results])
+        self.assertEqual(1, self.calls)
+        self.assertEqual({'coalesced': 3}, self.group.stats())
+
+    @decorators.idempotent_id('7eaa460f-a4f5-48f2-8433-a45db6e47de0')
+    def test_concurrent_calls_share_the_error(self):
+        error = ValueError('failed')
+        results = self.run_concurrently(
+            'key', self.slow_call(error=error), 3)
+        for result in results:
+            self.assertIs(error, result.exception())
+        self.assertEqual(1, self.calls)
+
+    @decorators.idempotent_id('f49831e9-c56a-49ec-82f0-ccb07838690b')
+    def test_sequential_calls_not_coalesced(self):
+        self.release.set()
+        call = self.slow_call(result='result')
+        self.assertEqual('result', self.group.do('key', call))
+        self.assertEqual('result', self.group.do('key', call))
+        self.assertEqual(2, self.calls)
+        self.assertEqual({'coalesced': 0}, self.group.stats())
+
+    @decorators.idempotent_id('b6960e2c-0988-463d-8a29-5f2795b8923a')
+    def test_different_keys_not_coalesced(self):
+        self.release.set()
+        self.assertEqual(1, self.group.do('key-1', lambda: 1))
+        self.assertEqual(2, self.group.do('key-2', lambda: 2))
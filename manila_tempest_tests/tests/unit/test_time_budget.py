@@ -0,0 +1,120 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from tempest.lib import decorators
+
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.tests.unit import base
+from manila_tempest_tests.tests.unit import simulation
+
+
+class TimeBudgetTest(base.TestCase):
+
+    def setUp(self):
+        super(TimeBudgetTest, self).setUp()
+        self.clock = simulation.VirtualClock()
+
+    @decorators.idempotent_id('093ead65-ddbc-4480-a5ad-f2b667f266d4')
+    def test_remaining(self):
+        budget = time_budget.TimeBudget(10, clock=self.clock)
+        self.clock.sleep(4)
+        self.assertEqual(6, budget.remaining())
+        self.assertFalse(budget.expired())
+        self.clock.sleep(7)
+        self.assertEqual(0, budget.remaining())
+        self.assertTrue(budget.expired())
+
+    @decorators.idempotent_id('278e80ac-b2b2-449d-971d-32e6afab0f55')
+    def test_current_budget(self):
+        self.assertIsNone(time_budget.get_current())
+        with time_budget.TimeBudget(10, clock=self.clock) as outer:
+            self.assertIs(outer, time_budget.get_current())
+            with time_budget.TimeBudget(5, clock=self.clock) as inner:
+                self.assertIs(inner, time_budget.get_current())
+            self.assertIs(outer, time_budget.get_current())
+        self.assertIsNone(time_budget.get_current())
+
+    @decorators.idempotent_id('340a10c7-ddf5-4513-8af0-29d1ec36d03c')
+    def test_current_budget_is_per_thread(self):
+        current = []
+        with time_budget.TimeBudget(10, clock=self.clock):
+            thread = threading.Thread(
+                target=lambda: current.append(time_budget.get_current()))
+            thread.start()
+            thread.join()
+        self.assertEqual([None], current)
+
+    @decorators.idempotent_id('6d14a70e-a315-44ca-8643-abb5702e3c42')
+    def test_release_from_another_thread(self):
+        budget = time_budget.TimeBudget(10, clock=self.clock).use()
+        thread = threading.Thread(target=budget.release)
+        thread.start()
+        thread.join()
+        self.assertIsNone(time_budget.get_current())
+
+    @decorators.idempotent_id('d084d015-e211-49e9-a22c-2611f0c16089')
+    def test_using_clock(self):
+        self.assertIsNot(self.clock, time_budget.get_clock())
+        with time_budget.using_clock(self.clock):
+            self.assertIs(self.clock, time_budget.get_clock())
+            self.assertIs(self.clock, time_budget.Countdown(10).clock)
+        self.assertIsNot(self.clock, time_budget.get_clock())
+
+
+class CountdownTest(base.TestCase):
+
+    def setUp(self):
+        super(CountdownTest, self).setUp()
+        self.clock = simulation.VirtualClock()
+
+    @decorators.idempotent_id('c26564c0-4c01-4ef2-a2f2-1f153534cf5a')
+    def test_expired_by_timeout(self):
+        countdown = time_budget.Countdown(10, clock=self.clock)
+        countdown.sleep(9)
+        self.assertFalse(countdown.expired())
+        countdown.sleep(1)
+        self.assertTrue(countdown.expired())
+        self.assertEqual('', countdown.describe())
+
+    @decorators.idempotent_id('73dd7984-335e-4b9b-a283-50be3ab8a5d1')
+    def test_expired_by_budget(self):
+        budget = time_budget.TimeBudget(5, clock=self.clock)
+        countdown = time_budget.Countdown(10, budget=budget, clock=self.clock)
+        countdown.sleep(5)
+        self.assertTrue(countdown.expired())
+        self.assertEqual(' Time budget: 0.0 of 5 s left.',
+                         countdown.describe())
+
+    @decorators.idempotent_id('9df7ffef-b311-4e07-a411-7e8c17285ee4')
+    def test_defaults_to_current_budget(self):
+        with time_budget.TimeBudget(5, clock=self.clock) as budget:
+            countdown = time_budget.Countdown(10, clock=self.clock)
+        self.assertIs(budget, countdown.budget)
+
+    @decorators.idempotent_id('7f4cf884-6e3b-42b8-b5c7-2bfb0a9e9888')
+    def test_sleep_capped_by_timeout(self):
+        countdown = time_budget.Countdown(10, clock=self.clock)
+        countdown.sleep(6)
+        self.assertEqual(4, countdown.remaining())
+        countdown.sleep(6)
+        countdown.sleep(6)
+        self.assertEqual([6, 4, 0], self.clock.sleeps)
+
+    @decorators.idempotent_id('834b101f-c007-422e-b44f-75ce4f5dbb14')
+    def test_sleep_capped_by_budget(self):
+        budget = time_budget.TimeBudget(5, clock=self.clock)
+        countdown = time_budget.Countdown(10, budget=budget, clock=self.clock)
+        self.assertEqual(5, countdown.remaining())
+        countdown.sleep(6)
+        self.assertEqual([5], self.clock.sleeps)
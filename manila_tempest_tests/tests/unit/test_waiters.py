@@ -0,0 +1,242 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from tempest.lib import decorators
+from tempest.lib import exceptions
+
+from manila_tempest_tests.common import time_budget
+from manila_tempest_tests.common import waiters
+from manila_tempest_tests import share_exceptions
+from manila_tempest_tests.tests.unit import base
+from manila_tempest_tests.tests.unit import simulation
+
+
+class WaitersTestBase(base.TestCase):
+
+    def setUp(self):
+        super(WaitersTestBase, self).setUp()
+        self.clock = simulation.VirtualClock()
+        self.client = simulation.FakeSharesClient(
+            self.clock, build_interval=1, build_timeout=300)
+
+    def run_waiter(self, waiter, *args, **kwargs):
+        return simulation.run(self.clock, waiter, *args, **kwargs)
+
+
+class WaitForResourceStatusTest(WaitersTestBase):
+
+    @decorators.idempotent_id('60e2238c-c6b9-4b60-b846-6f299c3b37f3')
+    def test_fixed_intervals(self):
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'creating'), (42, 'available')])
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available')
+        self.assertNotIn('error', result)
+        self.assertEqual(42, result['seconds'])
+        self.assertEqual(42, result['polls'])
+        self.assertEqual({'get_share': 43}, result['requests'])
+
+    @decorators.idempotent_id('862db163-d6cd-4626-8d81-75d058a1d96b')
+    def test_backoff(self):
+        self.flags(poll_strategy='backoff', poll_first_interval=0.5,
+                   poll_max_interval=15, poll_backoff_factor=2,
+                   poll_jitter=0)
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'creating'), (42, 'available')])
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available')
+        self.assertNotIn('error', result)
+        self.assertEqual([0.5, 1, 2, 4, 8, 15, 15], self.clock.sleeps)
+        self.assertEqual(45.5, result['seconds'])
+        self.assertEqual({'get_share': 8}, result['requests'])
+
+    @decorators.idempotent_id('09ba7117-ad73-4d8f-8966-3c7f3b712d24')
+    def test_error_status(self):
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'creating'), (5, 'error')])
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available')
+        self.assertIsInstance(result['error'],
+                              share_exceptions.ShareBuildErrorException)
+        self.assertEqual(5, result['seconds'])
+
+    @decorators.idempotent_id('acfaa0b2-508f-4769-b9f5-26cac70fb632')
+    def test_timeout(self):
+        self.client.add_resource('share', 'share-1', [(0, 'creating')])
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available',
+                                 timeout=30)
+        self.assertIsInstance(result['error'], exceptions.TimeoutException)
+        self.assertEqual(30, result['seconds'])
+
+    @decorators.idempotent_id('2277a31b-d13c-439d-b878-928075d19742')
+    def test_budget_expiry(self):
+        self.client.add_resource('share', 'share-1', [(0, 'creating')])
+        budget = time_budget.TimeBudget(20, clock=self.clock)
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available',
+                                 budget=budget)
+        self.assertIsInstance(result['error'], exceptions.TimeoutException)
+        self.assertIn('Time budget: 0.0 of 20 s left.',
+                      str(result['error']))
+        self.assertEqual(20, result['seconds'])
+
+    @decorators.idempotent_id('0808b8dd-b479-4f18-943a-8df2f7bcc988')
+    def test_stall_detection(self):
+        self.flags(stall_timeout=60)
+        self.client.add_resource('share', 'share-1', [(0, 'creating')])
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available')
+        self.assertIsInstance(result['error'],
+                              share_exceptions.ResourceStalled)
+        self.assertEqual(60, result['seconds'])
+
+    @decorators.idempotent_id('2c1c1bff-1e6a-4e5e-a66b-34a34efdff3d')
+    def test_stall_detection_updated_resource(self):
+        self.flags(stall_timeout=60)
+        self.client.add_resource(
+            'share', 'share-1',
+            [(at, 'creating') for at in range(0, 200, 50)] +
+            [(200, 'available')])
+        result = self.run_waiter(waiters.wait_for_resource_status,
+                                 self.client, 'share-1', 'available')
+        self.assertNotIn('error', result)
+        self.assertEqual(200, result['seconds'])
+
+
+class WaitForResourcesStatusTest(WaitersTestBase):
+
+    @decorators.idempotent_id('612d9895-8f6a-4a74-81c5-29ce763b5028')
+    def test_one_list_request_per_poll(self):
+        for number in range(1, 6):
+            self.client.add_resource('share', 'share-%s' % number,
+                                     [(0, 'creating'),
+                                      (number * 10, 'available')])
+        result = self.run_waiter(
+            waiters.wait_for_resources_status, self.client,
+            ['share-%s' % number for number in range(1, 6)], 'available')
+        self.assertNotIn('error', result)
+        self.assertEqual(50, result['seconds'])
+        self.assertEqual({'iter_shares': 51}, result['requests'])
+
+    @decorators.idempotent_id('f5000aa0-192c-4589-993c-885a67164344')
+    def test_failures_reported_per_resource(self):
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'creating'), (10, 'available')])
+        self.client.add_resource('share', 'share-2',
+                                 [(0, 'creating'), (5, 'error')])
+        self.client.add_resource('share', 'share-3', [(0, 'creating')])
+        result = self.run_waiter(
+            waiters.wait_for_resources_status, self.client,
+            ['share-1', 'share-2', 'share-3'], 'available', timeout=30)
+        error = result['error']
+        self.assertIsInstance(error, share_exceptions.ResourcesWaitFailed)
+        self.assertEqual({'share-2', 'share-3'}, set(error.failures))
+        self.assertIsInstance(error.failures['share-2'],
+                              share_exceptions.ShareBuildErrorException)
+        self.assertIsInstance(error.failures['share-3'],
+                              exceptions.TimeoutException)
+        # The error of share-2 did not end the wait of the others.
+        self.assertEqual(30, result['seconds'])
+
+    @decorators.idempotent_id('213814a0-55d7-4ec3-94af-e335fca40661')
+    def test_retry(self):
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'creating'), (100, 'available')])
+        self.client.add_resource('share', 'share-2',
+                                 [(0, 'creating'), (5, 'error')])
+        retried = []
+
+        def retry(resource_id, error):
+            retried.append((self.clock.now, resource_id))
+            self.client.add_resource(
+                'share', 'share-2-retry',
+                [(self.clock.now, 'creating'),
+                 (self.clock.now + 10, 'available')])
+            return 'share-2-retry'
+
+        result = self.run_waiter(
+            waiters.wait_for_resources_status, self.client,
+            ['share-1', 'share-2'], 'available', retry=retry)
+        self.assertNotIn('error', result)
+        self.assertEqual([(5, 'share-2')], retried)
+        self.assertEqual(100, result['seconds'])
+
+    @decorators.idempotent_id('32c70983-a6e5-4456-8e95-668449d5c14d')
+    def test_retry_outlasting_the_wait(self):
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'creating'), (15, 'error')])
+
+        def retry(resource_id, error):
+            self.client.add_resource(
+                'share', 'share-1-retry',
+                [(self.clock.now, 'creating'),
+                 (self.clock.now + 10, 'available')])
+            return 'share-1-retry'
+
+        result = self.run_waiter(
+            waiters.wait_for_resources_status, self.client, ['share-1'],
+            'available', timeout=20, retry=retry)
+        self.assertNotIn('error', result)
+        self.assertEqual(25, result['seconds'])
+        self.assertEqual(25, result['polls'])
+
+    @decorators.idempotent_id('b3685645-8d9b-4297-b23a-772984f0fc1b')
+    def test_timeout_of_the_last_poll(self):
+        self.client.build_interval = 10
+        self.client.add_resource('share', 'share-1', [(0, 'creating')])
+        result = self.run_waiter(
+            waiters.wait_for_resources_status, self.client, ['share-1'],
+            'available', timeout=25)
+        self.assertIsInstance(result['error'],
+                              share_exceptions.ResourcesWaitFailed)
+        self.assertEqual([10, 10, 5], self.clock.sleeps)
+        self.assertEqual(25, result['seconds'])
+
+    @decorators.idempotent_id('e55fe707-3914-41dd-90c1-13a0ed07b4be')
+    def test_unlisted_resources_fetched(self):
+        self.client.add_resource('share_instance', 'instance-1',
+                                 [(0, 'creating'), (3, 'available')])
+        self.assertRaises(share_exceptions.InvalidResource,
+                          waiters.wait_for_resources_status, self.client,
+                          ['instance-1'], 'available',
+                          resource_name='share_instance')
+
+
+class WaitForResourceDeletionTest(WaitersTestBase):
+
+    @decorators.idempotent_id('bea5438b-6359-45a0-92c2-4c447d7f7a21')
+    def test_wait_for_resource_deletion(self):
+        self.client.add_resource('share', 'share-1',
+                                 [(0, 'available'),
+                                  (7, simulation.DELETED)])
+        result = self.run_waiter(self.client.wait_for_resource_deletion,
+                                 share_id='share-1')
+        self.assertNotIn('error', result)
+        self.assertEqual(7, result['seconds'])
+        self.assertEqual({'is_resource_deleted': 8}, result['requests'])
+
+    @decorators.idempotent_id('31b013a3-fdf1-4993-8d3d-99bee3a4313c')
+    def test_wait_for_resources_deletion(self):
+        for number in range(1, 4):
+            self.client.add_resource('share', 'share-%s' % number,
+                                     [(0, 'available'),
+                                      (number * 2, simulation.DELETED)])
+        result = self.run_waiter(
+            self.client.wait_for_resources_deletion,
+            [{'share_id': 'share-%s' % number} for number in range(1, 4)])
+        self.assertNotIn('error', result)
+        self.assertEqual(6, result['seconds'])
+        # Shares are listed while several of them are left, then the last
+        # one is checked on its own.
+        self.assertEqual({'list_shares_with_detail': 5,
+                          'is_resource_deleted': 4}, result['requests'])
@@ -14,6 +14,7 @@
 #    under the License.
 
 from collections import OrderedDict
+import functools
 import random
 import re
 
@@ -22,6 +23,7 @@ from tempest import config
 from tempest.lib.common.utils import data_utils
 import testtools
 
+from manila_tempest_tests.common import microversions
 from manila_tempest_tests import utils
 
 CONF = config.CONF
@@ -83,10 +85,27 @@ def is_microversion_lt(left, right):
     return get_microversion_as_tuple(left) < get_microversion_as_tuple(right)
 
 
+def get_supported_microversion_range():
+    """Returns the lowest and highest microversions tests can use.
+
+    That is the configured range, narrowed down to the range the API
+    advertised if microversion negotiation is enabled and already done.
+    """
+    bottom = CONF.share.min_api_microversion
+    top = CONF.share.max_api_microversion
+    for api_bottom, api_top in microversions.get_negotiated_ranges():
+        if is_microversion_gt(api_bottom, bottom):
+            bottom = api_bottom
+        if is_microversion_lt(api_top, top):
+            top = api_top
+    return bottom, top
+
+
 def is_microversion_supported(microversion):
-    bottom = get_microversion_as_tuple(CONF.share.min_api_microversion)
+    bottom, top = get_supported_microversion_range()
+    bottom = get_microversion_as_tuple(bottom)
     microversion = get_microversion_as_tuple(microversion)
-    top = get_microversion_as_tuple(CONF.share.max_api_microversion)
+    top = get_microversion_as_tuple(top)
     return bottom <= microversion <= top
 
 
@@ -95,6 +114,16 @@ def skip_if_microversion_not_supported(microversion):
     if not is_microversion_supported(microversion):
         reason = ("Skipped. Test requires microversion '%s'." % microversion)
         return testtools.skip(reason)
+    if CONF.share.microversion_negotiation:
+        # The API may not have been asked for its microversions yet when the
+        # test module is loaded, check again once the test clients did.
+        def decorator(f):
+            @functools.wraps(f)
+            def wrapper(*args, **kwargs):
+                check_skip_if_microversion_not_supported(microversion)
+                return f(*args, **kwargs)
+            return wrapper
+        return decorator
     return lambda f: f
 
 